@@ -1,6 +1,14 @@
-import subprocess
-import logging
+import os
 import sys
+import time
+import shlex
+import signal
+import logging
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 
 # Invokes a given command and returns the stdout
@@ -31,3 +39,144 @@ def run(command):
         subprocess.run(command, shell=True, universal_newlines=True, timeout=45)
     except Exception:
         pass
+
+
+# Seconds between two checks of the timeout and cancellation of a command
+poll_interval = 0.2
+running_lock = threading.Lock()
+# Processes of the commands currently run by execute
+running = set()
+
+
+@dataclass
+class CommandResult:
+    """
+    Outcome of a command run by execute
+    """
+
+    command: List[str]
+    returncode: Optional[int] = None
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0
+    timed_out: bool = False
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    def error(self) -> str:
+        if self.timed_out:
+            return "timed out after %.1fs" % self.duration
+        if self.cancelled:
+            return "cancelled"
+        return "exit status %s: %s" % (self.returncode, self.stderr.strip())
+
+
+def kill(process):
+    # The command runs in its own session, kill its children as well
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except Exception:
+        process.kill()
+
+
+def read_lines(stream, lines, name, log_output):
+    for line in stream:
+        lines.append(line)
+        if log_output:
+            logging.info("%s: %s" % (name, line.rstrip()))
+    stream.close()
+
+
+def execute(command, timeout=None, log_output=False, check=False, cancel=None):
+    """
+    Runs a command without a shell, reading its stdout and stderr line by
+    line while it runs
+
+    Args:
+        command: argv list of the command, a string is split with shlex
+        timeout: seconds after which the command is killed
+        log_output: log every line of stdout and stderr as it is printed
+        check: log the failure and exit when the command fails, the same
+            way invoke does
+        cancel: threading.Event killing the command once set
+
+    Returns:
+        CommandResult of the command
+    """
+
+    argv = shlex.split(command) if isinstance(command, str) else list(command)
+    result = CommandResult(command=argv)
+    start_time = time.monotonic()
+    try:
+        process = subprocess.Popen(
+            argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, start_new_session=True
+        )
+    except OSError as e:
+        result.returncode = 127
+        result.stderr = str(e)
+    else:
+        with running_lock:
+            running.add(process)
+        stdout, stderr = [], []
+        name = os.path.basename(argv[0])
+        readers = [
+            threading.Thread(target=read_lines, args=(process.stdout, stdout, name, log_output), daemon=True),
+            threading.Thread(target=read_lines, args=(process.stderr, stderr, name, log_output), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            while True:
+                try:
+                    process.wait(poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if timeout is not None and time.monotonic() - start_time >= timeout:
+                    result.timed_out = True
+                elif cancel is not None and cancel.is_set():
+                    result.cancelled = True
+                else:
+                    continue
+                kill(process)
+                process.wait()
+                break
+        finally:
+            with running_lock:
+                running.discard(process)
+        for reader in readers:
+            reader.join()
+        result.returncode = process.returncode
+        result.stdout = "".join(stdout)
+        result.stderr = "".join(stderr)
+    result.duration = time.monotonic() - start_time
+    if check and not result.ok:
+        logging.error("Failed to run %s, error: %s" % (" ".join(argv), result.error()))
+        sys.exit(1)
+    return result
+
+
+def execute_many(commands, max_parallel=10, **kwargs):
+    """
+    Runs the commands with at most max_parallel of them running at the same
+    time, the keyword arguments are passed to execute
+
+    Returns:
+        list of the CommandResult of the commands in their order
+    """
+
+    if not commands:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(commands)))) as executor:
+        return list(executor.map(lambda command: execute(command, **kwargs), commands))
+
+
+def cancel_all():
+    """Kills all the commands being run by execute"""
+    with running_lock:
+        processes = list(running)
+    for process in processes:
+        kill(process)
@@ -1,38 +1,83 @@
-from kubernetes import client, config, utils, watch
+from kubernetes import client, config, utils
 from kubernetes.dynamic.client import DynamicClient
 from kubernetes.stream import stream
 from kubernetes.client.rest import ApiException
 from ..kubernetes.resources import *
+from ..kubernetes.informer import Informer
+from ..kubernetes.node_watch import NodeWatcher
+from ..kubernetes.pagination import paginate, paginate_raw
+import kraken.run_metrics.metrics as run_metrics
+import base64
 import logging
 import sys
 import re
 import time
+import threading
 
 kraken_node_name = ""
+informers = {}
+node_watcher = None
+node_watcher_lock = threading.Lock()
+# Number of objects requested per list call
+list_page_size = 500
 
 
 # Load kubeconfig and initialize kubernetes python client
 def initialize_clients(kubeconfig_path):
     global cli
     global batch_cli
-    global watch_resource
+    global apps_cli
+    global networking_cli
     global api_client
     global dyn_client
     global custom_object_client
     try:
         config.load_kube_config(kubeconfig_path)
-        cli = client.CoreV1Api()
-        batch_cli = client.BatchV1Api()
-        watch_resource = watch.Watch()
-        api_client = client.ApiClient()
-        custom_object_client = client.CustomObjectsApi()
-        k8s_client = config.new_client_from_config()
+        # All the clients share a connection pool, its requests are counted
+        # in the run metrics
+        api_client = run_metrics.count_api_calls(client.ApiClient())
+        cli = client.CoreV1Api(api_client)
+        batch_cli = client.BatchV1Api(api_client)
+        apps_cli = client.AppsV1Api(api_client)
+        networking_cli = client.NetworkingV1Api(api_client)
+        custom_object_client = client.CustomObjectsApi(api_client)
+        k8s_client = run_metrics.count_api_calls(config.new_client_from_config())
         dyn_client = DynamicClient(k8s_client)
     except ApiException as e:
         logging.error("Failed to initialize kubernetes client: %s\n" % e)
         sys.exit(1)
 
 
+def start_informers(resync_period=300):
+    """
+    Starts the shared list+watch caches for pods, nodes and namespaces.
+    Once they are synced the list and lookup helpers in this module are
+    served from memory instead of issuing a LIST against the API server.
+    """
+    global informers
+    logging.info("Starting the informer caches for pods, nodes and namespaces")
+    informers = {
+        "pods": Informer("pods", cli.list_pod_for_all_namespaces, resync_period).start(),
+        "nodes": Informer("nodes", cli.list_node, resync_period).start(),
+        "namespaces": Informer("namespaces", cli.list_namespace, resync_period).start(),
+    }
+
+
+def stop_informers():
+    global informers
+    for informer in informers.values():
+        informer.stop()
+    informers = {}
+
+
+def get_informer(kind):
+    """Returns the informer of the given kind if it is running and synced"""
+    informer = informers.get(kind)
+    if informer is not None and informer.has_synced():
+        return informer
+    return None
+
+
 def get_host() -> str:
     """Returns the Kubernetes server URL"""
     return client.configuration.Configuration.get_default_copy().host
@@ -61,24 +106,45 @@ def get_clusterversion_string() -> str:
             raise
 
 
+def iterate_namespaces(label_selector=None, page_size=None, fast=False, metadata_only=False):
+    """
+    Yields the namespaces in the cluster page by page, or from the
+    informer cache when it is enabled. When fast or metadata_only is set
+    NamespaceRecord objects decoded straight from the JSON response are
+    yielded instead of V1Namespace models.
+    """
+    informer = get_informer("namespaces")
+    if informer:
+        for namespace in informer.list(label_selector=label_selector):
+            yield NamespaceRecord.from_model(namespace) if fast or metadata_only else namespace
+        return
+    if fast or metadata_only:
+        for namespace in paginate_raw(
+            cli.list_namespace,
+            page_size=page_size or list_page_size,
+            metadata_only=metadata_only,
+            label_selector=label_selector
+        ):
+            yield NamespaceRecord.from_dict(namespace)
+        return
+    yield from paginate(
+        cli.list_namespace,
+        page_size=page_size or list_page_size,
+        label_selector=label_selector
+    )
+
+
 # List all namespaces
-def list_namespaces(label_selector=None):
+def list_namespaces(label_selector=None, fast=False):
     namespaces = []
     try:
-        if label_selector:
-            ret = cli.list_namespace(
-                pretty=True,
-                label_selector=label_selector
-                )
-        else:
-            ret = cli.list_namespace(pretty=True)
+        for namespace in iterate_namespaces(label_selector, metadata_only=fast):
+            namespaces.append(namespace.name if fast else namespace.metadata.name)
     except ApiException as e:
         logging.error(
-            "Exception when calling CoreV1Api->list_namespaced_pod: %s\n" % e
+            "Exception when calling CoreV1Api->list_namespace: %s\n" % e
         )
         raise e
-    for namespace in ret.items:
-        namespaces.append(namespace.metadata.name)
     return namespaces
 
 
@@ -136,53 +202,145 @@ def check_namespaces(namespaces, label_selectors=None):
         sys.exit(1)
 
 
+def iterate_nodes(label_selector=None, page_size=None, fast=False, metadata_only=False):
+    """
+    Yields the nodes in the cluster page by page, or from the informer
+    cache when it is enabled. When fast or metadata_only is set NodeRecord
+    objects decoded straight from the JSON response are yielded instead of
+    V1Node models.
+    """
+    informer = get_informer("nodes")
+    if informer:
+        for node in informer.list(label_selector=label_selector):
+            yield NodeRecord.from_model(node) if fast or metadata_only else node
+        return
+    if fast or metadata_only:
+        for node in paginate_raw(
+            cli.list_node,
+            page_size=page_size or list_page_size,
+            metadata_only=metadata_only,
+            label_selector=label_selector
+        ):
+            yield NodeRecord.from_dict(node)
+        return
+    yield from paginate(
+        cli.list_node,
+        page_size=page_size or list_page_size,
+        label_selector=label_selector
+    )
+
+
 # List nodes in the cluster
-def list_nodes(label_selector=None):
+def list_nodes(label_selector=None, fast=False):
     nodes = []
     try:
-        if label_selector:
-            ret = cli.list_node(pretty=True, label_selector=label_selector)
-        else:
-            ret = cli.list_node(pretty=True)
+        for node in iterate_nodes(label_selector, metadata_only=fast):
+            nodes.append(node.name if fast else node.metadata.name)
     except ApiException as e:
         logging.error("Exception when calling CoreV1Api->list_node: %s\n" % e)
         raise e
-    for node in ret.items:
-        nodes.append(node.metadata.name)
     return nodes
 
 
 # List nodes in the cluster that can be killed
-def list_killable_nodes(label_selector=None):
+def list_killable_nodes(label_selector=None, fast=False):
     nodes = []
     try:
-        if label_selector:
-            ret = cli.list_node(pretty=True, label_selector=label_selector)
-        else:
-            ret = cli.list_node(pretty=True)
+        for node in iterate_nodes(label_selector, fast=fast):
+            if fast:
+                if kraken_node_name != node.name and node.ready:
+                    nodes.append(node.name)
+            elif kraken_node_name != node.metadata.name:
+                for cond in node.status.conditions:
+                    if str(cond.type) == "Ready" and str(cond.status) == "True":
+                        nodes.append(node.metadata.name)
     except ApiException as e:
         logging.error("Exception when calling CoreV1Api->list_node: %s\n" % e)
         raise e
-    for node in ret.items:
-        if kraken_node_name != node.metadata.name:
-            for cond in node.status.conditions:
-                if str(cond.type) == "Ready" and str(cond.status) == "True":
-                    nodes.append(node.metadata.name)
     return nodes
 
 
+# Get the boot ID of every node, it changes when the node reboots
+def get_node_boot_ids(label_selector=None):
+    return dict(
+        (node.metadata.name, node.status.node_info.boot_id if node.status and node.status.node_info else None)
+        for node in iterate_nodes(label_selector)
+    )
+
+
+# Get the address of the given type of a node
+def get_node_address(node, address_type="InternalIP"):
+    informer = get_informer("nodes")
+    node_object = informer.get(node) if informer else cli.read_node(node)
+    if node_object is None:
+        return None
+    for address in (node_object.status.addresses if node_object.status else None) or []:
+        if address.type == address_type:
+            return address.address
+    return None
+
+
+# Get the address of the given type of every node in the cluster by node name
+def list_node_addresses(address_type="InternalIP", label_selector=None):
+    addresses = {}
+    try:
+        for node in iterate_nodes(label_selector):
+            for address in (node.status.addresses if node.status else None) or []:
+                if address.type == address_type:
+                    addresses[node.metadata.name] = address.address
+                    break
+    except ApiException as e:
+        logging.error("Exception when calling CoreV1Api->list_node: %s\n" % e)
+        raise e
+    return addresses
+
+
+def iterate_pods(
+    namespace=None, label_selector=None, page_size=None, fast=False, metadata_only=False, field_selector=None
+):
+    """
+    Yields the pods in the given namespace, or in all the namespaces when
+    namespace is None, page by page or from the informer cache when it is
+    enabled. When fast or metadata_only is set PodRecord objects decoded
+    straight from the JSON response are yielded instead of V1Pod models.
+    """
+    informer = get_informer("pods")
+    if informer:
+        for pod in informer.list(namespace, label_selector, field_selector):
+            yield PodRecord.from_model(pod) if fast or metadata_only else pod
+        return
+    if namespace:
+        list_func = cli.list_namespaced_pod
+        args = [namespace]
+    else:
+        list_func = cli.list_pod_for_all_namespaces
+        args = []
+    if fast or metadata_only:
+        for pod in paginate_raw(
+            list_func,
+            *args,
+            page_size=page_size or list_page_size,
+            metadata_only=metadata_only,
+            label_selector=label_selector,
+            field_selector=field_selector
+        ):
+            yield PodRecord.from_dict(pod)
+        return
+    yield from paginate(
+        list_func,
+        *args,
+        page_size=page_size or list_page_size,
+        label_selector=label_selector,
+        field_selector=field_selector
+    )
+
+
 # List pods in the given namespace
-def list_pods(namespace, label_selector=None):
+def list_pods(namespace, label_selector=None, fast=False):
     pods = []
     try:
-        if label_selector:
-            ret = cli.list_namespaced_pod(
-                namespace,
-                pretty=True,
-                label_selector=label_selector
-            )
-        else:
-            ret = cli.list_namespaced_pod(namespace, pretty=True)
+        for pod in iterate_pods(namespace, label_selector, metadata_only=fast):
+            pods.append(pod.name if fast else pod.metadata.name)
     except ApiException as e:
         logging.error(
             "Exception when calling \
@@ -190,22 +348,16 @@ def list_pods(namespace, label_selector=None):
             % e
         )
         raise e
-    for pod in ret.items:
-        pods.append(pod.metadata.name)
     return pods
 
 
-def get_all_pods(label_selector=None):
+def get_all_pods(label_selector=None, fast=False):
     pods = []
-    if label_selector:
-        ret = cli.list_pod_for_all_namespaces(
-            pretty=True,
-            label_selector=label_selector
-        )
-    else:
-        ret = cli.list_pod_for_all_namespaces(pretty=True)
-    for pod in ret.items:
-        pods.append([pod.metadata.name, pod.metadata.namespace])
+    for pod in iterate_pods(label_selector=label_selector, metadata_only=fast):
+        if fast:
+            pods.append([pod.name, pod.namespace])
+        else:
+            pods.append([pod.metadata.name, pod.metadata.namespace])
     return pods
 
 
@@ -358,6 +510,127 @@ def create_job(body, namespace="default"):
         raise
 
 
+def create_daemonset(body, namespace="default"):
+    try:
+        return apps_cli.create_namespaced_daemon_set(body=body, namespace=namespace)
+    except ApiException as api:
+        if api.status == 409:
+            logging.info("DaemonSet %s already present" % body["metadata"]["name"])
+            return apps_cli.read_namespaced_daemon_set(body["metadata"]["name"], namespace)
+        logging.error("Exception when calling AppsV1Api->create_namespaced_daemon_set: %s" % api)
+        raise
+
+
+def read_daemonset(name, namespace="default"):
+    return apps_cli.read_namespaced_daemon_set(name, namespace)
+
+
+def delete_daemonset(name, namespace="default"):
+    try:
+        apps_cli.delete_namespaced_daemon_set(
+            name, namespace, body=client.V1DeleteOptions(propagation_policy="Foreground", grace_period_seconds=0)
+        )
+    except ApiException as api:
+        if api.status != 404:
+            logging.error("Exception when calling AppsV1Api->delete_namespaced_daemon_set: %s" % api)
+            raise
+
+
+def create_net_policy(body, namespace="default"):
+    try:
+        return networking_cli.create_namespaced_network_policy(namespace=namespace, body=body)
+    except ApiException as api:
+        logging.error("Exception when calling NetworkingV1Api->create_namespaced_network_policy: %s" % api)
+        raise
+
+
+def delete_net_policy(name, namespace="default"):
+    try:
+        networking_cli.delete_namespaced_network_policy(name, namespace)
+    except ApiException as api:
+        if api.status != 404:
+            logging.error("Exception when calling NetworkingV1Api->delete_namespaced_network_policy: %s" % api)
+            raise
+
+
+def apply_objects(objects, namespace="default", field_manager="kraken"):
+    """
+    Server-side applies the given objects, the way kubectl apply -n does
+
+    Args:
+        objects: list of the objects of a manifest as dicts, None entries
+            from empty YAML documents are skipped
+        namespace: namespace of the namespaced objects which don't set one
+        field_manager: name of the manager of the applied fields
+    """
+
+    for body in objects:
+        if not body:
+            continue
+        resource = dyn_client.resources.get(api_version=body["apiVersion"], kind=body["kind"])
+        object_namespace = None
+        if resource.namespaced:
+            object_namespace = body["metadata"].get("namespace") or namespace
+            body = dict(body, metadata=dict(body["metadata"], namespace=object_namespace))
+        dyn_client.server_side_apply(
+            resource,
+            body=body,
+            name=body["metadata"]["name"],
+            namespace=object_namespace,
+            field_manager=field_manager,
+            force_conflicts=True,
+        )
+
+
+def delete_custom_objects(group, version, plural, namespace):
+    """Deletes all the custom objects of a kind in the namespace, missing kinds are ignored"""
+    try:
+        custom_object_client.delete_collection_namespaced_custom_object(group, version, namespace, plural)
+    except ApiException as api:
+        if api.status != 404:
+            logging.error("Exception when deleting the %s in the namespace %s: %s" % (plural, namespace, api))
+            raise
+
+
+def get_route_host(name, namespace):
+    route = custom_object_client.get_namespaced_custom_object("route.openshift.io", "v1", namespace, "routes", name)
+    return route["spec"]["host"]
+
+
+def get_service_account_token(name, namespace):
+    """
+    Returns a token of the service account, requested with the TokenRequest
+    API or read from its token secret on clusters which don't serve it
+    """
+
+    try:
+        token_request = cli.create_namespaced_service_account_token(
+            name, namespace, client.AuthenticationV1TokenRequest(spec=client.V1TokenRequestSpec(audiences=[]))
+        )
+        return token_request.status.token
+    except ApiException as api:
+        if api.status not in (403, 404, 405):
+            raise
+        logging.info("TokenRequest API not available, reading the token secret of %s" % name)
+    secrets = cli.list_namespaced_secret(namespace, field_selector="type=kubernetes.io/service-account-token")
+    for secret in secrets.items:
+        if (secret.metadata.annotations or {}).get("kubernetes.io/service-account.name") == name:
+            return base64.b64decode(secret.data["token"]).decode()
+    raise Exception("No token found for the service account %s in the namespace %s" % (name, namespace))
+
+
+def delete_jobs(label_selector, namespace="default"):
+    try:
+        batch_cli.delete_collection_namespaced_job(
+            namespace,
+            label_selector=label_selector,
+            propagation_policy="Foreground",
+            grace_period_seconds=0,
+        )
+    except ApiException as api:
+        logging.warn("Exception when calling BatchV1Api->delete_collection_namespaced_job: %s" % api)
+
+
 def get_job_status(name, namespace="default"):
     try:
         return batch_cli.read_namespaced_job_status(
@@ -374,66 +647,127 @@ def get_job_status(name, namespace="default"):
 
 
 # Monitor the status of the cluster nodes and set the status to true or false
-def monitor_nodes():
-    nodes = list_nodes()
+def monitor_nodes(summary=False, page_size=None, fast=False):
+    """
+    Evaluates the Ready and KernelDeadlock conditions of all the nodes
+    using a single paginated list (or the informer cache when enabled)
+
+    Args:
+        summary (bool)
+            - Return a HealthSummary instead of the (status, notready_nodes)
+              tuple
+
+        page_size (int)
+            - Number of nodes requested per list call, defaults to
+              list_page_size
+
+        fast (bool)
+            - Decode the nodes straight from the JSON response instead of
+              deserializing them into V1Node models
+
+    Returns:
+        (status, notready_nodes) or a HealthSummary with the number of
+        nodes per condition status and the names of the nodes not ready
+    """
     notready_nodes = []
-    node_kerneldeadlock_status = "False"
-    for node in nodes:
-        try:
-            node_info = cli.read_node_status(node, pretty=True)
-        except ApiException as e:
-            logging.error(
-                "Exception when calling \
-                           CoreV1Api->read_node_status: %s\n"
-                % e
-            )
-            raise e
-        for condition in node_info.status.conditions:
-            if condition.type == "KernelDeadlock":
-                node_kerneldeadlock_status = condition.status
-            elif condition.type == "Ready":
-                node_ready_status = condition.status
+    counts = {}
+    total = 0
+    try:
+        for node in iterate_nodes(page_size=page_size, fast=fast):
+            total += 1
+            if fast:
+                node_name = node.name
+                conditions = node.conditions.items()
             else:
-                continue
-        if node_kerneldeadlock_status != "False" or node_ready_status != "True":  # noqa  # noqa
-            notready_nodes.append(node)
-    if len(notready_nodes) != 0:
-        status = False
-    else:
-        status = True
+                node_name = node.metadata.name
+                conditions = [(condition.type, condition.status) for condition in node.status.conditions or []]
+            node_kerneldeadlock_status = "False"
+            node_ready_status = "Unknown"
+            for condition_type, condition_status in conditions:
+                if condition_type == "KernelDeadlock":
+                    node_kerneldeadlock_status = condition_status
+                elif condition_type == "Ready":
+                    node_ready_status = condition_status
+                else:
+                    continue
+                key = "%s=%s" % (condition_type, condition_status)
+                counts[key] = counts.get(key, 0) + 1
+            if node_kerneldeadlock_status != "False" or node_ready_status != "True":  # noqa  # noqa
+                notready_nodes.append(node_name)
+    except ApiException as e:
+        logging.error(
+            "Exception when calling \
+                       CoreV1Api->list_node: %s\n"
+            % e
+        )
+        raise e
+    status = len(notready_nodes) == 0
+    if summary:
+        return HealthSummary(
+            healthy=status,
+            total=total,
+            counts=counts,
+            unhealthy=notready_nodes
+        )
     return status, notready_nodes
 
 
 # Monitor the status of the pods in the specified namespace
 # and set the status to true or false
-def monitor_namespace(namespace):
-    pods = list_pods(namespace)
+def monitor_namespace(namespace, summary=False, page_size=None, fast=False):
+    """
+    Evaluates the phase of all the pods in a namespace using a single
+    paginated list (or the informer cache when enabled)
+
+    Args:
+        namespace (string)
+            - Namespace to monitor
+
+        summary (bool)
+            - Return a HealthSummary instead of the (status, notready_pods)
+              tuple
+
+        page_size (int)
+            - Number of pods requested per list call, defaults to
+              list_page_size
+
+        fast (bool)
+            - Decode the pods straight from the JSON response instead of
+              deserializing them into V1Pod models
+
+    Returns:
+        (status, notready_pods) or a HealthSummary with the number of pods
+        per phase and the names of the pods that are not running
+    """
     notready_pods = []
-    for pod in pods:
-        try:
-            pod_info = cli.read_namespaced_pod_status(
-                pod,
-                namespace,
-                pretty=True
-            )
-        except ApiException as e:
-            logging.error(
-                "Exception when calling \
-                           CoreV1Api->read_namespaced_pod_status: %s\n"
-                % e
-            )
-            raise e
-        pod_status = pod_info.status.phase
-        if (
-            pod_status != "Running" and
-            pod_status != "Completed" and
-            pod_status != "Succeeded"
-        ):
-            notready_pods.append(pod)
-    if len(notready_pods) != 0:
-        status = False
-    else:
-        status = True
+    counts = {}
+    total = 0
+    try:
+        for pod in iterate_pods(namespace, page_size=page_size, fast=fast):
+            total += 1
+            pod_status = pod.phase if fast else pod.status.phase
+            counts[pod_status] = counts.get(pod_status, 0) + 1
+            if (
+                pod_status != "Running" and
+                pod_status != "Completed" and
+                pod_status != "Succeeded"
+            ):
+                notready_pods.append(pod.name if fast else pod.metadata.name)
+    except ApiException as e:
+        logging.error(
+            "Exception when calling \
+                       CoreV1Api->list_namespaced_pod: %s\n"
+            % e
+        )
+        raise e
+    status = len(notready_pods) == 0
+    if summary:
+        return HealthSummary(
+            healthy=status,
+            total=total,
+            counts=counts,
+            unhealthy=notready_pods
+        )
     return status, notready_pods
 
 
@@ -490,13 +824,19 @@ def get_pod_info(name: str, namespace: str = 'default') -> Pod:
           kubectl command in the given format if the pod exists
         - Returns None if the pod doesn't exist
     """
-    pod_exists = check_if_pod_exists(name=name, namespace=namespace)
+    informer = get_informer("pods")
+    if informer:
+        response = informer.get(name, namespace)
+        pod_exists = response is not None
+    else:
+        pod_exists = check_if_pod_exists(name=name, namespace=namespace)
     if pod_exists:
-        response = cli.read_namespaced_pod(
-            name=name,
-            namespace=namespace,
-            pretty='true'
-        )
+        if not informer:
+            response = cli.read_namespaced_pod(
+                name=name,
+                namespace=namespace,
+                pretty='true'
+            )
         container_list = []
 
         # Create a list of containers present in the pod
@@ -665,6 +1005,14 @@ def check_if_pod_exists(name: str, namespace: str) -> bool:
         Boolean value indicating whether the pod exists or not
     """
 
+    namespace_informer = get_informer("namespaces")
+    pod_informer = get_informer("pods")
+    if namespace_informer and pod_informer:
+        if namespace_informer.get(namespace) is None:
+            logging.error("Namespace '%s' doesn't exist" % str(namespace))
+            return False
+        return pod_informer.get(name, namespace) is not None
+
     namespace_exists = check_if_namespace_exists(namespace)
     if namespace_exists:
         pod_list = list_pods(namespace=namespace)
@@ -675,101 +1023,14 @@ def check_if_pod_exists(name: str, namespace: str) -> bool:
     return False
 
 
-def check_if_pvc_exists(name: str, namespace: str) -> bool:
-    """
-    Function that checks if a namespace exists by parsing through
-    the list of projects.
-    Args:
-        name (string)
-            - PVC name
-
-        namespace (string)
-            - Namespace name
-
-    Returns:
-        Boolean value indicating whether the Persistent Volume Claim
-        exists or not.
-    """
-    namespace_exists = check_if_namespace_exists(namespace)
-    if namespace_exists:
-        response = cli.list_namespaced_persistent_volume_claim(
-            namespace=namespace
-        )
-        pvc_list = [pvc.metadata.name for pvc in response.items]
-        if name in pvc_list:
-            return True
-    else:
-        logging.error("Namespace '%s' doesn't exist" % str(namespace))
-    return False
-
-
-def get_pvc_info(name: str, namespace: str) -> PVC:
-    """
-    Function to retrieve information about a Persistent Volume Claim in a
-    given namespace
-
-    Args:
-        name (string)
-            - Name of the persistent volume claim
-
-        namespace (string)
-            - Namespace where the persistent volume claim is present
-
-    Returns:
-        - A PVC data class containing the name, capacity, volume name,
-          namespace and associated pod names of the PVC if the PVC exists
-        - Returns None if the PVC doesn't exist
-    """
-
-    pvc_exists = check_if_pvc_exists(name=name, namespace=namespace)
-    if pvc_exists:
-        pvc_info_response = cli.read_namespaced_persistent_volume_claim(
-            name=name,
-            namespace=namespace,
-            pretty=True
-        )
-        pod_list_response = cli.list_namespaced_pod(namespace=namespace)
-
-        capacity = pvc_info_response.status.capacity['storage']
-        volume_name = pvc_info_response.spec.volume_name
-
-        # Loop through all pods in the namespace to find associated PVCs
-        pvc_pod_list = []
-        for pod in pod_list_response.items:
-            for volume in pod.spec.volumes:
-                if (
-                    volume.persistent_volume_claim is not None
-                    and volume.persistent_volume_claim.claim_name == name
-                ):
-                    pvc_pod_list.append(pod.metadata.name)
-
-        pvc_info = PVC(
-            name=name,
-            capacity=capacity,
-            volumeName=volume_name,
-            podNames=pvc_pod_list,
-            namespace=namespace
-        )
-        return pvc_info
-    else:
-        logging.error(
-            "PVC '%s' doesn't exist in namespace '%s'" % (
-                str(name),
-                str(namespace)
-            )
-        )
-        return None
-
-
 # Find the node kraken is deployed on
 # Set global kraken node to not delete
 def find_kraken_node():
-    pods = get_all_pods()
     kraken_pod_name = None
-    for pod in pods:
-        if "kraken-deployment" in pod[0]:
-            kraken_pod_name = pod[0]
-            kraken_project = pod[1]
+    for pod in iterate_pods(metadata_only=True):
+        if "kraken-deployment" in pod.name:
+            kraken_pod_name = pod.name
+            kraken_project = pod.namespace
             break
     # have to switch to proper project
 
@@ -784,32 +1045,16 @@ def find_kraken_node():
             sys.exit(1)
 
 
-# Watch for a specific node status
-def watch_node_status(node, status, timeout, resource_version):
-    count = timeout
-    for event in watch_resource.stream(
-        cli.list_node,
-        field_selector=f"metadata.name={node}",
-        timeout_seconds=timeout,
-        resource_version=f"{resource_version}"
-    ):
-        conditions = [
-            status
-            for status in event["object"].status.conditions
-            if status.type == "Ready"
-        ]
-        if conditions[0].status == status:
-            watch_resource.stop()
-            break
-        else:
-            count -= 1
-            logging.info(
-                "Status of node " + node + ": " + str(conditions[0].status)
-            )
-        if not count:
-            watch_resource.stop()
+# Watch for a specific node status, the waits of all the nodes share a
+# single node watch
+def watch_node_status(node, status, timeout):
+    return get_node_watcher().wait_for_status(node, status, timeout)
 
 
-# Get the resource version for the specified node
-def get_node_resource_version(node):
-    return cli.read_node(name=node).metadata.resource_version
+# Get the node watcher shared by the node status waits, started on first use
+def get_node_watcher():
+    global node_watcher
+    with node_watcher_lock:
+        if node_watcher is None:
+            node_watcher = NodeWatcher(cli).start()
+        return node_watcher
@@ -0,0 +1,167 @@
+import logging
+import time
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+import kraken.kubernetes.client as kubecli
+import kraken.signal_state.state as signal_state
+from kraken.kubernetes.pagination import list_all
+
+
+# Health checks run in order once the cluster is started again
+checks = ("nodes", "apiserver", "etcd", "operators")
+# Seconds between two attempts of the apiserver, etcd and operators checks
+poll_interval = 5
+# Maximum number of seconds a node watch runs before the nodes are relisted
+watch_timeout = 60
+
+
+def node_ready(node):
+    for condition in (node.status.conditions if node.status else None) or []:
+        if condition.type == "Ready":
+            return condition.status == "True"
+    return False
+
+
+def wait_for_nodes_ready(deadline):
+    """
+    Waits for every node of the cluster to be Ready, following a node watch
+    started from a list. The apiserver may not answer right after a cold
+    start so failed calls are retried until the deadline.
+
+    Returns:
+        True once all the nodes are Ready, False on timeout or STOP
+    """
+
+    while time.time() < deadline and not signal_state.stopped():
+        try:
+            nodes, resource_version = list_all(kubecli.cli.list_node, page_size=kubecli.list_page_size)
+            not_ready = set(node.metadata.name for node in nodes if not node_ready(node))
+            if not not_ready:
+                return True
+            logging.info("Waiting for %s nodes to be Ready: %s" % (len(not_ready), sorted(not_ready)))
+            node_watch = watch.Watch()
+            for event in node_watch.stream(
+                kubecli.cli.list_node,
+                resource_version=resource_version,
+                timeout_seconds=max(1, int(min(deadline - time.time(), watch_timeout)))
+            ):
+                if event["type"] == "ERROR":
+                    break
+                node = event["object"]
+                if event["type"] == "DELETED" or node_ready(node):
+                    not_ready.discard(node.metadata.name)
+                else:
+                    not_ready.add(node.metadata.name)
+                if not not_ready or signal_state.stopped():
+                    node_watch.stop()
+                    break
+            if not not_ready:
+                return True
+        except Exception as e:
+            logging.info("Cluster isn't answering the node list yet: %s" % (e))
+            signal_state.wait(min(poll_interval, max(0, deadline - time.time())))
+    return False
+
+
+def apiserver_ready(path="/readyz"):
+    """
+    Returns True when the given readiness endpoint of the apiserver answers
+    ok, /readyz/etcd checks the connection of the apiserver to etcd
+    """
+
+    try:
+        kubecli.dyn_client.request("GET", path)
+        return True
+    except Exception as e:
+        logging.debug("%s isn't ready: %s" % (path, e))
+        return False
+
+
+def cluster_operators_not_ready():
+    """
+    Returns the names of the OpenShift cluster operators that aren't
+    available or are degraded, empty when there are no cluster operators
+    """
+
+    try:
+        operators = kubecli.custom_object_client.list_cluster_custom_object(
+            "config.openshift.io", "v1", "clusteroperators"
+        )
+    except ApiException as e:
+        if e.status == 404:
+            return []
+        raise
+    not_ready = []
+    for operator in operators.get("items", []):
+        conditions = {}
+        for condition in (operator.get("status") or {}).get("conditions") or []:
+            conditions[condition["type"]] = condition["status"]
+        if conditions.get("Available") != "True" or conditions.get("Degraded") == "True":
+            not_ready.append(operator["metadata"]["name"])
+    return not_ready
+
+
+def operators_ready():
+    try:
+        not_ready = cluster_operators_not_ready()
+    except Exception as e:
+        logging.debug("Failed to get the cluster operators: %s" % (e))
+        return False
+    if not_ready:
+        logging.info("Waiting for the cluster operators to be available: %s" % (", ".join(sorted(not_ready))))
+    return not not_ready
+
+
+def poll(check, deadline):
+    """
+    Calls check every poll_interval seconds until it returns True
+
+    Returns:
+        True once the check passed, False on timeout or STOP
+    """
+
+    while not check():
+        if time.time() + poll_interval > deadline or not signal_state.wait(poll_interval):
+            return False
+    return True
+
+
+def wait_for_cluster_health(timeout):
+    """
+    Waits for the cluster to be healthy again after a restart: every node
+    Ready, the apiserver and its etcd readiness checks passing and the
+    cluster operators available and not degraded on OpenShift. Returns as
+    soon as all the checks pass.
+
+    Args:
+        timeout: maximum number of seconds to wait for
+
+    Returns:
+        dict with healthy, the seconds it took for the cluster to be healthy
+        and by check the seconds it took for it to pass, None when it didn't
+    """
+
+    start_time = time.time()
+    deadline = start_time + timeout
+    passed = dict((check, None) for check in checks)
+    waits = {
+        "nodes": lambda: wait_for_nodes_ready(deadline),
+        "apiserver": lambda: poll(lambda: apiserver_ready("/readyz"), deadline),
+        "etcd": lambda: poll(lambda: apiserver_ready("/readyz/etcd"), deadline),
+        "operators": lambda: poll(operators_ready, deadline),
+    }
+    for check in checks:
+        if not waits[check]():
+            break
+        passed[check] = round(time.time() - start_time, 3)
+        logging.info("The %s check passed after %ss" % (check, passed[check]))
+    healthy = all(seconds is not None for seconds in passed.values())
+    if not healthy:
+        failed = [check for check in checks if passed[check] is None]
+        logging.error("The cluster wasn't healthy after %ss, failed checks: %s" % (timeout, ", ".join(failed)))
+    return {
+        "healthy": healthy,
+        "duration": round(time.time() - start_time, 3),
+        "checks": passed,
+    }
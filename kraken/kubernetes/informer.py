@@ -0,0 +1,347 @@
+import logging
+import re
+import threading
+import time
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from kraken.kubernetes.pagination import list_all
+
+
+# Matches a single set based requirement such as "env in (prod, qa)"
+set_requirement_regex = re.compile(r"^\s*(\S+)\s+(in|notin)\s+\((.*)\)\s*$")
+
+
+def split_label_selector(label_selector):
+    """
+    Splits a label selector into its requirements. Commas inside the
+    parenthesis of set based requirements are not treated as separators.
+    """
+
+    requirements = []
+    depth = 0
+    current = ""
+    for char in label_selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            requirements.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        requirements.append(current.strip())
+    return requirements
+
+
+def match_label_selector(labels, label_selector):
+    """
+    Checks if a set of labels matches the given label selector.
+    Equality based (=, ==, !=), set based (in, notin) and existence
+    (key, !key) requirements are supported.
+
+    Args:
+        labels (dict)
+            - Labels of the object, None is treated as no labels
+
+        label_selector (string)
+            - Kubernetes label selector
+
+    Returns:
+        Boolean value indicating whether all the requirements match
+    """
+
+    if not label_selector:
+        return True
+    labels = labels or {}
+    for requirement in split_label_selector(label_selector):
+        set_match = set_requirement_regex.match(requirement)
+        if set_match:
+            key, operator, values = set_match.groups()
+            values = set(value.strip() for value in values.split(","))
+            if operator == "in" and labels.get(key) not in values:
+                return False
+            if operator == "notin" and key in labels and labels[key] in values:
+                return False
+        elif "!=" in requirement:
+            key, value = [part.strip() for part in requirement.split("!=", 1)]
+            if labels.get(key) == value:
+                return False
+        elif "=" in requirement:
+            key, value = [part.strip() for part in re.split("==?", requirement, 1)]
+            if labels.get(key) != value:
+                return False
+        elif requirement.startswith("!"):
+            if requirement[1:].strip() in labels:
+                return False
+        elif requirement not in labels:
+            return False
+    return True
+
+
+# Fields supported in the field selectors of the cached lists
+field_getters = {
+    "metadata.name": lambda obj: obj.metadata.name,
+    "metadata.namespace": lambda obj: obj.metadata.namespace,
+    "spec.nodeName": lambda obj: getattr(obj.spec, "node_name", None),
+    "status.phase": lambda obj: getattr(obj.status, "phase", None),
+}
+
+
+def match_field_selector(obj, field_selector):
+    """
+    Checks if an object matches the given field selector. Only the equality
+    based (=, ==, !=) requirements on the fields of field_getters are
+    supported, the same as most of the fields of the API server.
+
+    Returns:
+        Boolean value indicating whether all the requirements match
+    """
+
+    if not field_selector:
+        return True
+    for requirement in field_selector.split(","):
+        key, operator, value = re.match(r"^\s*([^!=\s]+)\s*(!=|==?)\s*(.*?)\s*$", requirement).groups()
+        if key not in field_getters:
+            raise ValueError("Unsupported field selector %s" % requirement)
+        if (str(field_getters[key](obj)) == value) != (operator != "!="):
+            return False
+    return True
+
+
+class Informer:
+    """
+    Informer keeps an in-memory copy of a Kubernetes resource list up to date
+    by listing it once and then following a watch from the returned
+    resourceVersion. The watch is restarted from the last seen resourceVersion
+    when it times out, a full relist is done when the resourceVersion expired
+    (410 Gone) and every resync_period seconds. Threads can block on a
+    condition of the cache with wait_for, they are woken up on every change.
+
+    Args:
+        name (string)
+            - Name used in the log messages, for example "pods"
+
+        list_func (function)
+            - List function of the Kubernetes client such as
+              CoreV1Api.list_pod_for_all_namespaces, list_node or
+              BatchV1Api.list_namespaced_job
+
+        resync_period (int)
+            - Seconds between full relists, 0 disables the periodic resync
+
+        watch_timeout (int)
+            - Server side timeout of every single watch request
+
+        key (function)
+            - Returns the cache key of an object, namespace/name for the
+              namespaced objects and name for the others by default
+
+        backoff (int)
+            - Seconds to wait before retrying after a failed list or watch
+
+        list_args, list_kwargs
+            - Arguments passed to list_func on every list and watch, for
+              example the namespace and label_selector
+    """
+
+    # Seconds start waits for the initial list
+    sync_timeout = 120
+
+    def __init__(
+        self, name, list_func, resync_period=300, watch_timeout=60, key=None, backoff=1, list_args=(),
+        list_kwargs=None
+    ):
+        self.name = name
+        self.list_func = list_func
+        self.resync_period = resync_period
+        self.watch_timeout = watch_timeout
+        self.backoff = backoff
+        self.list_args = tuple(list_args)
+        self.list_kwargs = list_kwargs or {}
+        if key is not None:
+            self.key = key
+        self.resource_version = None
+        self.items = {}
+        # Guards the cache, the waiters are notified on every change
+        self.lock = threading.Condition(threading.RLock())
+        self.synced = threading.Event()
+        self.stopped = threading.Event()
+        self.watch = None
+        self.thread = None
+        self.last_sync = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @staticmethod
+    def key(obj):
+        if obj.metadata.namespace:
+            return "%s/%s" % (obj.metadata.namespace, obj.metadata.name)
+        return obj.metadata.name
+
+    def start(self, sync_timeout=None):
+        """
+        Starts the list+watch loop in a daemon thread, if it wasn't started
+        yet, and waits up to sync_timeout seconds for the initial list to
+        complete
+        """
+
+        with self.lock:
+            if self.thread is not None:
+                return self
+            self.thread = threading.Thread(
+                target=self.run,
+                name="informer-%s" % self.name,
+                daemon=True
+            )
+            self.thread.start()
+        sync_timeout = self.sync_timeout if sync_timeout is None else sync_timeout
+        if sync_timeout and not self.synced.wait(sync_timeout):
+            logging.warning(
+                "Informer cache for %s did not sync within %s seconds" % (self.name, sync_timeout)
+            )
+        return self
+
+    def stop(self):
+        with self.lock:
+            self.stopped.set()
+            self.lock.notify_all()
+        if self.watch:
+            self.watch.stop()
+
+    def has_synced(self):
+        return self.synced.is_set() and not self.stopped.is_set()
+
+    def relist(self):
+        objects, resource_version = list_all(self.list_func, *self.list_args, **self.list_kwargs)
+        items = {}
+        for obj in objects:
+            items[self.key(obj)] = obj
+        with self.lock:
+            self.items = items
+            self.resource_version = resource_version
+            self.synced.set()
+            self.lock.notify_all()
+        self.last_sync = time.time()
+        logging.debug(
+            "Informer cache for %s listed %s objects at resourceVersion %s"
+            % (self.name, len(items), self.resource_version)
+        )
+
+    def apply_event(self, event):
+        event_type = event["type"]
+        obj = event["object"]
+        if event_type == "ERROR":
+            raw = event.get("raw_object", {}) or {}
+            if raw.get("code") == 410:
+                raise ApiException(status=410, reason=raw.get("message", "Gone"))
+            raise ApiException(status=raw.get("code", 500), reason=raw.get("message", ""))
+        with self.lock:
+            self.resource_version = obj.metadata.resource_version
+            if event_type in ("ADDED", "MODIFIED"):
+                self.items[self.key(obj)] = obj
+            elif event_type == "DELETED":
+                self.items.pop(self.key(obj), None)
+            self.lock.notify_all()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                if (
+                    self.resource_version is None or
+                    (self.resync_period and time.time() - self.last_sync >= self.resync_period)
+                ):
+                    self.relist()
+                self.watch = watch.Watch()
+                for event in self.watch.stream(
+                    self.list_func,
+                    *self.list_args,
+                    resource_version=self.resource_version,
+                    timeout_seconds=self.watch_timeout,
+                    allow_watch_bookmarks=True,
+                    **self.list_kwargs
+                ):
+                    if self.stopped.is_set():
+                        self.watch.stop()
+                        break
+                    if event["type"] == "BOOKMARK":
+                        with self.lock:
+                            self.resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+                    else:
+                        self.apply_event(event)
+                    if self.resync_period and time.time() - self.last_sync >= self.resync_period:
+                        self.watch.stop()
+                        break
+            except ApiException as e:
+                if e.status == 410:
+                    logging.info(
+                        "Informer cache for %s: resourceVersion %s expired, relisting"
+                        % (self.name, self.resource_version)
+                    )
+                    self.resource_version = None
+                else:
+                    logging.error("Informer cache for %s: watch failed: %s" % (self.name, e))
+                    self.stopped.wait(self.backoff)
+            except Exception as e:
+                logging.error("Informer cache for %s: watch failed: %s" % (self.name, e))
+                self.stopped.wait(self.backoff)
+
+    def wait_for(self, predicate, timeout):
+        """
+        Waits for the cache to satisfy a condition, starting the informer
+        if it isn't running yet
+
+        Args:
+            predicate (function)
+                - Called with the cache lock held once the initial list
+                  completed and after every change of the cache
+
+            timeout (float)
+                - Maximum number of seconds to wait for
+
+        Returns:
+            The last value returned by predicate, a falsy one on timeout or
+            when the informer stopped
+        """
+
+        self.start(sync_timeout=0)
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while True:
+                result = predicate() if self.synced.is_set() else None
+                if result:
+                    return result
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.stopped.is_set():
+                    return result
+                self.lock.wait(remaining)
+
+    def list(self, namespace=None, label_selector=None, field_selector=None):
+        """
+        Returns the cached objects, optionally filtered by namespace,
+        label selector and field selector
+        """
+
+        with self.lock:
+            items = list(self.items.values())
+        return [
+            obj for obj in items
+            if (namespace is None or obj.metadata.namespace == namespace) and
+            match_label_selector(obj.metadata.labels, label_selector) and
+            match_field_selector(obj, field_selector)
+        ]
+
+    def get(self, name, namespace=None):
+        """
+        Returns the cached object or None if it doesn't exist
+        """
+
+        key = "%s/%s" % (namespace, name) if namespace else name
+        with self.lock:
+            return self.items.get(key)
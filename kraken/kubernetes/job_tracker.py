@@ -0,0 +1,73 @@
+from kraken.kubernetes.informer import Informer
+
+
+def job_state(job):
+    """
+    Returns "Complete" or "Failed" once the job finished, None while it runs
+    """
+
+    status = job.status
+    if status is None:
+        return None
+    for condition in status.conditions or []:
+        if condition.status == "True" and condition.type in ("Complete", "Failed"):
+            return condition.type
+    if status.failed:
+        return "Failed"
+    if status.succeeded:
+        return "Complete"
+    return None
+
+
+class JobTracker(Informer):
+    """
+    JobTracker follows the jobs matching a label selector in a namespace with
+    a single list+watch running in a background thread, the waits on the
+    jobs return on the event that finishes the last of them instead of
+    reading every job in turn.
+
+    Usage:
+        with JobTracker(batch_v1, "default", "kraken-run=" + run_id) as tracker:
+            create the jobs
+            states = tracker.wait_for_jobs(job_names, timeout)
+    """
+
+    # The waits don't block on the initial list
+    sync_timeout = 0
+
+    def __init__(self, batch_v1, namespace, label_selector, watch_timeout=300, backoff=5):
+        super().__init__(
+            "jobs",
+            batch_v1.list_namespaced_job,
+            resync_period=0,
+            watch_timeout=watch_timeout,
+            key=lambda job: job.metadata.name,
+            backoff=backoff,
+            list_args=(namespace,),
+            list_kwargs={"label_selector": label_selector},
+        )
+        self.namespace = namespace
+        self.label_selector = label_selector
+
+    def get_job(self, name):
+        return self.get(name)
+
+    def states(self, names):
+        with self.lock:
+            return dict((name, job_state(self.items[name]) if name in self.items else None) for name in names)
+
+    def wait_for_jobs(self, names, timeout):
+        """
+        Waits for all the given jobs to complete or fail
+
+        Args:
+            names: names of the jobs
+            timeout: maximum number of seconds to wait for
+
+        Returns:
+            dict of the state of every job, "Complete", "Failed" or None for
+            the jobs which didn't finish before the timeout
+        """
+
+        self.wait_for(lambda: all(self.states(names).values()), timeout)
+        return self.states(names)
@@ -0,0 +1,65 @@
+import logging
+
+from kraken.kubernetes.informer import Informer
+
+
+def ready_status(node):
+    """
+    Returns the status of the Ready condition of a node, None when it has
+    no Ready condition
+    """
+
+    for condition in (node.status.conditions if node.status else None) or []:
+        if condition.type == "Ready":
+            return condition.status
+    return None
+
+
+class NodeWatcher(Informer):
+    """
+    NodeWatcher follows the Ready condition of every node of the cluster
+    with a single list+watch running in a background thread. Any number of
+    threads can wait on it for a node to reach a Ready status, they all
+    share the one watch stream and are woken up on the event that changes
+    the status of their node.
+
+    Usage:
+        with NodeWatcher(core_v1) as node_watcher:
+            node_watcher.wait_for_status(node, "False", timeout)
+    """
+
+    # The waits don't block on the initial list
+    sync_timeout = 0
+
+    def __init__(self, core_v1, watch_timeout=300, backoff=5):
+        super().__init__("nodes", core_v1.list_node, resync_period=0, watch_timeout=watch_timeout, backoff=backoff)
+
+    def wait_for_status(self, node, status, timeout):
+        """
+        Waits for the Ready condition of the node to have the given status,
+        starting the watch if it isn't running yet
+
+        Args:
+            node: name of the node
+            status: status of the Ready condition to wait for, "True",
+                "False" or "Unknown"
+            timeout: maximum number of seconds to wait for
+
+        Returns:
+            True once the node reached the status, False on timeout
+        """
+
+        last_status = []
+
+        def reached():
+            node_object = self.items.get(node)
+            current_status = ready_status(node_object) if node_object is not None else None
+            if current_status != status and last_status[-1:] != [current_status]:
+                logging.info("Status of node " + node + ": " + str(current_status))
+                last_status.append(current_status)
+            return current_status == status
+
+        if self.wait_for(reached, timeout):
+            return True
+        logging.info("Node %s didn't reach the status %s in %s seconds" % (node, status, timeout))
+        return False
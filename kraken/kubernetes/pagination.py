@@ -0,0 +1,115 @@
+import json
+import random
+
+
+# Accept header asking the API server for metadata only lists, falling back to
+# the full objects on servers that don't support it
+partial_object_metadata_list = "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+
+
+def paginate(list_func, *args, page_size=500, **kwargs):
+    """
+    Generator that calls a Kubernetes list function in chunks of page_size
+    objects by following the continue token, yielding the objects one by one.
+    Only a single page is held in memory and the first objects are available
+    before the rest of the list has been fetched.
+
+    Args:
+        list_func (function)
+            - List function of the Kubernetes client, for example
+              CoreV1Api.list_pod_for_all_namespaces
+
+        page_size (int)
+            - Number of objects requested per call, 0 or None fetches
+              everything in a single response
+
+        args, kwargs
+            - Passed to list_func, for example the namespace or the
+              label_selector
+
+    Yields:
+        The objects of the list
+    """
+
+    _continue = None
+    while True:
+        ret = list_func(*args, limit=page_size or None, _continue=_continue, **kwargs)
+        for item in ret.items:
+            yield item
+        _continue = ret.metadata._continue
+        if not _continue:
+            break
+
+
+def list_all(list_func, *args, page_size=500, **kwargs):
+    """
+    Fetches a complete list page by page and returns it together with its
+    resourceVersion, which is the starting point for a watch that must not
+    miss any change made after the list.
+
+    Returns:
+        A tuple of the objects and the resourceVersion of the list
+    """
+
+    items = []
+    _continue = None
+    while True:
+        ret = list_func(*args, limit=page_size or None, _continue=_continue, **kwargs)
+        items.extend(ret.items)
+        _continue = ret.metadata._continue
+        if not _continue:
+            return items, ret.metadata.resource_version
+
+
+def paginate_raw(list_func, *args, page_size=500, metadata_only=False, **kwargs):
+    """
+    Same as paginate, but skips the deserialization into the client models
+    and yields the objects as the plain dicts decoded from the JSON response.
+
+    Args:
+        metadata_only (bool)
+            - Request a PartialObjectMetadataList so that only the metadata
+              of the objects is transferred and decoded
+    """
+
+    if metadata_only:
+        kwargs["_headers"] = {"Accept": partial_object_metadata_list}
+    _continue = None
+    while True:
+        response = list_func(
+            *args,
+            limit=page_size or None,
+            _continue=_continue,
+            _preload_content=False,
+            **kwargs
+        )
+        ret = json.loads(response.data)
+        for item in ret.get("items") or []:
+            yield item
+        _continue = (ret.get("metadata") or {}).get("continue")
+        if not _continue:
+            break
+
+
+def sample(iterable, count):
+    """
+    Picks count random items from an iterable of unknown length in a single
+    pass while keeping at most count items in memory (reservoir sampling).
+
+    Returns:
+        A tuple of the randomly selected items and the total number of items
+        seen. Fewer than count items are returned if the iterable is shorter.
+    """
+
+    reservoir = []
+    seen = 0
+    for item in iterable:
+        seen += 1
+        if len(reservoir) < count:
+            reservoir.append(item)
+        else:
+            index = random.randrange(seen)
+            if index < count:
+                reservoir[index] = item
+    random.shuffle(reservoir)
+    return reservoir, seen
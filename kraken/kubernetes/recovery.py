@@ -0,0 +1,239 @@
+import logging
+import math
+import threading
+import time
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from kraken.kubernetes.resources import PodRecord
+
+
+# Recovery stages in the order a replacement pod goes through them
+stages = ("scheduled", "running", "ready")
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values using the nearest-rank method,
+    None for an empty list
+    """
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(p / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def pod_stages(pod):
+    """
+    Returns the recovery stages a pod has reached
+    """
+
+    reached = []
+    if pod.spec and pod.spec.node_name:
+        reached.append("scheduled")
+    if pod.status and pod.status.phase == "Running":
+        reached.append("running")
+    for condition in (pod.status.conditions if pod.status else None) or []:
+        if condition.type == "Ready" and condition.status == "True":
+            reached.append("ready")
+    return reached
+
+
+class RecoveryTracker:
+    """
+    RecoveryTracker measures how long the controllers (ReplicaSet, StatefulSet,
+    DaemonSet, ...) of killed pods take to bring up their replacements. It
+    follows a pod watch started before the deletions and records when every
+    new pod of an affected controller was first seen scheduled, running and
+    Ready. Every replacement is paired with one of the deletions of its owner
+    in order, the recovery latencies are the time between the two.
+
+    Usage:
+        tracker.expect(namespace, owner) for every pod that is going to be
+        killed, start(), deleted(owner, timestamp) after every deletion,
+        wait(timeout), results()
+    """
+
+    def __init__(self):
+        self.owners = {}
+        self.replacements = {}
+        self.lock = threading.RLock()
+        self.completed = threading.Event()
+        self.stopped = threading.Event()
+        self.watches = []
+        self.threads = []
+
+    def expect(self, namespace, owner):
+        """
+        Registers a pod that is going to be killed. owner is the (kind, name,
+        uid) tuple of its controller, pods without a controller are ignored
+        as nothing is going to replace them.
+        """
+
+        if owner is None:
+            return
+        kind, name, uid = owner
+        with self.lock:
+            if uid not in self.owners:
+                self.owners[uid] = {
+                    "kind": kind,
+                    "namespace": namespace,
+                    "name": name,
+                    "expected": 0,
+                    "deletions": [],
+                    "replacements": [],
+                }
+            self.owners[uid]["expected"] += 1
+
+    def deleted(self, owner, timestamp):
+        """
+        Records the time in seconds since the epoch at which a pod of owner
+        was deleted
+        """
+
+        if owner is None:
+            return
+        with self.lock:
+            if owner[2] in self.owners:
+                self.owners[owner[2]]["deletions"].append(timestamp)
+
+    def observe(self, event_type, pod, timestamp=None):
+        """
+        Updates the replacement state from a pod watch event. Only pods that
+        were ADDED after the watch started are considered replacements.
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+        record = PodRecord.from_model(pod)
+        if record.owner is None or record.owner[2] not in self.owners:
+            return
+        uid = pod.metadata.uid
+        with self.lock:
+            owner = self.owners[record.owner[2]]
+            if uid not in self.replacements:
+                if event_type != "ADDED" or len(owner["replacements"]) >= owner["expected"]:
+                    return
+                self.replacements[uid] = {"name": record.name}
+                owner["replacements"].append(uid)
+            replacement = self.replacements[uid]
+            for stage in pod_stages(pod):
+                replacement.setdefault(stage, timestamp)
+            if self.done():
+                self.completed.set()
+
+    def done(self):
+        with self.lock:
+            return all(
+                len(owner["replacements"]) == owner["expected"] and
+                all("ready" in self.replacements[uid] for uid in owner["replacements"])
+                for owner in self.owners.values()
+            )
+
+    def start(self, list_func, *args, resource_version=None):
+        """
+        Follows the watch of list_func from resource_version in a daemon
+        thread. The resource_version has to be taken before the deletions so
+        that no replacement is missed. It can be called once per namespace
+        of the killed pods, all the watches feed the same results.
+        """
+
+        if self.done():
+            self.completed.set()
+            return self
+        thread = threading.Thread(
+            target=self.run,
+            args=(list_func,) + args,
+            kwargs={"resource_version": resource_version},
+            name="recovery-tracker",
+            daemon=True
+        )
+        self.threads.append(thread)
+        thread.start()
+        return self
+
+    def run(self, list_func, *args, resource_version=None):
+        while not self.stopped.is_set() and not self.completed.is_set():
+            pod_watch = watch.Watch()
+            with self.lock:
+                self.watches.append(pod_watch)
+            try:
+                for event in pod_watch.stream(
+                    list_func,
+                    *args,
+                    resource_version=resource_version,
+                    timeout_seconds=60,
+                    allow_watch_bookmarks=True
+                ):
+                    if event["type"] == "ERROR":
+                        raise ApiException(
+                            status=(event.get("raw_object") or {}).get("code", 500),
+                            reason=(event.get("raw_object") or {}).get("message", "")
+                        )
+                    if event["type"] == "BOOKMARK":
+                        resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+                        continue
+                    resource_version = event["object"].metadata.resource_version
+                    self.observe(event["type"], event["object"])
+                    if self.stopped.is_set() or self.completed.is_set():
+                        pod_watch.stop()
+                        break
+            except Exception as e:
+                logging.error("Recovery tracker: watch failed, recovery results are incomplete: %s" % e)
+                return
+
+    def wait(self, timeout):
+        """
+        Waits up to timeout seconds for all the replacements to become Ready
+        and stops the watch. Returns whether all of them did.
+        """
+
+        completed = self.completed.wait(timeout)
+        self.stop()
+        return completed
+
+    def stop(self):
+        self.stopped.set()
+        with self.lock:
+            watches = list(self.watches)
+        for pod_watch in watches:
+            pod_watch.stop()
+
+    def results(self):
+        """
+        Returns the recovery of every owner keyed by "kind/namespace/name".
+        Every entry holds the number of killed and recovered (Ready) pods and
+        for each stage the latencies in seconds along with their p50, p90,
+        p99 and max, or None when no replacement reached the stage.
+        """
+
+        results = {}
+        with self.lock:
+            for owner in self.owners.values():
+                deletions = sorted(owner["deletions"])
+                latencies = {stage: [] for stage in stages}
+                for deleted_at, uid in zip(deletions, owner["replacements"]):
+                    replacement = self.replacements[uid]
+                    for stage in stages:
+                        if stage in replacement:
+                            latencies[stage].append(max(0.0, replacement[stage] - deleted_at))
+                entry = {
+                    "kind": owner["kind"],
+                    "namespace": owner["namespace"],
+                    "name": owner["name"],
+                    "killed": owner["expected"],
+                    "recovered": len(latencies["ready"]),
+                }
+                for stage in stages:
+                    values = latencies[stage]
+                    entry[stage] = {
+                        "samples": values,
+                        "p50": percentile(values, 50),
+                        "p90": percentile(values, 90),
+                        "p99": percentile(values, 99),
+                        "max": max(values),
+                    } if values else None
+                results["%s/%s/%s" % (owner["kind"], owner["namespace"], owner["name"])] = entry
+        return results
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List
 
 
 @dataclass(frozen=True, order=False)
@@ -71,4 +71,118 @@ class ChaosResult(LitmusChaosObject):
     failStep: str
 
 
-
+@dataclass(frozen=True, order=False)
+class HealthSummary:
+    """Data class to hold a compact health summary of a set of nodes or pods"""
+    healthy: bool
+    total: int
+    counts: Dict[str, int]
+    unhealthy: List[str]
+
+
+class PodRecord:
+    """
+    Compact record holding the fields of a pod used for target selection.
+    The status fields are None when only the metadata was fetched. owner is a
+    (kind, name, uid) tuple of the controlling owner reference or None.
+    """
+    __slots__ = ("name", "namespace", "labels", "node_name", "phase", "owner")
+
+    def __init__(self, name, namespace, labels=None, node_name=None, phase=None, owner=None):
+        self.name = name
+        self.namespace = namespace
+        self.labels = labels or {}
+        self.node_name = node_name
+        self.phase = phase
+        self.owner = owner
+
+    @classmethod
+    def from_dict(cls, obj):
+        metadata = obj.get("metadata") or {}
+        owner = None
+        for reference in metadata.get("ownerReferences") or []:
+            if reference.get("controller"):
+                owner = (reference.get("kind"), reference.get("name"), reference.get("uid"))
+        return cls(
+            metadata.get("name"),
+            metadata.get("namespace"),
+            metadata.get("labels"),
+            (obj.get("spec") or {}).get("nodeName"),
+            (obj.get("status") or {}).get("phase"),
+            owner
+        )
+
+    @classmethod
+    def from_model(cls, pod):
+        owner = None
+        for reference in pod.metadata.owner_references or []:
+            if reference.controller:
+                owner = (reference.kind, reference.name, reference.uid)
+        return cls(
+            pod.metadata.name,
+            pod.metadata.namespace,
+            pod.metadata.labels,
+            pod.spec.node_name if pod.spec else None,
+            pod.status.phase if pod.status else None,
+            owner
+        )
+
+
+class NodeRecord:
+    """
+    Compact record holding the name, labels and condition statuses of a node.
+    The conditions are empty when only the metadata was fetched.
+    """
+    __slots__ = ("name", "labels", "conditions")
+
+    def __init__(self, name, labels=None, conditions=None):
+        self.name = name
+        self.labels = labels or {}
+        self.conditions = conditions or {}
+
+    @property
+    def ready(self):
+        return self.conditions.get("Ready") == "True"
+
+    @classmethod
+    def from_dict(cls, obj):
+        metadata = obj.get("metadata") or {}
+        conditions = {}
+        for condition in (obj.get("status") or {}).get("conditions") or []:
+            conditions[condition["type"]] = condition["status"]
+        return cls(metadata.get("name"), metadata.get("labels"), conditions)
+
+    @classmethod
+    def from_model(cls, node):
+        conditions = {}
+        if node.status:
+            for condition in node.status.conditions or []:
+                conditions[condition.type] = condition.status
+        return cls(node.metadata.name, node.metadata.labels, conditions)
+
+
+class NamespaceRecord:
+    """Compact record holding the name, labels and phase of a namespace"""
+    __slots__ = ("name", "labels", "phase")
+
+    def __init__(self, name, labels=None, phase=None):
+        self.name = name
+        self.labels = labels or {}
+        self.phase = phase
+
+    @classmethod
+    def from_dict(cls, obj):
+        metadata = obj.get("metadata") or {}
+        return cls(
+            metadata.get("name"),
+            metadata.get("labels"),
+            (obj.get("status") or {}).get("phase")
+        )
+
+    @classmethod
+    def from_model(cls, namespace):
+        return cls(
+            namespace.metadata.name,
+            namespace.metadata.labels,
+            namespace.status.phase if namespace.status else None
+        )
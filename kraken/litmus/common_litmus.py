@@ -6,22 +6,21 @@ import sys
 import requests
 import yaml
 import kraken.cerberus.setup as cerberus
+import kraken.signal_state.state as signal_state
 
 
 # Inject litmus scenarios defined in the config
 def run(scenarios_list, config, litmus_uninstall, wait_duration, litmus_namespace):
     # Loop to run the scenarios starts here
     for l_scenario in scenarios_list:
+        if signal_state.stopped():
+            break
         start_time = int(time.time())
         try:
             for item in l_scenario:
-                runcommand.invoke("kubectl apply -f %s -n %s" % (item, litmus_namespace))
-                if "http" in item:
-                    f = requests.get(item)
-                    yaml_item = list(yaml.safe_load_all(f.content))[0]
-                else:
-                    with open(item, "r") as f:
-                        yaml_item = list(yaml.safe_load_all(f))[0]
+                manifest = load_manifest(item)
+                kubecli.apply_objects(manifest, litmus_namespace)
+                yaml_item = manifest[0]
 
                 if yaml_item["kind"] == "ChaosEngine":
                     engine_name = yaml_item["metadata"]["name"]
@@ -46,7 +45,7 @@ def run(scenarios_list, config, litmus_uninstall, wait_duration, litmus_namespac
             if litmus_uninstall:
                 delete_chaos(litmus_namespace)
             logging.info("Waiting for the specified duration: %s" % wait_duration)
-            time.sleep(wait_duration)
+            signal_state.wait(wait_duration)
             end_time = int(time.time())
             cerberus.get_status(config, start_time, end_time)
         except Exception as e:
@@ -54,14 +53,25 @@ def run(scenarios_list, config, litmus_uninstall, wait_duration, litmus_namespac
             sys.exit(1)
 
 
+# Load the objects of a manifest from a file or an url
+def load_manifest(item):
+    if "http" in item:
+        response = requests.get(item)
+        response.raise_for_status()
+        return list(yaml.safe_load_all(response.content))
+    with open(item, "r") as f:
+        return list(yaml.safe_load_all(f))
+
+
 # Install litmus and wait until pod is running
 def install_litmus(version, namespace):
     logging.info("Installing version %s of litmus in namespace %s" % (version, namespace))
-    litmus_install = runcommand.invoke(
-        "kubectl -n %s apply -f " "https://litmuschaos.github.io/litmus/litmus-operator-%s.yaml" % (namespace, version)
-    )
-    if "unable" in litmus_install:
-        logging.info("Unable to install litmus because " + str(litmus_install))
+    try:
+        kubecli.apply_objects(
+            load_manifest("https://litmuschaos.github.io/litmus/litmus-operator-%s.yaml" % version), namespace
+        )
+    except Exception as e:
+        logging.info("Unable to install litmus because " + str(e))
         sys.exit(1)
 
     runcommand.invoke(
@@ -80,10 +90,14 @@ def deploy_all_experiments(version_string, namespace):
         sys.exit(1)
     version = version_string[1:]
     logging.info("Installing all litmus experiments")
-    runcommand.invoke(
-        "kubectl -n %s apply -f "
-        "https://hub.litmuschaos.io/api/chaos/%s?file=charts/generic/experiments.yaml" % (namespace, version)
-    )
+    try:
+        kubecli.apply_objects(
+            load_manifest("https://hub.litmuschaos.io/api/chaos/%s?file=charts/generic/experiments.yaml" % version),
+            namespace,
+        )
+    except Exception as e:
+        logging.error("Failed to install the litmus experiments: %s" % e)
+        sys.exit(1)
 
 
 def wait_for_initialized(engine_name, experiment_name, namespace):
@@ -165,14 +179,12 @@ def check_experiment(engine_name, experiment_name, namespace):
         return False
 
 
-# Delete all chaos engines in a given namespace
+# Delete all chaos experiments in a given namespace
 def delete_chaos_experiments(namespace):
 
     if kubecli.check_if_namespace_exists(namespace):
-        chaos_exp_exists = runcommand.invoke_no_exit("kubectl get chaosexperiment")
-        if "returned non-zero exit status 1" not in chaos_exp_exists:
-            logging.info("Deleting all litmus experiments")
-            runcommand.invoke("kubectl delete chaosexperiment --all -n " + str(namespace))
+        logging.info("Deleting all litmus experiments")
+        kubecli.delete_custom_objects("litmuschaos.io", "v1alpha1", "chaosexperiments", namespace)
 
 
 # Delete all chaos engines in a given namespace
@@ -180,12 +192,8 @@ def delete_chaos(namespace):
 
     if kubecli.check_if_namespace_exists(namespace):
         logging.info("Deleting all litmus run objects")
-        chaos_engine_exists = runcommand.invoke_no_exit("kubectl get chaosengine")
-        if "returned non-zero exit status 1" not in chaos_engine_exists:
-            runcommand.invoke("kubectl delete chaosengine --all -n " + str(namespace))
-        chaos_result_exists = runcommand.invoke_no_exit("kubectl get chaosresult")
-        if "returned non-zero exit status 1" not in chaos_result_exists:
-            runcommand.invoke("kubectl delete chaosresult --all -n " + str(namespace))
+        kubecli.delete_custom_objects("litmuschaos.io", "v1alpha1", "chaosengines", namespace)
+        kubecli.delete_custom_objects("litmuschaos.io", "v1alpha1", "chaosresults", namespace)
     else:
         logging.info(namespace + " namespace doesn't exist")
 
@@ -4,12 +4,15 @@ import logging
 import kraken.kubernetes.client as kubecli
 import kraken.cerberus.setup as cerberus
 import kraken.post_actions.actions as post_actions
+import kraken.signal_state.state as signal_state
 import yaml
 import sys
 
 
 def run(scenarios_list, config, wait_duration, failed_post_scenarios, kubeconfig_path):
     for scenario_config in scenarios_list:
+        if signal_state.stopped():
+            break
         if len(scenario_config) > 1:
             pre_action_output = post_actions.run(kubeconfig_path, scenario_config[1])
         else:
@@ -56,10 +59,10 @@ def run(scenarios_list, config, wait_duration, failed_post_scenarios, kubeconfig
                             sys.exit(1)
                         namespaces.remove(selected_namespace)
                         logging.info("Waiting %s seconds between namespace deletions" % str(run_sleep))
-                        time.sleep(run_sleep)
+                        signal_state.wait(run_sleep)
 
                         logging.info("Waiting for the specified duration: %s" % wait_duration)
-                        time.sleep(wait_duration)
+                        signal_state.wait(wait_duration)
                         if len(scenario_config) > 1:
                             try:
                                 failed_post_scenarios = post_actions.check_recovery(
@@ -3,11 +3,17 @@ import logging
 import time
 import sys
 import os
-import random
-from jinja2 import Environment, FileSystemLoader
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import kraken.cerberus.setup as cerberus
 import kraken.kubernetes.client as kubecli
+import kraken.templates.registry as templates
 import kraken.node_actions.common_node_functions as common_node_functions
+import kraken.network_chaos.inventory as inventory
+import kraken.network_chaos.netem_agent as netem_agent
+import kraken.node_agent.agent as node_agent
+import kraken.signal_state.state as signal_state
+from kraken.kubernetes.job_tracker import JobTracker
 
 
 # Reads the scenario config and introduces traffic variations in Node's host network interface.
@@ -15,6 +21,8 @@ def run(scenarios_list, config, wait_duration):
     failed_post_scenarios = ""
     logging.info("Runing the Network Chaos tests")
     for net_config in scenarios_list:
+        if signal_state.stopped():
+            break
         with open(net_config, "r") as file:
             param_lst = ["latency", "loss", "bandwidth"]
             test_config = yaml.safe_load(file)
@@ -33,11 +41,22 @@ def run(scenarios_list, config, wait_duration):
             nodelst = []
             for single_node_name in node_name_list:
                 nodelst.extend(common_node_functions.get_node(single_node_name, test_node_label, test_instance_count))
-            file_loader = FileSystemLoader(os.path.abspath(os.path.dirname(__file__)))
-            env = Environment(loader=file_loader)
-            pod_template = env.get_template("pod.j2")
-            test_interface = verify_interface(test_interface, nodelst, pod_template)
+            if test_dict.get("agent", False):
+                netem_agent.run(
+                    nodelst,
+                    test_interface,
+                    test_execution,
+                    test_duration,
+                    test_egress,
+                    [i for i in param_lst if i in test_egress],
+                    config,
+                    wait_duration,
+                )
+                continue
+            target_interfaces = inventory.get_target_interfaces(nodelst, test_interface, agent=node_agent.enabled)
             joblst = []
+            run_id = uuid.uuid4().hex[:8]
+            job_tracker = JobTracker(kubecli.batch_cli, "default", "kraken-run=" + run_id).start()
             egress_lst = [i for i in param_lst if i in test_egress]
             chaos_config = {
                 "network_chaos": {
@@ -50,16 +69,16 @@ def run(scenarios_list, config, wait_duration):
                 }
             }
             logging.info("Executing network chaos with config \n %s" % yaml.dump(chaos_config))
-            job_template = env.get_template("job.j2")
+            job_template = templates.get_template(os.path.dirname(__file__), "job.j2")
             try:
                 for i in egress_lst:
                     for node in nodelst:
                         exec_cmd = get_egress_cmd(
-                            test_execution, test_interface, i, test_dict["egress"], duration=test_duration
+                            test_execution, target_interfaces[node], i, test_dict["egress"], duration=test_duration
                         )
                         logging.info("Executing %s on node %s" % (exec_cmd, node))
-                        job_body = yaml.safe_load(
-                            job_template.render(jobname=i + str(hash(node))[:5], nodename=node, cmd=exec_cmd)
+                        job_body = job_template.render(
+                            jobname=i + str(hash(node))[:5], nodename=node, cmd=exec_cmd, run_id=run_id
                         )
                         joblst.append(job_body["metadata"]["name"])
                         api_response = kubecli.create_job(job_body)
@@ -68,9 +87,9 @@ def run(scenarios_list, config, wait_duration):
                     if test_execution == "serial":
                         logging.info("Waiting for serial job to finish")
                         start_time = int(time.time())
-                        wait_for_job(joblst[:], test_duration + 300)
+                        wait_for_job(job_tracker, joblst, test_duration + 300)
                         logging.info("Waiting for wait_duration %s" % wait_duration)
-                        time.sleep(wait_duration)
+                        signal_state.wait(wait_duration)
                         end_time = int(time.time())
                         cerberus.publish_kraken_status(config, failed_post_scenarios, start_time, end_time)
                     if test_execution == "parallel":
@@ -78,9 +97,9 @@ def run(scenarios_list, config, wait_duration):
                 if test_execution == "parallel":
                     logging.info("Waiting for parallel job to finish")
                     start_time = int(time.time())
-                    wait_for_job(joblst[:], test_duration + 300)
+                    wait_for_job(job_tracker, joblst, test_duration + 300)
                     logging.info("Waiting for wait_duration %s" % wait_duration)
-                    time.sleep(wait_duration)
+                    signal_state.wait(wait_duration)
                     end_time = int(time.time())
                     cerberus.publish_kraken_status(config, failed_post_scenarios, start_time, end_time)
             except Exception as e:
@@ -88,72 +107,49 @@ def run(scenarios_list, config, wait_duration):
                 sys.exit(1)
             finally:
                 logging.info("Deleting jobs")
-                delete_job(joblst[:])
-
-
-def verify_interface(test_interface, nodelst, template):
-    pod_index = random.randint(0, len(nodelst) - 1)
-    pod_body = yaml.safe_load(template.render(nodename=nodelst[pod_index]))
-    logging.info("Creating pod to query interface on node %s" % nodelst[pod_index])
-    kubecli.create_pod(pod_body, "default", 300)
-    try:
-        if test_interface == []:
-            cmd = "ip r | grep default | awk '/default/ {print $5}'"
-            output = kubecli.exec_cmd_in_pod(cmd, "fedtools", "default")
-            test_interface = [output.replace("\n", "")]
-        else:
-            cmd = "ip -br addr show|awk -v ORS=',' '{print $1}'"
-            output = kubecli.exec_cmd_in_pod(cmd, "fedtools", "default")
-            interface_lst = output[:-1].split(",")
-            for interface in test_interface:
-                if interface not in interface_lst:
-                    logging.error("Interface %s not found in node %s interface list %s" % (interface, nodelst[pod_index], interface_lst))
-                    sys.exit(1)
-        return test_interface
-    finally:
-        logging.info("Deleteing pod to query interface on node")
-        kubecli.delete_pod("fedtools", "default")
+                delete_job(job_tracker, joblst)
+                job_tracker.stop()
 
 
 def get_job_pods(api_response):
-    controllerUid = api_response.metadata.labels["controller-uid"]
-    pod_label_selector = "controller-uid=" + controllerUid
+    pod_label_selector = ",".join("%s=%s" % item for item in api_response.spec.selector.match_labels.items())
     pods_list = kubecli.list_pods(label_selector=pod_label_selector, namespace="default")
     return pods_list[0]
 
 
-def wait_for_job(joblst, timeout=300):
-    waittime = time.time() + timeout
-    count = 0
-    joblen = len(joblst)
-    while count != joblen:
-        for jobname in joblst:
-            try:
-                api_response = kubecli.get_job_status(jobname, namespace="default")
-                if api_response.status.succeeded is not None or api_response.status.failed is not None:
-                    count += 1
-                    joblst.remove(jobname)
-            except Exception:
-                logging.warn("Exception in getting job status")
-            if time.time() > waittime:
-                raise Exception("Starting pod failed")
-            time.sleep(5)
+# Wait for the jobs to complete or fail, the states come from the watch of
+# the job tracker
+def wait_for_job(job_tracker, joblst, timeout=300):
+    states = job_tracker.wait_for_jobs(joblst, timeout)
+    pending = [jobname for jobname, state in states.items() if state is None]
+    if pending:
+        raise Exception("Jobs %s didn't finish in %s seconds" % (pending, timeout))
+
+
+def log_failed_job(job):
+    try:
+        pod_name = get_job_pods(job)
+        pod_stat = kubecli.read_pod(name=pod_name, namespace="default")
+        logging.error(pod_stat.status.container_statuses)
+        pod_log_response = kubecli.get_pod_log(name=pod_name, namespace="default")
+        pod_log = pod_log_response.data.decode("utf-8")
+        logging.error(pod_log)
+    except Exception:
+        logging.warn("Exception in getting the logs of the job %s" % job.metadata.name)
 
 
-def delete_job(joblst):
-    for jobname in joblst:
-        try:
-            api_response = kubecli.get_job_status(jobname, namespace="default")
-            if api_response.status.failed is not None:
-                pod_name = get_job_pods(api_response)
-                pod_stat = kubecli.read_pod(name=pod_name, namespace="default")
-                logging.error(pod_stat.status.container_statuses)
-                pod_log_response = kubecli.get_pod_log(name=pod_name, namespace="default")
-                pod_log = pod_log_response.data.decode("utf-8")
-                logging.error(pod_log)
-        except Exception:
-            logging.warn("Exception in getting job status")
-        api_response = kubecli.delete_job(name=jobname, namespace="default")
+# Log the pods of the failed jobs concurrently and delete all the jobs of
+# the run at once
+def delete_job(job_tracker, joblst):
+    failed_jobs = [
+        job_tracker.get_job(jobname)
+        for jobname, state in job_tracker.states(joblst).items()
+        if state == "Failed"
+    ]
+    if failed_jobs:
+        with ThreadPoolExecutor(max_workers=min(10, len(failed_jobs))) as executor:
+            list(executor.map(log_failed_job, failed_jobs))
+    kubecli.delete_jobs(job_tracker.label_selector, namespace="default")
 
 
 def get_egress_cmd(execution, test_interface, mod, vallst, duration=30):
@@ -0,0 +1,117 @@
+import os
+import sys
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+
+import kraken.kubernetes.client as kubecli
+import kraken.node_agent.agent as node_agent
+import kraken.templates.registry as templates
+
+
+# Network inventory of the nodes targeted by the network chaos scenarios. The
+# interfaces of a node are read once per run, concurrently for all the target
+# nodes, and reused by the following scenarios and iterations until the node
+# reboots, which is detected by a change of its boot ID.
+
+max_parallel = 20
+inventory_command = "ip -o link show | awk '{print $2, $5}'; echo; ip r | awk '/^default/ {print $5; exit}'"
+
+lock = threading.Lock()
+# NodeNetwork of every node read so far
+inventory = {}
+
+
+@dataclass(frozen=True, order=False)
+class NodeNetwork:
+    """Data class to hold the interfaces and their MTU and the default route interface of a node"""
+    boot_id: str
+    interfaces: Dict[str, int]
+    default_interface: str
+
+
+def parse(boot_id, output):
+    links, _, default = output.partition("\n\n")
+    interfaces = {}
+    for line in links.splitlines():
+        fields = line.split()
+        if len(fields) != 2:
+            continue
+        name = fields[0].rstrip(":").split("@")[0]
+        interfaces[name] = int(fields[1]) if fields[1].isdigit() else None
+    return NodeNetwork(boot_id=boot_id, interfaces=interfaces, default_interface=default.strip())
+
+
+def read_with_agent(node):
+    returncode, output = node_agent.run(node, inventory_command, chroot=False)
+    if returncode != 0:
+        raise Exception("Failed to read the interfaces of the node %s: %s" % (node, output))
+    return output
+
+
+def read_with_pod(node):
+    # Short lived host network pod on the node, when the node agent isn't used
+    pod_name = "fedtools-" + str(abs(hash(node)))[:8]
+    pod_body = templates.render(os.path.dirname(__file__), "pod.j2", podname=pod_name, nodename=node)
+    logging.info("Creating pod to query the interfaces of the node %s" % node)
+    kubecli.create_pod(pod_body, "default", 300)
+    try:
+        output = kubecli.exec_cmd_in_pod(inventory_command, pod_name, "default")
+        if output is False:
+            raise Exception("Failed to read the interfaces of the node %s" % node)
+        return output
+    finally:
+        kubecli.delete_pod(pod_name, "default")
+
+
+def collect(nodes, agent=False):
+    """
+    Returns the NodeNetwork of the given nodes, reading the nodes which
+    aren't in the inventory yet or rebooted since they were read
+
+    Args:
+        nodes: names of the nodes
+        agent: read the nodes through the node agent instead of a pod per
+            node
+
+    Returns:
+        dict of the NodeNetwork of every node
+    """
+
+    boot_ids = kubecli.get_node_boot_ids()
+    with lock:
+        stale = [node for node in nodes if node not in inventory or inventory[node].boot_id != boot_ids.get(node)]
+    if stale:
+        logging.info("Reading the network interfaces of the nodes %s" % stale)
+        read = read_with_agent if agent else read_with_pod
+        with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(stale)))) as executor:
+            outputs = list(executor.map(read, stale))
+        with lock:
+            for node, output in zip(stale, outputs):
+                inventory[node] = parse(boot_ids.get(node), output)
+    with lock:
+        return dict((node, inventory[node]) for node in nodes)
+
+
+def get_target_interfaces(nodes, test_interface, agent=False):
+    """
+    Returns the interfaces to shape on every node: the given interfaces,
+    verified to exist on every node, or the interface of the default route
+    of each node when none are given
+    """
+
+    targets = {}
+    for node, network in collect(nodes, agent).items():
+        if not test_interface:
+            targets[node] = [network.default_interface]
+            continue
+        for interface in test_interface:
+            if interface not in network.interfaces:
+                logging.error(
+                    "Interface %s not found in node %s interface list %s" % (interface, node, list(network.interfaces))
+                )
+                sys.exit(1)
+        targets[node] = test_interface
+    return targets
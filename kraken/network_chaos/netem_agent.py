@@ -0,0 +1,142 @@
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import kraken.cerberus.setup as cerberus
+import kraken.node_agent.agent as node_agent
+import kraken.network_chaos.inventory as inventory
+import kraken.signal_state.state as signal_state
+
+
+# Network chaos through the node agent DaemonSet: the netem rules are applied
+# and reverted by exec'ing tc in the agent pods, which run in the host network
+# of every node, instead of scheduling a Job per node and egress option.
+# The agent pods of all the target nodes are resolved before the rules are
+# applied, so the rules land on all of them within a single round of
+# concurrent execs.
+
+param_map = {"latency": "delay", "loss": "loss", "bandwidth": "rate"}
+max_parallel = 50
+# Seconds to wait for a tc command
+command_timeout = 30
+
+
+def get_netem_args(params, egress):
+    return " ".join("%s %s" % (param_map[param], egress[param]) for param in params)
+
+
+def run_on_nodes(commands):
+    """
+    Runs a command on every node at the same time
+
+    Args:
+        commands: dict of the command to run on every node
+
+    Returns:
+        dict of the error of every node the command failed on and the time
+        window in seconds between the first and the last command completing
+    """
+
+    start = threading.Event()
+    completed = {}
+
+    def run_command(node):
+        start.wait()
+        try:
+            returncode, output = node_agent.run(node, commands[node], command_timeout, chroot=False)
+            error = output if returncode != 0 else None
+        except Exception as e:
+            error = str(e)
+        completed[node] = time.monotonic()
+        return error
+
+    nodes = list(commands)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(nodes)))) as executor:
+        futures = [executor.submit(run_command, node) for node in nodes]
+        start.set()
+        errors = dict((node, future.result()) for node, future in zip(nodes, futures))
+    window = max(completed.values()) - min(completed.values()) if completed else 0
+    return dict((node, error) for node, error in errors.items() if error), window
+
+
+def apply(targets, params, egress):
+    netem_args = get_netem_args(params, egress)
+    commands = dict(
+        (node, " && ".join("tc qdisc add dev %s root netem %s" % (interface, netem_args) for interface in interfaces))
+        for node, interfaces in targets.items()
+    )
+    errors, window = run_on_nodes(commands)
+    logging.info("Applied netem %s on %s nodes within %.3fs" % (netem_args, len(commands) - len(errors), window))
+    return errors, window
+
+
+def revert(targets):
+    commands = dict(
+        (node, "; ".join("tc qdisc del dev %s root" % interface for interface in interfaces))
+        for node, interfaces in targets.items()
+    )
+    errors, window = run_on_nodes(commands)
+    for node, error in errors.items():
+        logging.error("Failed to remove the netem rules of the node %s: %s" % (node, error))
+    logging.info("Removed the netem rules of %s nodes within %.3fs" % (len(commands) - len(errors), window))
+
+
+def inject(targets, params, egress, duration):
+    """
+    Applies the netem options on the interfaces of all the target nodes,
+    waits for the duration and reverts them
+
+    Returns:
+        the time window in seconds in which the rules landed on the nodes
+    """
+
+    def cleanup():
+        revert(targets)
+
+    signal_state.add_cleanup_hook(cleanup)
+    try:
+        errors, window = apply(targets, params, egress)
+        if errors:
+            for node, error in errors.items():
+                logging.error("Failed to apply the netem rules on the node %s: %s" % (node, error))
+            raise Exception("Failed to apply the netem rules on %s" % list(errors))
+        logging.info("Waiting for the duration %s" % duration)
+        signal_state.wait(duration)
+        return window
+    finally:
+        cleanup()
+        signal_state.remove_cleanup_hook(cleanup)
+
+
+def run(nodes, test_interface, test_execution, test_duration, test_egress, egress_lst, config, wait_duration):
+    """
+    Runs the network chaos scenario through the node agent, the egress
+    options are applied one after the other with the serial execution and
+    all at once with the parallel one
+    """
+
+    node_agent.deploy()
+    missing = [node for node in nodes if node_agent.get_pod(node) is None]
+    if missing:
+        logging.error("No node agent pod is ready on the nodes %s" % missing)
+        sys.exit(1)
+    targets = inventory.get_target_interfaces(nodes, test_interface, agent=True)
+    if test_execution == "parallel":
+        batches = [egress_lst]
+    else:
+        batches = [[param] for param in egress_lst]
+    for params in batches:
+        if signal_state.stopped():
+            break
+        start_time = int(time.time())
+        try:
+            inject(targets, params, test_egress, test_duration)
+        except Exception as e:
+            logging.error("Network Chaos exiting due to Exception %s" % e)
+            sys.exit(1)
+        logging.info("Waiting for wait_duration %s" % wait_duration)
+        signal_state.wait(wait_duration)
+        end_time = int(time.time())
+        cerberus.publish_kraken_status(config, "", start_time, end_time)
@@ -1,6 +1,6 @@
 import sys
 import logging
-import kraken.invoke.command as runcommand
+import kraken.node_agent.agent as node_agent
 import kraken.node_actions.common_node_functions as nodeaction
 
 
@@ -41,7 +41,8 @@ class abstract_node_scenarios:
             try:
                 logging.info("Starting stop_kubelet_scenario injection")
                 logging.info("Stopping the kubelet of the node %s" % (node))
-                runcommand.run("oc debug node/" + node + " -- chroot /host systemctl stop kubelet")
+                # The exec goes through the kubelet being stopped, it may never complete
+                node_agent.node_command(node, "systemctl stop kubelet", check=False, timeout=45)
                 nodeaction.wait_for_unknown_status(node, timeout)
                 logging.info("The kubelet of the node %s has been stopped" % (node))
                 logging.info("stop_kubelet_scenario has been successfuly injected!")
@@ -65,9 +66,8 @@ class abstract_node_scenarios:
             try:
                 logging.info("Starting node_crash_scenario injection")
                 logging.info("Crashing the node %s" % (node))
-                runcommand.invoke(
-                    "oc debug node/" + node + " -- chroot /host " "dd if=/dev/urandom of=/proc/sysrq-trigger"
-                )
+                # The node goes down while the command runs, it never completes
+                node_agent.node_command(node, "dd if=/dev/urandom of=/proc/sysrq-trigger", check=False, timeout=60)
                 logging.info("node_crash_scenario has been successfuly injected!")
             except Exception as e:
                 logging.error("Failed to crash the node. Encountered following exception: %s. " "Test Failed" % (e))
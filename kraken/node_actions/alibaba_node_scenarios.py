@@ -3,14 +3,20 @@ import time
 from aliyunsdkcore.client import AcsClient
 from aliyunsdkecs.request.v20140526 import DescribeInstancesRequest, DeleteInstanceRequest
 from aliyunsdkecs.request.v20140526 import StopInstanceRequest, StartInstanceRequest, RebootInstanceRequest
+from aliyunsdkecs.request.v20140526 import StopInstancesRequest, StartInstancesRequest
 import logging
 import kraken.node_actions.common_node_functions as nodeaction
+import kraken.node_actions.instance_index as instance_index
+import kraken.node_actions.instance_batch as instance_batch
 from kraken.node_actions.abstract_node_scenarios import abstract_node_scenarios
 import os
 import json
 
 
 class Alibaba:
+    # Number of instances per DescribeInstances page, the largest allowed
+    page_size = 100
+
     def __init__(self):
         try:
             # Acquire a credential object using CLI-based authentication.
@@ -34,11 +40,17 @@ class Alibaba:
     # output the instance owned in current region.
     def list_instances(self):
         try:
-            request = DescribeInstancesRequest.DescribeInstancesRequest()
-            response = self._send_request(request)
-            if response is not None:
+            instance_list = []
+            page_number = 1
+            while True:
+                request = DescribeInstancesRequest.DescribeInstancesRequest()
+                request.set_PageSize(self.page_size)
+                request.set_PageNumber(page_number)
+                response = self._send_request(request)
+                if response is None:
+                    return instance_list
                 if response.get("Instances"):
-                    instance_list = response.get("Instances").get("Instance")
+                    instance_list.extend(response.get("Instances").get("Instance"))
                 else:
                     logging.error(
                         "ERROR couldn't get list of instances; validate your environment "
@@ -46,20 +58,27 @@ class Alibaba:
                     )
                     logging.error(response)
                     sys.exit(1)
-                return instance_list
-            return []
+                if page_number * self.page_size >= response.get("TotalCount", 0):
+                    return instance_list
+                page_number += 1
         except Exception as e:
             logging.error("ERROR while trying to get list of instances " + str(e))
             sys.exit(1)
 
     # Get the instance ID of the node
     def get_instance_id(self, node_name):
-        vm_list = self.list_instances()
-        for vm in vm_list:
-            if node_name == vm["InstanceName"]:
-                return vm["InstanceId"]
-        logging.error("Couldn't find vm with name " + str(node_name) + ", you could try another region")
-        sys.exit(1)
+        instance_id = instance_index.lookup(self, node_name)
+        if instance_id is None:
+            logging.error("Couldn't find vm with name " + str(node_name) + ", you could try another region")
+            sys.exit(1)
+        return instance_id
+
+    # Get the instance IDs of the given nodes by instance name
+    def list_node_instances(self, nodes):
+        instances = {}
+        for vm in self.list_instances() or []:
+            instances[vm["InstanceName"]] = vm["InstanceId"]
+        return instances
 
     # Start the node instance
     def start_instances(self, instance_id):
@@ -88,6 +107,35 @@ class Alibaba:
             logging.error("Failed to stop node instance %s. Encountered following " "exception: %s." % (instance_id, e))
             sys.exit(1)
 
+    # Start the node instances, page_size instances per request
+    def start_instances_batch(self, instance_ids, max_parallel=None):
+        for batch in instance_batch.chunks(instance_ids, self.page_size):
+            try:
+                request = StartInstancesRequest.StartInstancesRequest()
+                request.set_InstanceIds(batch)
+                self._send_request(request)
+                logging.info("ECS instances with ids " + str(batch) + " started")
+            except Exception as e:
+                logging.error(
+                    "Failed to start node instances %s. Encountered following " "exception: %s." % (batch, e)
+                )
+                sys.exit(1)
+
+    # Stop the node instances, page_size instances per request
+    def stop_instances_batch(self, instance_ids, max_parallel=None, force_stop=True):
+        for batch in instance_batch.chunks(instance_ids, self.page_size):
+            try:
+                request = StopInstancesRequest.StopInstancesRequest()
+                request.set_InstanceIds(batch)
+                request.set_ForceStop(force_stop)
+                self._send_request(request)
+                logging.info("Stop %s command submit successfully.", batch)
+            except Exception as e:
+                logging.error(
+                    "Failed to stop node instances %s. Encountered following " "exception: %s." % (batch, e)
+                )
+                sys.exit(1)
+
     # Terminate the node instance
     def release_instance(self, instance_id, force_release=True):
         try:
@@ -135,6 +183,27 @@ class Alibaba:
             )
             return None
 
+    # Get the status of the given instances, page_size instances per request
+    def get_instance_states(self, instance_ids):
+        states = {}
+        for batch in instance_batch.chunks(instance_ids, self.page_size):
+            request = DescribeInstancesRequest.DescribeInstancesRequest()
+            request.set_InstanceIds(json.dumps(batch))
+            request.set_PageSize(self.page_size)
+            response = self._send_request(request)
+            if response is not None:
+                for instance in response.get("Instances", {}).get("Instance", []):
+                    states[instance["InstanceId"]] = instance["Status"]
+        return states
+
+    # Wait until the node instances are running, returns the ones that aren't
+    def wait_until_running_batch(self, instance_ids, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, instance_ids, "Running", timeout)
+
+    # Wait until the node instances are stopped, returns the ones that aren't
+    def wait_until_stopped_batch(self, instance_ids, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, instance_ids, "Stopped", timeout)
+
     # Wait until the node instance is running
     def wait_until_running(self, instance_id, timeout):
         time_counter = 0
@@ -4,19 +4,43 @@ import boto3
 import logging
 import kraken.kubernetes.client as kubecli
 import kraken.node_actions.common_node_functions as nodeaction
+import kraken.node_actions.instance_index as instance_index
+import kraken.node_actions.instance_batch as instance_batch
 from kraken.node_actions.abstract_node_scenarios import abstract_node_scenarios
 
 
 class AWS:
+    # Maximum number of values of a describe_instances filter
+    filter_values_limit = 200
+    # Number of instances per start, stop and describe call
+    batch_size = 100
+
     def __init__(self):
         self.boto_client = boto3.client("ec2")
         self.boto_instance = boto3.resource("ec2").Instance("id")
 
     # Get the instance ID of the node
     def get_instance_id(self, node):
-        return self.boto_client.describe_instances(Filters=[{"Name": "private-dns-name", "Values": [node]}])[
-            "Reservations"
-        ][0]["Instances"][0]["InstanceId"]
+        instance_id = instance_index.lookup(self, node)
+        if instance_id is None:
+            logging.error("Couldn't find the instance of node " + str(node))
+            sys.exit(1)
+        return instance_id
+
+    # Get the instance IDs of the given nodes by private DNS name, the
+    # describe calls are filtered on all the names at once
+    def list_node_instances(self, nodes):
+        instances = {}
+        paginator = self.boto_client.get_paginator("describe_instances")
+        for i in range(0, len(nodes), self.filter_values_limit):
+            filters = [{"Name": "private-dns-name", "Values": nodes[i: i + self.filter_values_limit]}]
+            for page in paginator.paginate(Filters=filters):
+                for reservation in page["Reservations"]:
+                    for instance in reservation["Instances"]:
+                        if instance.get("State", {}).get("Name") == "terminated":
+                            continue
+                        instances.setdefault(instance["PrivateDnsName"], instance["InstanceId"])
+        return instances
 
     # Start the node instance
     def start_instances(self, instance_id):
@@ -60,6 +84,48 @@ class AWS:
             )
             sys.exit(1)
 
+    # Start the node instances, batch_size instances per call
+    def start_instances_batch(self, instance_ids, max_parallel=None):
+        for batch in instance_batch.chunks(instance_ids, self.batch_size):
+            try:
+                self.boto_client.start_instances(InstanceIds=batch)
+                logging.info("EC2 instances: " + str(batch) + " started")
+            except Exception as e:
+                logging.error(
+                    "Failed to start node instances %s. Encountered following " "exception: %s." % (batch, e)
+                )
+                sys.exit(1)
+
+    # Stop the node instances, batch_size instances per call
+    def stop_instances_batch(self, instance_ids, max_parallel=None):
+        for batch in instance_batch.chunks(instance_ids, self.batch_size):
+            try:
+                self.boto_client.stop_instances(InstanceIds=batch)
+                logging.info("EC2 instances: " + str(batch) + " stopped")
+            except Exception as e:
+                logging.error(
+                    "Failed to stop node instances %s. Encountered following " "exception: %s." % (batch, e)
+                )
+                sys.exit(1)
+
+    # Get the state of the given instances, batch_size instances per call
+    def get_instance_states(self, instance_ids):
+        states = {}
+        for batch in instance_batch.chunks(instance_ids, self.batch_size):
+            response = self.boto_client.describe_instances(InstanceIds=batch)
+            for reservation in response["Reservations"]:
+                for instance in reservation["Instances"]:
+                    states[instance["InstanceId"]] = instance["State"]["Name"]
+        return states
+
+    # Wait until the node instances are running, returns the ones that aren't
+    def wait_until_running_batch(self, instance_ids, timeout=600):
+        return instance_batch.wait_for_state(self.get_instance_states, instance_ids, "running", timeout)
+
+    # Wait until the node instances are stopped, returns the ones that aren't
+    def wait_until_stopped_batch(self, instance_ids, timeout=600):
+        return instance_batch.wait_for_state(self.get_instance_states, instance_ids, "stopped", timeout)
+
     # Below functions poll EC2.Client.describe_instances() every 15 seconds
     # until a successful state is reached. An error is returned after 40 failed checks
     # Setting timeout for consistency with other cloud functions
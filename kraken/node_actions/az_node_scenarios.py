@@ -5,6 +5,8 @@ from azure.identity import DefaultAzureCredential
 import logging
 import kraken.kubernetes.client as kubecli
 import kraken.node_actions.common_node_functions as nodeaction
+import kraken.node_actions.instance_index as instance_index
+import kraken.node_actions.instance_batch as instance_batch
 from kraken.node_actions.abstract_node_scenarios import abstract_node_scenarios
 import kraken.invoke.command as runcommand
 import yaml
@@ -23,14 +25,22 @@ class Azure:
 
     # Get the instance ID of the node
     def get_instance_id(self, node_name):
-        vm_list = self.compute_client.virtual_machines.list_all()
-        for vm in vm_list:
+        instance = instance_index.lookup(self, node_name)
+        if instance is None:
+            logging.error("Couldn't find vm with name " + str(node_name))
+            sys.exit(1)
+        return instance
+
+    # Get the vm name and resource group of the given nodes with a single
+    # listing of the vms of the subscription
+    def list_node_instances(self, nodes):
+        instances = {}
+        for vm in self.compute_client.virtual_machines.list_all():
             array = vm.id.split("/")
             resource_group = array[4]
             vm_name = array[-1]
-            if node_name == vm_name:
-                return vm_name, resource_group
-        logging.error("Couldn't find vm with name " + str(node_name))
+            instances[vm_name] = (vm_name, resource_group)
+        return instances
 
     # Start the node instance
     def start_instances(self, group_name, vm_name):
@@ -70,6 +80,38 @@ class Azure:
             logging.error("Failed to reboot node instance %s. Encountered following " "exception: %s." % (vm_name, e))
             sys.exit(1)
 
+    # Start the node instances, Azure has no bulk power API so at most
+    # max_parallel start requests are sent at the same time
+    def start_instances_batch(self, instances, max_parallel=10):
+        instance_batch.run_parallel(self.start_instances, instances, max_parallel)
+
+    # Stop the node instances, at most max_parallel requests at a time
+    def stop_instances_batch(self, instances, max_parallel=10):
+        instance_batch.run_parallel(self.stop_instances, instances, max_parallel)
+
+    # Get the power state of the given (vm_name, resource_group) instances
+    # with a single status listing of the vms of the subscription
+    def get_instance_states(self, instances):
+        wanted = set(instances)
+        states = {}
+        for vm in self.compute_client.virtual_machines.list_all(status_only="true"):
+            array = vm.id.split("/")
+            key = (array[-1], array[4])
+            if key not in wanted or vm.instance_view is None:
+                continue
+            for status in vm.instance_view.statuses or []:
+                if status.code.startswith("PowerState/"):
+                    states[key] = status.code
+        return states
+
+    # Wait until the node instances are running, returns the ones that aren't
+    def wait_until_running_batch(self, instances, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, instances, "PowerState/running", timeout)
+
+    # Wait until the node instances are stopped, returns the ones that aren't
+    def wait_until_stopped_batch(self, instances, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, instances, "PowerState/stopped", timeout)
+
     def get_vm_status(self, resource_group, vm_name):
         statuses = self.compute_client.virtual_machines.instance_view(resource_group, vm_name).statuses
         status = len(statuses) >= 2 and statuses[1]
@@ -3,7 +3,6 @@ import random
 import logging
 import paramiko
 import kraken.kubernetes.client as kubecli
-import kraken.invoke.command as runcommand
 
 node_general = False
 
@@ -31,27 +30,22 @@ def get_node(node_name, label_selector, instance_kill_count):
 
 # Wait until the node status becomes Ready
 def wait_for_ready_status(node, timeout):
-    resource_version = kubecli.get_node_resource_version(node)
-    kubecli.watch_node_status(node, "True", timeout, resource_version)
+    kubecli.watch_node_status(node, "True", timeout)
 
 
 # Wait until the node status becomes Not Ready
 def wait_for_not_ready_status(node, timeout):
-    resource_version = kubecli.get_node_resource_version(node)
-    kubecli.watch_node_status(node, "False", timeout, resource_version)
+    kubecli.watch_node_status(node, "False", timeout)
 
 
 # Wait until the node status becomes Unknown
 def wait_for_unknown_status(node, timeout):
-    resource_version = kubecli.get_node_resource_version(node)
-    kubecli.watch_node_status(node, "Unknown", timeout, resource_version)
+    kubecli.watch_node_status(node, "Unknown", timeout)
 
 
 # Get the ip of the cluster node
 def get_node_ip(node):
-    return runcommand.invoke(
-        "kubectl get node %s -o " "jsonpath='{.status.addresses[?(@.type==\"InternalIP\")].address}'" % (node)
-    )
+    return kubecli.get_node_address(node, "InternalIP")
 
 
 def check_service_status(node, service, ssh_private_key, timeout):
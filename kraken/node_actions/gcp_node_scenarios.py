@@ -3,6 +3,8 @@ import time
 import logging
 import kraken.kubernetes.client as kubecli
 import kraken.node_actions.common_node_functions as nodeaction
+import kraken.node_actions.instance_index as instance_index
+import kraken.node_actions.instance_batch as instance_batch
 from kraken.node_actions.abstract_node_scenarios import abstract_node_scenarios
 from googleapiclient import discovery
 from oauth2client.client import GoogleCredentials
@@ -10,6 +12,9 @@ import kraken.invoke.command as runcommand
 
 
 class GCP:
+    # Number of operations sent per batch request, at most 1000
+    batch_size = 500
+
     def __init__(self):
 
         self.project = runcommand.invoke("gcloud config get-value project").split("/n")[0].strip()
@@ -17,24 +22,35 @@ class GCP:
         credentials = GoogleCredentials.get_application_default()
         self.client = discovery.build("compute", "v1", credentials=credentials, cache_discovery=False)
 
-    # Get the instance ID of the node
+    # Get the instance ID and zone of the node
     def get_instance_id(self, node):
-        zone_request = self.client.zones().list(project=self.project)
-        while zone_request is not None:
-            zone_response = zone_request.execute()
-            for zone in zone_response["items"]:
-                instances_request = self.client.instances().list(project=self.project, zone=zone["name"])
-                while instances_request is not None:
-                    instance_response = instances_request.execute()
-                    if "items" in instance_response.keys():
-                        for instance in instance_response["items"]:
-                            if instance["name"] in node:
-                                return instance["name"], zone["name"]
-                    instances_request = self.client.zones().list_next(
-                        previous_request=instances_request, previous_response=instance_response
-                    )
-            zone_request = self.client.zones().list_next(previous_request=zone_request, previous_response=zone_response)
-        logging.info("no instances ")
+        instance = instance_index.lookup(self, node)
+        if instance is None:
+            logging.error("Couldn't find the instance of node " + str(node))
+            sys.exit(1)
+        return instance
+
+    # List the instances of every zone of the project with an aggregated list
+    def list_all_instances(self):
+        request = self.client.instances().aggregatedList(project=self.project)
+        while request is not None:
+            response = request.execute()
+            for scope in response.get("items", {}).values():
+                yield from scope.get("instances", [])
+            request = self.client.instances().aggregatedList_next(previous_request=request, previous_response=response)
+
+    # Get the instance name and zone of the given nodes, all the zones are
+    # listed at once with an aggregated list
+    def list_node_instances(self, nodes):
+        vms = [(instance["name"], instance["zone"].split("/")[-1]) for instance in self.list_all_instances()]
+        instances = {}
+        for node in nodes:
+            # The node name is the instance name or contains it, the longest
+            # matching instance name wins
+            matches = [vm for vm in vms if vm[0] in node]
+            if matches:
+                instances[node] = max(matches, key=lambda vm: len(vm[0]))
+        return instances
 
     # Start the node instance
     def start_instances(self, zone, instance_id):
@@ -89,6 +105,56 @@ class GCP:
             )
             sys.exit(1)
 
+    # Send the given instance operation for every (name, zone) instance,
+    # batch_size operations per batch request
+    def batch_instances_operation(self, operation, instances):
+        failed = []
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                instance_id = instances[int(request_id)][0]
+                failed.append(instance_id)
+                logging.error("Failed to %s node instance %s: %s" % (operation, instance_id, exception))
+
+        for start in range(0, len(instances), self.batch_size):
+            batch = self.client.new_batch_http_request(callback=callback)
+            for i in range(start, min(start + self.batch_size, len(instances))):
+                instance_id, zone = instances[i]
+                request = getattr(self.client.instances(), operation)(
+                    project=self.project, zone=zone, instance=instance_id
+                )
+                batch.add(request, request_id=str(i))
+            batch.execute()
+        if failed:
+            sys.exit(1)
+        logging.info("vm names " + str([instance[0] for instance in instances]) + " " + operation + " requested")
+
+    # Start the node instances
+    def start_instances_batch(self, instances, max_parallel=None):
+        self.batch_instances_operation("start", instances)
+
+    # Stop the node instances
+    def stop_instances_batch(self, instances, max_parallel=None):
+        self.batch_instances_operation("stop", instances)
+
+    # Get the status of the given (name, zone) instances
+    def get_instance_states(self, instances):
+        wanted = set(instances)
+        states = {}
+        for instance in self.list_all_instances():
+            key = (instance["name"], instance["zone"].split("/")[-1])
+            if key in wanted:
+                states[key] = instance["status"]
+        return states
+
+    # Wait until the node instances are running, returns the ones that aren't
+    def wait_until_running_batch(self, instances, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, instances, "RUNNING", timeout)
+
+    # Wait until the node instances are stopped, returns the ones that aren't
+    def wait_until_stopped_batch(self, instances, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, instances, "TERMINATED", timeout)
+
     # Get instance status
     def get_instance_status(self, zone, instance_id, expected_status, timeout):
         # statuses: PROVISIONING, STAGING, RUNNING, STOPPING, SUSPENDING, SUSPENDED, REPAIRING,
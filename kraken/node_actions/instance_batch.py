@@ -0,0 +1,126 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Power operations on many cloud instances at once. Cloud classes implement
+# stop_instances_batch/start_instances_batch(instances, max_parallel) and
+# wait_until_stopped_batch/wait_until_running_batch(instances, timeout) to
+# use the bulk APIs of the cloud, the single instance methods are run on a
+# bounded thread pool for the clouds that don't.
+
+# Seconds between two state checks of an aggregated wait
+poll_interval = 5
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i: i + size]
+
+
+def call(function, instance):
+    # Instances made of an id and its zone or resource group are passed to
+    # the single instance methods as (zone, id)
+    if type(instance) is tuple:
+        return function(instance[1], instance[0])
+    return function(instance)
+
+
+def run_parallel(function, instances, max_parallel):
+    """
+    Calls the given function for every instance with at most max_parallel
+    calls running at the same time
+
+    Returns:
+        list of the results in the order of the instances
+    """
+
+    if not instances:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(instances)))) as executor:
+        return list(executor.map(lambda instance: call(function, instance), instances))
+
+
+def stop(cloud_object, instances, max_parallel=10):
+    logging.info("Stopping %s instances" % (len(instances)))
+    if hasattr(cloud_object, "stop_instances_batch"):
+        cloud_object.stop_instances_batch(instances, max_parallel)
+    else:
+        run_parallel(cloud_object.stop_instances, instances, max_parallel)
+
+
+def start(cloud_object, instances, max_parallel=10):
+    logging.info("Starting %s instances" % (len(instances)))
+    if hasattr(cloud_object, "start_instances_batch"):
+        cloud_object.start_instances_batch(instances, max_parallel)
+    else:
+        run_parallel(cloud_object.start_instances, instances, max_parallel)
+
+
+def wait_until_stopped(cloud_object, instances, timeout, max_parallel=10):
+    """
+    Waits for the instances to be stopped
+
+    Returns:
+        list of the instances that weren't stopped within the timeout
+    """
+
+    if hasattr(cloud_object, "wait_until_stopped_batch"):
+        return cloud_object.wait_until_stopped_batch(instances, timeout)
+    statuses = run_parallel(
+        lambda *args: cloud_object.wait_until_stopped(*args, timeout), instances, max_parallel
+    )
+    return [instance for instance, status in zip(instances, statuses) if not status]
+
+
+def wait_until_running(cloud_object, instances, timeout, max_parallel=10):
+    """
+    Waits for the instances to be running
+
+    Returns:
+        list of the instances that weren't running within the timeout
+    """
+
+    if hasattr(cloud_object, "wait_until_running_batch"):
+        return cloud_object.wait_until_running_batch(instances, timeout)
+    statuses = run_parallel(
+        lambda *args: cloud_object.wait_until_running(*args, timeout), instances, max_parallel
+    )
+    return [instance for instance, status in zip(instances, statuses) if not status]
+
+
+def wait_for_state(get_states, instances, expected_state, timeout):
+    """
+    Waits for all the instances to reach the expected state, checking the
+    state of all of them with a single get_states call per round
+
+    Args:
+        get_states: function returning the state of the given instances by
+            instance, unknown instances may be left out
+        instances: instances to wait for
+        expected_state: state the instances are expected to reach
+        timeout: number of seconds to wait for
+
+    Returns:
+        list of the instances that didn't reach the state within the timeout
+    """
+
+    remaining = list(instances)
+    deadline = time.time() + timeout
+    while remaining:
+        try:
+            states = get_states(remaining)
+            remaining = [instance for instance in remaining if states.get(instance) != expected_state]
+        except Exception as e:
+            logging.error("Failed to get the state of the instances: %s" % (e))
+        if not remaining:
+            break
+        if time.time() + poll_interval > deadline:
+            logging.error(
+                "%s instances didn't reach the %s state in %s seconds: %s"
+                % (len(remaining), expected_state, timeout, remaining)
+            )
+            break
+        logging.info("Waiting for %s instances to be %s" % (len(remaining), expected_state))
+        time.sleep(poll_interval)
+    return remaining
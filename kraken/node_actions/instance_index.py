@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+import kraken.kubernetes.client as kubecli
+
+
+# Node name to cloud instance index of every cloud in use. Each index is
+# built with a single bulk listing through list_node_instances of the cloud
+# class, shared by the node and the shut down scenarios and rebuilt once it
+# is older than ttl seconds or when it doesn't know a node.
+ttl = 300
+lock = threading.Lock()
+indexes = {}
+
+
+def set_ttl(seconds):
+    global ttl
+    ttl = seconds
+
+
+def invalidate(cloud_object=None):
+    """
+    Drops the index of the cloud of the given object, every index when no
+    object is given
+    """
+
+    with lock:
+        if cloud_object is None:
+            indexes.clear()
+        else:
+            indexes.pop(type(cloud_object).__name__, None)
+
+
+def lookup_many(cloud_object, nodes):
+    """
+    Returns the instances of the given nodes as returned by the
+    get_instance_id method of the cloud object, None for the nodes without
+    an instance.
+
+    Args:
+        cloud_object: cloud API object implementing list_node_instances(nodes)
+        nodes: names of the nodes to look up
+
+    Returns:
+        list of the instances in the order of the nodes
+    """
+
+    key = type(cloud_object).__name__
+    with lock:
+        index = indexes.get(key)
+        if (
+            index is None
+            or time.time() - index["time"] > ttl
+            or any(node not in index["instances"] for node in nodes)
+        ):
+            cluster_nodes = set(kubecli.list_nodes())
+            cluster_nodes.update(nodes)
+            start_time = time.time()
+            instances = cloud_object.list_node_instances(sorted(cluster_nodes))
+            logging.info(
+                "Indexed the instances of %s nodes in %.2fs" % (len(cluster_nodes), time.time() - start_time)
+            )
+            # Nodes without an instance are kept so they don't trigger a rebuild
+            for node in cluster_nodes:
+                instances.setdefault(node, None)
+            index = {"time": time.time(), "instances": instances}
+            indexes[key] = index
+        return [index["instances"].get(node) for node in nodes]
+
+
+def lookup(cloud_object, node):
+    """
+    Returns the instance of the given node, None when it has no instance
+    """
+
+    return lookup_many(cloud_object, [node])[0]
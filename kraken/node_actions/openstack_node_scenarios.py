@@ -1,25 +1,64 @@
 import sys
 import time
+import json
 import logging
 import kraken.invoke.command as runcommand
+import kraken.kubernetes.client as kubecli
+import kraken.signal_state.state as signal_state
 import kraken.node_actions.common_node_functions as nodeaction
+import kraken.node_actions.instance_index as instance_index
+import kraken.node_actions.instance_batch as instance_batch
 from kraken.node_actions.abstract_node_scenarios import abstract_node_scenarios
 
 
 class OPENSTACKCLOUD:
+    # Number of servers per start and stop command
+    batch_size = 50
+
     def __init__(self):
         self.Wait = 30
 
     # Get the instance ID of the node
     def get_instance_id(self, node):
-        openstack_node_ip = nodeaction.get_node_ip(node)
-        openstack_node_name = self.get_openstack_nodename(openstack_node_ip)
+        openstack_node_name = instance_index.lookup(self, node)
+        if openstack_node_name is None:
+            logging.error("Couldn't find the openstack server of node " + str(node))
+            sys.exit(1)
         return openstack_node_name
 
+    # Get the server names of the given nodes, matched on the internal IP
+    # of the nodes with a single server listing
+    def list_node_instances(self, nodes):
+        server_names = {}
+        command = ["openstack", "server", "list", "-f", "json", "-c", "Name", "-c", "Networks"]
+        servers = json.loads(runcommand.execute(command, check=True).stdout)
+        for server in servers:
+            for ip in self.get_server_ips(server.get("Networks")):
+                server_names[ip] = server["Name"]
+        instances = {}
+        node_ips = kubecli.list_node_addresses("InternalIP")
+        for node in nodes:
+            if node_ips.get(node) in server_names:
+                instances[node] = server_names[node_ips[node]]
+        return instances
+
+    # Get the IPs of a server from the Networks column, a mapping of the
+    # networks to their IPs or a "net=ip, ip; net=ip" string depending on
+    # the version of the openstack client
+    def get_server_ips(self, networks):
+        ips = []
+        if isinstance(networks, dict):
+            for network_ips in networks.values():
+                ips.extend(network_ips if isinstance(network_ips, list) else [network_ips])
+        elif networks:
+            for network in networks.split(";"):
+                ips.extend(ip.strip() for ip in network.split("=")[-1].split(","))
+        return ips
+
     # Start the node instance
     def start_instances(self, node):
         try:
-            runcommand.invoke("openstack server start %s" % (node))
+            runcommand.execute(["openstack", "server", "start", node], check=True)
             logging.info("Instance: " + str(node) + " started")
         except Exception as e:
             logging.error("Failed to start node instance %s. Encountered following " "exception: %s." % (node, e))
@@ -28,7 +67,7 @@ class OPENSTACKCLOUD:
     # Stop the node instance
     def stop_instances(self, node):
         try:
-            runcommand.invoke("openstack server stop %s" % (node))
+            runcommand.execute(["openstack", "server", "stop", node], check=True)
             logging.info("Instance: " + str(node) + " stopped")
         except Exception as e:
             logging.error("Failed to stop node instance %s. Encountered following " "exception: %s." % (node, e))
@@ -37,12 +76,50 @@ class OPENSTACKCLOUD:
     # Reboot the node instance
     def reboot_instances(self, node):
         try:
-            runcommand.invoke("openstack server reboot --soft %s" % (node))
+            runcommand.execute(["openstack", "server", "reboot", "--soft", node], check=True)
             logging.info("Instance: " + str(node) + " rebooted")
         except Exception as e:
             logging.error("Failed to reboot node instance %s. Encountered following " "exception: %s." % (node, e))
             sys.exit(1)
 
+    # Start the node instances, batch_size servers per command with the
+    # commands of the batches running concurrently
+    def start_instances_batch(self, nodes, max_parallel=10):
+        self.run_batches("start", nodes, max_parallel)
+
+    # Stop the node instances, batch_size servers per command with the
+    # commands of the batches running concurrently
+    def stop_instances_batch(self, nodes, max_parallel=10):
+        self.run_batches("stop", nodes, max_parallel)
+
+    def run_batches(self, action, nodes, max_parallel):
+        batches = list(instance_batch.chunks(nodes, self.batch_size))
+        results = runcommand.execute_many(
+            [["openstack", "server", action] + batch for batch in batches],
+            max_parallel=max_parallel,
+            cancel=signal_state.stop_event,
+        )
+        for batch, result in zip(batches, results):
+            if not result.ok:
+                logging.error("Failed to %s node instances %s: %s" % (action, batch, result.error()))
+                sys.exit(1)
+            logging.info("Instances: %s %s" % (batch, "started" if action == "start" else "stopped"))
+
+    # Get the status of the given servers with a single server listing
+    def get_instance_states(self, nodes):
+        wanted = set(nodes)
+        command = ["openstack", "server", "list", "-f", "json", "-c", "Name", "-c", "Status"]
+        servers = json.loads(runcommand.execute(command, check=True, cancel=signal_state.stop_event).stdout)
+        return {server["Name"]: server["Status"] for server in servers if server["Name"] in wanted}
+
+    # Wait until the node instances are running, returns the ones that aren't
+    def wait_until_running_batch(self, nodes, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, nodes, "ACTIVE", timeout)
+
+    # Wait until the node instances are stopped, returns the ones that aren't
+    def wait_until_stopped_batch(self, nodes, timeout):
+        return instance_batch.wait_for_state(self.get_instance_states, nodes, "SHUTOFF", timeout)
+
     # Wait until the node instance is running
     def wait_until_running(self, node, timeout):
         return self.get_instance_status(node, "ACTIVE", timeout)
@@ -56,9 +133,12 @@ class OPENSTACKCLOUD:
         i = 0
         sleeper = 1
         while i <= timeout:
-            instStatus = runcommand.invoke(
-                "openstack server show %s | tr -d ' ' |" "grep '^|status' |" "cut -d '|' -f3 | tr -d '\n'" % (node)
-            )
+            instStatus = runcommand.execute(
+                ["openstack", "server", "show", node, "-f", "value", "-c", "status"],
+                timeout=60,
+                check=True,
+                cancel=signal_state.stop_event,
+            ).stdout
             logging.info("instance status is %s" % (instStatus))
             logging.info("expected status is %s" % (expected_status))
             if instStatus.strip() == expected_status:
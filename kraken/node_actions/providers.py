@@ -0,0 +1,55 @@
+import importlib
+import logging
+
+
+# Node scenario classes by cloud_type. The modules are only imported when a
+# scenario of that cloud type is run so that kraken doesn't pay the import
+# time and memory of every cloud SDK on startup.
+node_scenario_providers = {
+    "generic": ("kraken.node_actions.general_cloud_node_scenarios", "general_node_scenarios"),
+    "aws": ("kraken.node_actions.aws_node_scenarios", "aws_node_scenarios"),
+    "gcp": ("kraken.node_actions.gcp_node_scenarios", "gcp_node_scenarios"),
+    "openstack": ("kraken.node_actions.openstack_node_scenarios", "openstack_node_scenarios"),
+    "azure": ("kraken.node_actions.az_node_scenarios", "azure_node_scenarios"),
+    "az": ("kraken.node_actions.az_node_scenarios", "azure_node_scenarios"),
+    "alibaba": ("kraken.node_actions.alibaba_node_scenarios", "alibaba_node_scenarios"),
+    "alicloud": ("kraken.node_actions.alibaba_node_scenarios", "alibaba_node_scenarios"),
+    "bm": ("kraken.node_actions.bm_node_scenarios", "bm_node_scenarios"),
+}
+
+# Cloud API wrappers by cloud_type, used by the cluster level scenarios
+cloud_providers = {
+    "aws": ("kraken.node_actions.aws_node_scenarios", "AWS"),
+    "gcp": ("kraken.node_actions.gcp_node_scenarios", "GCP"),
+    "openstack": ("kraken.node_actions.openstack_node_scenarios", "OPENSTACKCLOUD"),
+    "azure": ("kraken.node_actions.az_node_scenarios", "Azure"),
+    "az": ("kraken.node_actions.az_node_scenarios", "Azure"),
+    "alibaba": ("kraken.node_actions.alibaba_node_scenarios", "Alibaba"),
+    "alicloud": ("kraken.node_actions.alibaba_node_scenarios", "Alibaba"),
+}
+
+
+def load(provider):
+    module_name, class_name = provider
+    logging.debug("Loading %s from %s" % (class_name, module_name))
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_node_scenario_class(cloud_type):
+    """
+    Returns the node scenarios class of the given cloud type, None if the
+    cloud type isn't supported
+    """
+
+    provider = node_scenario_providers.get(cloud_type)
+    return load(provider) if provider else None
+
+
+def get_cloud_class(cloud_type):
+    """
+    Returns the cloud API class of the given cloud type, None if the cloud
+    type isn't supported
+    """
+
+    provider = cloud_providers.get(cloud_type.lower())
+    return load(provider) if provider else None
@@ -2,15 +2,12 @@ import yaml
 import logging
 import sys
 import time
-from kraken.node_actions.aws_node_scenarios import aws_node_scenarios
-from kraken.node_actions.general_cloud_node_scenarios import general_node_scenarios
-from kraken.node_actions.az_node_scenarios import azure_node_scenarios
-from kraken.node_actions.gcp_node_scenarios import gcp_node_scenarios
-from kraken.node_actions.openstack_node_scenarios import openstack_node_scenarios
-from kraken.node_actions.alibaba_node_scenarios import alibaba_node_scenarios
-from kraken.node_actions.bm_node_scenarios import bm_node_scenarios
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import kraken.node_actions.providers as providers
 import kraken.node_actions.common_node_functions as common_node_functions
 import kraken.cerberus.setup as cerberus
+import kraken.signal_state.state as signal_state
 
 
 node_general = False
@@ -21,21 +18,15 @@ def get_node_scenario_object(node_scenario):
     if "cloud_type" not in node_scenario.keys() or node_scenario["cloud_type"] == "generic":
         global node_general
         node_general = True
-        return general_node_scenarios()
-    if node_scenario["cloud_type"] == "aws":
-        return aws_node_scenarios()
-    elif node_scenario["cloud_type"] == "gcp":
-        return gcp_node_scenarios()
-    elif node_scenario["cloud_type"] == "openstack":
-        return openstack_node_scenarios()
-    elif node_scenario["cloud_type"] == "azure" or node_scenario["cloud_type"] == "az":
-        return azure_node_scenarios()
-    elif node_scenario["cloud_type"] == "alibaba" or node_scenario["cloud_type"] == "alicloud":
-        return alibaba_node_scenarios()
-    elif node_scenario["cloud_type"] == "bm":
-        return bm_node_scenarios(
+        return providers.get_node_scenario_class("generic")()
+    # The cloud SDK of the provider is only imported here
+    node_scenario_class = providers.get_node_scenario_class(node_scenario["cloud_type"])
+    if node_scenario["cloud_type"] == "bm":
+        return node_scenario_class(
             node_scenario.get("bmc_info"), node_scenario.get("bmc_user", None), node_scenario.get("bmc_password", None)
         )
+    elif node_scenario_class is not None:
+        return node_scenario_class()
     else:
         logging.error(
             "Cloud type " + node_scenario["cloud_type"] + " is not currently supported; "
@@ -48,6 +39,8 @@ def get_node_scenario_object(node_scenario):
 # Run defined scenarios
 def run(scenarios_list, config, wait_duration):
     for node_scenario_config in scenarios_list:
+        if signal_state.stopped():
+            break
         with open(node_scenario_config, "r") as f:
             node_scenario_config = yaml.full_load(f)
             for node_scenario in node_scenario_config["node_scenarios"]:
@@ -57,7 +50,7 @@ def run(scenarios_list, config, wait_duration):
                         start_time = int(time.time())
                         inject_node_scenario(action, node_scenario, node_scenario_object)
                         logging.info("Waiting for the specified duration: %s" % (wait_duration))
-                        time.sleep(wait_duration)
+                        signal_state.wait(wait_duration)
                         end_time = int(time.time())
                         cerberus.get_status(config, start_time, end_time)
                         logging.info("")
@@ -65,57 +58,95 @@ def run(scenarios_list, config, wait_duration):
 
 # Inject the specified node scenario
 def inject_node_scenario(action, node_scenario, node_scenario_object):
-    generic_cloud_scenarios = ("stop_kubelet_scenario", "node_crash_scenario")
     # Get the node scenario configurations
-    run_kill_count = node_scenario.get("runs", 1)
     instance_kill_count = node_scenario.get("instance_count", 1)
     node_name = node_scenario.get("node_name", "")
     label_selector = node_scenario.get("label_selector", "")
-    timeout = node_scenario.get("timeout", 120)
-    service = node_scenario.get("service", "")
-    ssh_private_key = node_scenario.get("ssh_private_key", "~/.ssh/id_rsa")
+    parallel = node_scenario.get("parallel", False)
     # Get the node to apply the scenario
     if node_name:
         node_name_list = node_name.split(",")
     else:
         node_name_list = [node_name]
+    nodes = []
     for single_node_name in node_name_list:
-        nodes = common_node_functions.get_node(single_node_name, label_selector, instance_kill_count)
+        nodes.extend(common_node_functions.get_node(single_node_name, label_selector, instance_kill_count))
+    if parallel and len(nodes) > 1:
+        inject_node_scenario_parallel(action, node_scenario, node_scenario_object, nodes)
+    else:
         for single_node in nodes:
-            if node_general and action not in generic_cloud_scenarios:
-                logging.info("Scenario: " + action + " is not set up for generic cloud type, skipping action")
+            inject_node_action(action, node_scenario, node_scenario_object, single_node)
+
+
+# Inject the node scenario on all the nodes at the same time, at most
+# max_parallel nodes at once and starting every stagger seconds
+def inject_node_scenario_parallel(action, node_scenario, node_scenario_object, nodes):
+    max_parallel = node_scenario.get("max_parallel", 0) or len(nodes)
+    stagger = node_scenario.get("stagger", 0)
+    logging.info(
+        "Injecting %s on %s nodes in parallel, %s at a time: %s" % (action, len(nodes), max_parallel, nodes)
+    )
+    # The cloud clients aren't all thread safe, every worker gets its own
+    # node scenarios object
+    worker = threading.local()
+
+    def inject(single_node):
+        if not hasattr(worker, "node_scenario_object"):
+            worker.node_scenario_object = get_node_scenario_object(node_scenario)
+        inject_node_action(action, node_scenario, worker.node_scenario_object, single_node)
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(nodes))) as executor:
+        for i, single_node in enumerate(nodes):
+            if i and stagger and not signal_state.wait(stagger):
+                break
+            futures.append(executor.submit(inject, single_node))
+    # Re-raise the first failure once all the started actions are done
+    for future in futures:
+        future.result()
+
+
+# Inject the specified node scenario on a single node
+def inject_node_action(action, node_scenario, node_scenario_object, single_node):
+    generic_cloud_scenarios = ("stop_kubelet_scenario", "node_crash_scenario")
+    run_kill_count = node_scenario.get("runs", 1)
+    timeout = node_scenario.get("timeout", 120)
+    service = node_scenario.get("service", "")
+    ssh_private_key = node_scenario.get("ssh_private_key", "~/.ssh/id_rsa")
+    if node_general and action not in generic_cloud_scenarios:
+        logging.info("Scenario: " + action + " is not set up for generic cloud type, skipping action")
+    else:
+        if action == "node_start_scenario":
+            node_scenario_object.node_start_scenario(run_kill_count, single_node, timeout)
+        elif action == "node_stop_scenario":
+            node_scenario_object.node_stop_scenario(run_kill_count, single_node, timeout)
+        elif action == "node_stop_start_scenario":
+            node_scenario_object.node_stop_start_scenario(run_kill_count, single_node, timeout)
+        elif action == "node_termination_scenario":
+            node_scenario_object.node_termination_scenario(run_kill_count, single_node, timeout)
+        elif action == "node_reboot_scenario":
+            node_scenario_object.node_reboot_scenario(run_kill_count, single_node, timeout)
+        elif action == "stop_start_kubelet_scenario":
+            node_scenario_object.stop_start_kubelet_scenario(run_kill_count, single_node, timeout)
+        elif action == "stop_kubelet_scenario":
+            node_scenario_object.stop_kubelet_scenario(run_kill_count, single_node, timeout)
+        elif action == "node_crash_scenario":
+            node_scenario_object.node_crash_scenario(run_kill_count, single_node, timeout)
+        elif action == "stop_start_helper_node_scenario":
+            if node_scenario["cloud_type"] != "openstack":
+                logging.error(
+                    "Scenario: " + action + " is not supported for "
+                    "cloud type " + node_scenario["cloud_type"] + ", skipping action"
+                )
             else:
-                if action == "node_start_scenario":
-                    node_scenario_object.node_start_scenario(run_kill_count, single_node, timeout)
-                elif action == "node_stop_scenario":
-                    node_scenario_object.node_stop_scenario(run_kill_count, single_node, timeout)
-                elif action == "node_stop_start_scenario":
-                    node_scenario_object.node_stop_start_scenario(run_kill_count, single_node, timeout)
-                elif action == "node_termination_scenario":
-                    node_scenario_object.node_termination_scenario(run_kill_count, single_node, timeout)
-                elif action == "node_reboot_scenario":
-                    node_scenario_object.node_reboot_scenario(run_kill_count, single_node, timeout)
-                elif action == "stop_start_kubelet_scenario":
-                    node_scenario_object.stop_start_kubelet_scenario(run_kill_count, single_node, timeout)
-                elif action == "stop_kubelet_scenario":
-                    node_scenario_object.stop_kubelet_scenario(run_kill_count, single_node, timeout)
-                elif action == "node_crash_scenario":
-                    node_scenario_object.node_crash_scenario(run_kill_count, single_node, timeout)
-                elif action == "stop_start_helper_node_scenario":
-                    if node_scenario["cloud_type"] != "openstack":
-                        logging.error(
-                            "Scenario: " + action + " is not supported for "
-                            "cloud type " + node_scenario["cloud_type"] + ", skipping action"
-                        )
-                    else:
-                        if not node_scenario["helper_node_ip"]:
-                            logging.error("Helper node IP address is not provided")
-                            sys.exit(1)
-                        node_scenario_object.helper_node_stop_start_scenario(
-                            run_kill_count, node_scenario["helper_node_ip"], timeout
-                        )
-                        node_scenario_object.helper_node_service_status(
-                            node_scenario["helper_node_ip"], service, ssh_private_key, timeout
-                        )
-                else:
-                    logging.info("There is no node action that matches %s, skipping scenario" % action)
+                if not node_scenario["helper_node_ip"]:
+                    logging.error("Helper node IP address is not provided")
+                    sys.exit(1)
+                node_scenario_object.helper_node_stop_start_scenario(
+                    run_kill_count, node_scenario["helper_node_ip"], timeout
+                )
+                node_scenario_object.helper_node_service_status(
+                    node_scenario["helper_node_ip"], service, ssh_private_key, timeout
+                )
+        else:
+            logging.info("There is no node action that matches %s, skipping scenario" % action)
@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from kubernetes.stream import stream
+from kubernetes.client.rest import ApiException
+
+import kraken.invoke.command as runcommand
+import kraken.kubernetes.client as kubecli
+import kraken.signal_state.state as signal_state
+import kraken.templates.registry as templates
+
+
+# Node level commands are run in the host namespaces of the node. Without the
+# agent every command starts its own debug pod with oc debug node/<node>,
+# which takes several seconds for the pod to be scheduled and the image to be
+# pulled. With the agent enabled a privileged DaemonSet is deployed once per
+# run on the first node command, the commands are exec'd into the agent pod
+# of the node and the DaemonSet is deleted when kraken exits.
+
+enabled = False
+name = "kraken-node-agent"
+namespace = "default"
+image = "docker.io/fedora/tools"
+# Seconds to wait for the agent pods to be ready
+deploy_timeout = 300
+poll_interval = 2
+
+lock = threading.Lock()
+deployed = False
+# Name of the agent pod of every node
+pods = {}
+
+
+class NodeAgentError(Exception):
+    pass
+
+
+def configure(enable, agent_namespace="default", agent_image="docker.io/fedora/tools"):
+    global enabled
+    global namespace
+    global image
+    enabled = enable
+    namespace = agent_namespace
+    image = agent_image
+
+
+def render():
+    return templates.render(os.path.dirname(__file__), "daemonset.j2", name=name, image=image)
+
+
+def refresh_pods():
+    global pods
+    ready_pods = {}
+    for pod in kubecli.cli.list_namespaced_pod(namespace, label_selector="app=" + name).items:
+        if pod.status.phase != "Running" or not pod.status.container_statuses:
+            continue
+        if all(status.ready for status in pod.status.container_statuses):
+            ready_pods[pod.spec.node_name] = pod.metadata.name
+    pods = ready_pods
+    return pods
+
+
+def deploy():
+    """
+    Deploys the agent DaemonSet unless it is already deployed and waits for
+    its pods to be ready, pods which aren't ready after deploy_timeout seconds
+    are left to the oc debug fallback
+    """
+
+    global deployed
+    with lock:
+        if deployed:
+            return
+        logging.info("Deploying the node agent DaemonSet %s in the namespace %s" % (name, namespace))
+        kubecli.create_daemonset(render(), namespace)
+        signal_state.add_cleanup_hook(delete)
+        deployed = True
+        deadline = time.monotonic() + deploy_timeout
+        while True:
+            status = kubecli.read_daemonset(name, namespace).status
+            desired = status.desired_number_scheduled or 0
+            if desired and (status.number_ready or 0) >= desired:
+                break
+            if time.monotonic() >= deadline:
+                logging.warning(
+                    "%s of %s node agent pods are ready after %s seconds"
+                    % (status.number_ready, desired, deploy_timeout)
+                )
+                break
+            time.sleep(poll_interval)
+        refresh_pods()
+        logging.info("Node agent running on %s nodes" % len(pods))
+
+
+def delete():
+    global deployed
+    with lock:
+        if not deployed:
+            return
+        logging.info("Deleting the node agent DaemonSet %s" % name)
+        try:
+            kubecli.delete_daemonset(name, namespace)
+        except Exception as e:
+            logging.error("Failed to delete the node agent DaemonSet %s: %s" % (name, e))
+        deployed = False
+        pods.clear()
+
+
+def get_pod(node):
+    deploy()
+    pod = pods.get(node)
+    if pod is None:
+        # The node joined or its agent pod was restarted since the last lookup
+        pod = refresh_pods().get(node)
+    return pod
+
+
+def exec_in_pod(pod, command, timeout=None, chroot=True):
+    argv = ["/bin/sh", "-c", command]
+    if chroot:
+        argv = ["chroot", "/host"] + argv
+    response = stream(
+        kubecli.cli.connect_get_namespaced_pod_exec,
+        pod,
+        namespace,
+        container="agent",
+        command=argv,
+        stderr=True,
+        stdin=False,
+        stdout=True,
+        tty=False,
+        _preload_content=False,
+    )
+    try:
+        response.run_forever(timeout=timeout)
+        if response.is_open():
+            raise NodeAgentError("%s didn't complete in %s seconds" % (command, timeout))
+        output = response.read_stdout() + response.read_stderr()
+        return response.returncode, output
+    finally:
+        response.close()
+
+
+def run(node, command, timeout=None, chroot=True):
+    """
+    Runs a shell command on the host of the node through its agent pod
+
+    Args:
+        node: name of the node
+        command: shell command run chrooted in the root filesystem of the node
+        timeout: maximum number of seconds to wait for the command, None to
+            wait until it completes
+        chroot: run the command with the tools of the agent image instead of
+            the ones of the node when False, still in the host network
+
+    Returns:
+        the exit code and the output of the command
+    """
+
+    pod = get_pod(node)
+    if pod is None:
+        raise NodeAgentError("No node agent pod is ready on the node %s" % node)
+    try:
+        return exec_in_pod(pod, command, timeout, chroot)
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        # The agent pod was replaced, exec in the new one
+        pod = refresh_pods().get(node)
+        if pod is None:
+            raise NodeAgentError("No node agent pod is ready on the node %s" % node)
+        return exec_in_pod(pod, command, timeout, chroot)
+
+
+def node_command(node, command, check=True, timeout=None):
+    """
+    Runs a shell command on the host of the node through the agent when it's
+    enabled and has a pod on the node, with oc debug otherwise
+
+    Args:
+        node: name of the node
+        command: shell command run chrooted in the root filesystem of the node
+        check: exit when the command fails, failures are only logged when False
+        timeout: maximum number of seconds to wait for the command
+
+    Returns:
+        the output of the command
+    """
+
+    if enabled and get_pod(node) is not None:
+        try:
+            returncode, output = run(node, command, timeout)
+            if returncode == 0:
+                return output
+            error = "exited with %s: %s" % (returncode, output)
+        except Exception as e:
+            error = str(e)
+        if check:
+            logging.error("Failed to run %s on the node %s: %s" % (command, node, error))
+            sys.exit(1)
+        logging.info("Running %s on the node %s failed: %s" % (command, node, error))
+        return ""
+    debug_command = "oc debug node/" + node + " -- chroot /host " + command
+    if check:
+        return runcommand.invoke(debug_command)
+    return runcommand.invoke_no_exit(debug_command, timeout)
+
+
+def node_commands(nodes, command, check=True, max_parallel=20):
+    """
+    Runs a shell command on the hosts of all the given nodes, in parallel
+    when the agent is enabled
+
+    Returns:
+        dict of the output of the command on every node
+    """
+
+    if not enabled or len(nodes) < 2:
+        return dict((node, node_command(node, command, check)) for node in nodes)
+    deploy()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(nodes)))) as executor:
+        outputs = executor.map(lambda node: node_command(node, command, check), nodes)
+        return dict(zip(nodes, outputs))
@@ -1,13 +1,14 @@
 import dataclasses
+import importlib
 import json
 import logging
 from os.path import abspath
 from typing import List, Dict
 
 from arcaflow_plugin_sdk import schema, serialization, jsonschema
-import kraken.plugins.vmware.vmware_plugin as vmware_plugin
 from kraken.plugins.pod_plugin import kill_pods, wait_for_pods
 from kraken.plugins.run_python_plugin import run_python_file
+import kraken.signal_state.state as signal_state
 
 
 @dataclasses.dataclass
@@ -21,6 +22,43 @@ class PluginStep:
             "output_data": self.schema.outputs[output_id].serialize(output_data),
         }, indent='\t')
 
+    @property
+    def id(self) -> str:
+        return self.schema.id
+
+
+class LazyPluginStep(PluginStep):
+    """
+    LazyPluginStep is a plugin step whose module is only imported when the step is run or its schema is requested.
+    It is used for the steps depending on SDKs which are slow to import, so that runs not using them don't pay for it.
+    """
+
+    def __init__(self, step_id: str, module_name: str, step_name: str, error_output_ids: List[str]):
+        self.step_id = step_id
+        self.module_name = module_name
+        self.step_name = step_name
+        self.error_output_ids = error_output_ids
+        self._schema = None
+
+    @property
+    def id(self) -> str:
+        return self.step_id
+
+    @property
+    def schema(self) -> schema.StepSchema:
+        if self._schema is None:
+            self._schema = getattr(importlib.import_module(self.module_name), self.step_name)
+            if self._schema.id != self.step_id:
+                raise Exception(
+                    "Step {}.{} has the ID {}, expected {}".format(
+                        self.module_name,
+                        self.step_name,
+                        self._schema.id,
+                        self.step_id
+                    )
+                )
+        return self._schema
+
 
 class Plugins:
     """
@@ -32,11 +70,11 @@ class Plugins:
     def __init__(self, steps: List[PluginStep]):
         self.steps_by_id = dict()
         for step in steps:
-            if step.schema.id in self.steps_by_id:
+            if step.id in self.steps_by_id:
                 raise Exception(
-                    "Duplicate step ID: {}".format(step.schema.id)
+                    "Duplicate step ID: {}".format(step.id)
                 )
-            self.steps_by_id[step.schema.id] = step
+            self.steps_by_id[step.id] = step
 
     def run(self, file: str, kubeconfig_path: str):
         """
@@ -154,26 +192,34 @@ PLUGINS = Plugins(
                 "error"
             ]
         ),
-        PluginStep(
-            vmware_plugin.node_start,
+        LazyPluginStep(
+            "node-start",
+            "kraken.plugins.vmware.vmware_plugin",
+            "node_start",
             [
                 "error"
             ]
         ),
-        PluginStep(
-            vmware_plugin.node_stop,
+        LazyPluginStep(
+            "node-stop",
+            "kraken.plugins.vmware.vmware_plugin",
+            "node_stop",
             [
                 "error"
             ]
         ),
-        PluginStep(
-            vmware_plugin.node_reboot,
+        LazyPluginStep(
+            "node-reboot",
+            "kraken.plugins.vmware.vmware_plugin",
+            "node_reboot",
             [
                 "error"
             ]
         ),
-        PluginStep(
-            vmware_plugin.node_terminate,
+        LazyPluginStep(
+            "node-terminate",
+            "kraken.plugins.vmware.vmware_plugin",
+            "node_terminate",
             [
                 "error"
             ]
@@ -184,6 +230,8 @@ PLUGINS = Plugins(
 
 def run(scenarios: List[str], kubeconfig_path: str, failed_post_scenarios: List[str]) -> List[str]:
     for scenario in scenarios:
+        if signal_state.stopped():
+            break
         try:
             PLUGINS.run(scenario, kubeconfig_path)
         except Exception as e:
@@ -1,19 +1,22 @@
 #!/usr/bin/env python
+import enum
 import re
 import sys
 import time
 import typing
 from dataclasses import dataclass, field
-import random
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from traceback import format_exc
 
-from kubernetes import config, client
-from kubernetes.client import V1PodList, V1Pod, ApiException, V1DeleteOptions
+from kubernetes import config, client, watch
+from kubernetes.client import V1Pod, ApiException, V1DeleteOptions
 from arcaflow_plugin_sdk import validation, plugin, schema
+from kraken.kubernetes.pagination import list_all, paginate, paginate_raw, sample
+from kraken.kubernetes.recovery import RecoveryTracker
+from kraken.kubernetes.resources import PodRecord
 
 
-def setup_kubernetes(kubeconfig_path):
+def setup_kubernetes(kubeconfig_path, connection_pool_maxsize=None):
     if kubeconfig_path is None:
         kubeconfig_path = config.KUBE_CONFIG_DEFAULT_LOCATION
     kubeconfig = config.kube_config.KubeConfigMerger(kubeconfig_path)
@@ -28,27 +31,38 @@ def setup_kubernetes(kubeconfig_path):
     )
     client_config = client.Configuration()
     loader.load_and_set(client_config)
+    if connection_pool_maxsize is not None and connection_pool_maxsize > client_config.connection_pool_maxsize:
+        client_config.connection_pool_maxsize = connection_pool_maxsize
     return client.ApiClient(configuration=client_config)
 
 
-def _find_pods(core_v1, label_selector, name_pattern, namespace_pattern):
-    pods: typing.List[V1Pod] = []
-    _continue = None
-    finished = False
-    while not finished:
-        pod_response: V1PodList = core_v1.list_pod_for_all_namespaces(
-            watch=False,
+def _iterate_pods(core_v1, label_selector, name_pattern, namespace_pattern, page_size=500, metadata_only=False):
+    """
+    Yields the pods matching the criteria while paging through the cluster-wide
+    pod list, so matches are available before the whole list has been fetched.
+    With metadata_only only the pod metadata is requested and compact PodRecord
+    objects are yielded instead of V1Pod models.
+    """
+    if metadata_only:
+        for record in map(PodRecord.from_dict, paginate_raw(
+            core_v1.list_pod_for_all_namespaces,
+            page_size=page_size,
+            metadata_only=True,
             label_selector=label_selector
-        )
-        for pod in pod_response.items:
-            pod: V1Pod
-            if (name_pattern is None or name_pattern.match(pod.metadata.name)) and \
-                    namespace_pattern.match(pod.metadata.namespace):
-                pods.append(pod)
-        _continue = pod_response.metadata._continue
-        if _continue is None:
-            finished = True
-    return pods
+        )):
+            if (name_pattern is None or name_pattern.match(record.name)) and \
+                    namespace_pattern.match(record.namespace):
+                yield record
+        return
+    pod: V1Pod
+    for pod in paginate(
+        core_v1.list_pod_for_all_namespaces,
+        page_size=page_size,
+        label_selector=label_selector
+    ):
+        if (name_pattern is None or name_pattern.match(pod.metadata.name)) and \
+                namespace_pattern.match(pod.metadata.namespace):
+            yield pod
 
 
 @dataclass
@@ -57,12 +71,61 @@ class Pod:
     name: str
 
 
+@dataclass
+class RecoveryLatencies:
+    samples: typing.List[float] = field(metadata={
+        "name": "Samples",
+        "description": "Latency of every replacement pod in seconds."
+    })
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+@dataclass
+class OwnerRecovery:
+    kind: str
+    namespace: str
+    name: str
+    killed: int = field(metadata={
+        "name": "Killed",
+        "description": "Number of pods of this owner that have been killed."
+    })
+    recovered: int = field(metadata={
+        "name": "Recovered",
+        "description": "Number of replacement pods that became Ready before the recovery timeout."
+    })
+    scheduled: typing.Optional[RecoveryLatencies] = field(default=None, metadata={
+        "name": "Time to scheduled",
+        "description": "Seconds from the deletion of a pod until its replacement was assigned to a node."
+    })
+    running: typing.Optional[RecoveryLatencies] = field(default=None, metadata={
+        "name": "Time to running",
+        "description": "Seconds from the deletion of a pod until its replacement was running."
+    })
+    ready: typing.Optional[RecoveryLatencies] = field(default=None, metadata={
+        "name": "Time to ready",
+        "description": "Seconds from the deletion of a pod until its replacement was Ready."
+    })
+
+
 @dataclass
 class PodKillSuccessOutput:
     pods: typing.Dict[int, Pod] = field(metadata={
         "name": "Pods removed",
         "description": "Map between timestamps and the pods removed. The timestamp is provided in nanoseconds."
     })
+    delete_latencies: typing.Dict[int, float] = field(default_factory=dict, metadata={
+        "name": "Delete latencies",
+        "description": "Map between the timestamps in 'pods' and the time in seconds it took for the API server to "
+                       "accept the deletion of that pod."
+    })
+    recovery: typing.Dict[str, OwnerRecovery] = field(default_factory=dict, metadata={
+        "name": "Recovery",
+        "description": "Recovery latencies of the owners (ReplicaSet, StatefulSet, DaemonSet, ...) of the removed "
+                       "pods, keyed by kind/namespace/name. Only filled when track_recovery is enabled."
+    })
 
 
 @dataclass
@@ -127,9 +190,187 @@ class KillPodConfig:
 
     backoff: int = field(default=1, metadata={
         "name": "Backoff",
-        "description": "How many seconds to wait between checks for the target pod status."
+        "description": "How many seconds to wait between checks for the target pod status. Only used when the "
+                       "removal can't be followed with a watch."
     })
 
+    page_size: typing.Annotated[int, validation.min(0)] = field(default=500, metadata={
+        "name": "Page size",
+        "description": "How many pods to fetch per list call while selecting the targets. 0 fetches all pods in a "
+                       "single call."
+    })
+
+    max_parallel: typing.Annotated[int, validation.min(1)] = field(default=1, metadata={
+        "name": "Maximum parallel deletions",
+        "description": "How many pods to delete concurrently. Set it to the kill count to fire all deletions at "
+                       "once and simulate a correlated failure."
+    })
+
+    track_recovery: bool = field(default=False, metadata={
+        "name": "Track recovery",
+        "description": "Measure how long the owners of the killed pods take to schedule, run and get their "
+                       "replacement pods Ready."
+    })
+
+    recovery_timeout: typing.Annotated[int, validation.min(1)] = field(default=300, metadata={
+        "name": "Recovery timeout",
+        "description": "How many seconds to wait after the pods have been removed for the replacements to become "
+                       "Ready when track_recovery is enabled."
+    })
+
+    metadata_only: bool = field(default=False, metadata={
+        "name": "Metadata only",
+        "description": "Only fetch the metadata of the pods while selecting the targets. This lowers the memory "
+                       "and CPU usage of the selection on large clusters."
+    })
+
+
+def _delete_pods(
+        core_v1,
+        pods: typing.List[Pod],
+        max_parallel: int
+) -> typing.Tuple[typing.Dict[int, Pod], typing.Dict[int, float]]:
+    """
+    Deletes the pods using up to max_parallel concurrent API calls. Returns the
+    pods keyed by the nanosecond timestamp their deletion was accepted at and
+    the latency of every deletion in seconds under the same key.
+    """
+
+    def delete_pod(pod: Pod) -> typing.Tuple[Pod, int, int]:
+        start = time.time_ns()
+        core_v1.delete_namespaced_pod(pod.name, pod.namespace, body=V1DeleteOptions(
+            grace_period_seconds=0,
+        ))
+        return pod, start, time.time_ns()
+
+    killed_pods: typing.Dict[int, Pod] = {}
+    delete_latencies: typing.Dict[int, float] = {}
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        for pod, start, end in executor.map(delete_pod, pods):
+            while end in killed_pods:
+                end += 1
+            killed_pods[end] = pod
+            delete_latencies[end] = (end - start) / 1e9
+    return killed_pods, delete_latencies
+
+
+def _pod_watches(core_v1, pods: typing.List[Pod]) -> typing.Dict[str, typing.Tuple[typing.List, str]]:
+    """
+    Returns, for every namespace of the pods, the arguments of a namespaced
+    pod watch and the resourceVersion to start it from. The watches have to
+    start before the deletions so that none of the DELETED events can be
+    missed.
+    """
+    watches = {}
+    for namespace in sorted(set(p.namespace for p in pods)):
+        list_args = [core_v1.list_namespaced_pod, namespace]
+        watches[namespace] = (list_args, core_v1.list_namespaced_pod(namespace, limit=1).metadata.resource_version)
+    return watches
+
+
+def _watch_pods_removed(
+        list_args: typing.List,
+        pods: typing.List[Pod],
+        resource_version: str,
+        deadline: float
+) -> typing.List[Pod]:
+    """
+    Follows the pod watch from resource_version until a DELETED event has been
+    seen for all the pods or the deadline is reached. Returns the pods whose
+    removal could not be confirmed, the caller falls back to polling them if
+    the watch failed before the deadline.
+    """
+    remaining = {(p.namespace, p.name): p for p in pods}
+    while len(remaining) > 0 and time.time() < deadline:
+        w = watch.Watch()
+        try:
+            for event in w.stream(
+                    *list_args,
+                    resource_version=resource_version,
+                    timeout_seconds=max(1, int(deadline - time.time())),
+                    allow_watch_bookmarks=True
+            ):
+                if event["type"] == "ERROR":
+                    return list(remaining.values())
+                if event["type"] == "BOOKMARK":
+                    resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+                    continue
+                metadata = event["object"].metadata
+                resource_version = metadata.resource_version
+                if event["type"] == "DELETED":
+                    remaining.pop((metadata.namespace, metadata.name), None)
+                if len(remaining) == 0 or time.time() >= deadline:
+                    w.stop()
+                    break
+        except ApiException:
+            return list(remaining.values())
+    return list(remaining.values())
+
+
+def _watch_all_pods_removed(
+        watches: typing.Dict[str, typing.Tuple[typing.List, str]],
+        pods: typing.List[Pod],
+        deadline: float
+) -> typing.List[Pod]:
+    """
+    Follows the watch of every namespace of the pods concurrently, all of
+    them until the same deadline. Returns the pods whose removal could not be
+    confirmed.
+    """
+    by_namespace: typing.Dict[str, typing.List[Pod]] = {}
+    for p in pods:
+        by_namespace.setdefault(p.namespace, []).append(p)
+
+    def watch_namespace(namespace: str) -> typing.List[Pod]:
+        list_args, resource_version = watches[namespace]
+        return _watch_pods_removed(list_args, by_namespace[namespace], resource_version, deadline)
+
+    if len(by_namespace) == 1:
+        return watch_namespace(next(iter(by_namespace)))
+    with ThreadPoolExecutor(max_workers=len(by_namespace)) as executor:
+        return [p for remaining in executor.map(watch_namespace, by_namespace) for p in remaining]
+
+
+def _poll_pods_removed(core_v1, pods: typing.List[Pod], deadline: float, backoff: int) -> bool:
+    """
+    Reads the pods every backoff seconds until all of them are gone. Returns
+    False if some pods still exist at the deadline.
+    """
+    while len(pods) > 0:
+        new_pods: typing.List[Pod] = []
+        for p in pods:
+            try:
+                core_v1.read_namespaced_pod(p.name, p.namespace)
+                new_pods.append(p)
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+        pods = new_pods
+        if len(pods) == 0:
+            break
+        if time.time() > deadline:
+            return False
+        time.sleep(backoff)
+    return True
+
+
+def _recovery_output(results: typing.Dict[str, typing.Dict]) -> typing.Dict[str, OwnerRecovery]:
+    recovery: typing.Dict[str, OwnerRecovery] = {}
+    for key, result in results.items():
+        stages = {
+            stage: RecoveryLatencies(**result[stage]) if result[stage] else None
+            for stage in ("scheduled", "running", "ready")
+        }
+        recovery[key] = OwnerRecovery(
+            result["kind"],
+            result["namespace"],
+            result["name"],
+            result["killed"],
+            result["recovered"],
+            **stages
+        )
+    return recovery
+
 
 @plugin.step(
     "kill-pods",
@@ -139,58 +380,82 @@ class KillPodConfig:
 )
 def kill_pods(cfg: KillPodConfig) -> typing.Tuple[str, typing.Union[PodKillSuccessOutput, PodErrorOutput]]:
     try:
-        with setup_kubernetes(None) as cli:
+        with setup_kubernetes(None, cfg.max_parallel) as cli:
             core_v1 = client.CoreV1Api(cli)
 
             # region Select target pods
-            pods = _find_pods(core_v1, cfg.label_selector, cfg.name_pattern, cfg.namespace_pattern)
-            if len(pods) < cfg.kill:
+            pods, found = sample(
+                _iterate_pods(
+                    core_v1,
+                    cfg.label_selector,
+                    cfg.name_pattern,
+                    cfg.namespace_pattern,
+                    cfg.page_size,
+                    cfg.metadata_only
+                ),
+                cfg.kill
+            )
+            if not cfg.metadata_only:
+                pods = [PodRecord.from_model(pod) for pod in pods]
+            owners = {(pod.namespace, pod.name): pod.owner for pod in pods}
+            pods = [Pod(pod.namespace, pod.name) for pod in pods]
+            if found < cfg.kill:
                 return "error", PodErrorOutput(
-                    "Not enough pods match the criteria, expected {} but found only {} pods".format(cfg.kill, len(pods))
+                    "Not enough pods match the criteria, expected {} but found only {} pods".format(cfg.kill, found)
                 )
-            random.shuffle(pods)
             # endregion
 
             # region Remove pods
-            killed_pods: typing.Dict[int, Pod] = {}
-            watch_pods: typing.List[Pod] = []
-            for i in range(cfg.kill):
-                pod = pods[i]
-                core_v1.delete_namespaced_pod(pod.metadata.name, pod.metadata.namespace, body=V1DeleteOptions(
-                    grace_period_seconds=0,
-                ))
-                p = Pod(
-                    pod.metadata.namespace,
-                    pod.metadata.name
-                )
-                killed_pods[int(time.time_ns())] = p
-                watch_pods.append(p)
-            # endregion
-
-            # region Wait for pods to be removed
-            start_time = time.time()
-            while len(watch_pods) > 0:
-                time.sleep(cfg.backoff)
-                new_watch_pods: typing.List[Pod] = []
-                for p in watch_pods:
-                    try:
-                        read_pod = core_v1.read_namespaced_pod(p.name, p.namespace)
-                        new_watch_pods.append(p)
-                    except ApiException as e:
-                        if e.status != 404:
-                            raise
-                watch_pods = new_watch_pods
-                current_time = time.time()
-                if current_time - start_time > cfg.timeout:
+            # The watches have to start before the deletions so that none of
+            # the DELETED events can be missed.
+            watches = _pod_watches(core_v1, pods[:cfg.kill])
+            tracker = None
+            if cfg.track_recovery:
+                tracker = RecoveryTracker()
+                for p in pods[:cfg.kill]:
+                    tracker.expect(p.namespace, owners[(p.namespace, p.name)])
+                for list_args, resource_version in watches.values():
+                    tracker.start(*list_args, resource_version=resource_version)
+            try:
+                killed_pods, delete_latencies = _delete_pods(core_v1, pods[:cfg.kill], cfg.max_parallel)
+                if tracker is not None:
+                    for timestamp, p in killed_pods.items():
+                        tracker.deleted(owners[(p.namespace, p.name)], timestamp / 1e9)
+                # endregion
+
+                # region Wait for pods to be removed
+                deadline = time.time() + cfg.timeout
+                watch_pods = _watch_all_pods_removed(watches, list(killed_pods.values()), deadline)
+                if len(watch_pods) > 0 and not _poll_pods_removed(core_v1, watch_pods, deadline, cfg.backoff):
                     return "error", PodErrorOutput("Timeout while waiting for pods to be removed.")
-            return "success", PodKillSuccessOutput(killed_pods)
-            # endregion
+                # endregion
+
+                # region Wait for the replacements
+                recovery = {}
+                if tracker is not None:
+                    tracker.wait(cfg.recovery_timeout)
+                    recovery = _recovery_output(tracker.results())
+                # endregion
+            finally:
+                if tracker is not None:
+                    tracker.stop()
+            return "success", PodKillSuccessOutput(killed_pods, delete_latencies, recovery)
     except Exception:
         return "error", PodErrorOutput(
             format_exc()
         )
 
 
+class PodCondition(enum.Enum):
+    """
+    Condition a pod has to meet to be counted by wait-for-pods
+    """
+
+    PRESENT = "present"
+    RUNNING = "running"
+    READY = "ready"
+
+
 @dataclass
 class WaitForPodsConfig:
     """
@@ -212,9 +477,15 @@ class WaitForPodsConfig:
 
     count: typing.Annotated[int, validation.min(1)] = field(
         default=1,
-        metadata={"name": "Pod count", "description": "Wait for at least this many pods to exist"}
+        metadata={"name": "Pod count", "description": "Wait for at least this many pods to meet the condition"}
     )
 
+    condition: PodCondition = field(default=PodCondition.PRESENT, metadata={
+        "name": "Condition",
+        "description": "What a pod has to be to be counted: present (it exists), running (its phase is Running) "
+                       "or ready (its Ready condition is True)."
+    })
+
     timeout: typing.Annotated[int, validation.min(1)] = field(
         default=180,
         metadata={"name": "Timeout", "description": "How many seconds to wait for?"}
@@ -222,16 +493,47 @@ class WaitForPodsConfig:
 
     backoff: int = field(default=1, metadata={
         "name": "Backoff",
-        "description": "How many seconds to wait between checks for the target pod status."
+        "description": "How many seconds to wait before listing the pods again when the watch fails."
+    })
+
+    page_size: typing.Annotated[int, validation.min(0)] = field(default=500, metadata={
+        "name": "Page size",
+        "description": "How many pods to fetch per list call. 0 fetches all pods in a single call."
     })
 
     kubeconfig_path: typing.Optional[str] = None
 
 
+def _pod_meets_condition(pod: V1Pod, condition: PodCondition) -> bool:
+    if condition == PodCondition.PRESENT:
+        return True
+    if pod.metadata.deletion_timestamp is not None or pod.status is None:
+        return False
+    if condition == PodCondition.RUNNING:
+        return pod.status.phase == "Running"
+    for pod_condition in pod.status.conditions or []:
+        if pod_condition.type == "Ready":
+            return pod_condition.status == "True"
+    return False
+
+
+def _update_matches(matches: typing.Dict[str, Pod], event_type: str, pod: V1Pod, cfg: WaitForPodsConfig):
+    key = "%s/%s" % (pod.metadata.namespace, pod.metadata.name)
+    if (
+        event_type != "DELETED" and
+        (cfg.name_pattern is None or cfg.name_pattern.match(pod.metadata.name)) and
+        cfg.namespace_pattern.match(pod.metadata.namespace) and
+        _pod_meets_condition(pod, cfg.condition)
+    ):
+        matches[key] = Pod(pod.metadata.namespace, pod.metadata.name)
+    else:
+        matches.pop(key, None)
+
+
 @plugin.step(
     "wait-for-pods",
     "Wait for pods",
-    "Wait for the specified number of pods to be present",
+    "Wait for the specified number of pods to be present, running or ready",
     {"success": PodWaitSuccessOutput, "error": PodErrorOutput}
 )
 def wait_for_pods(cfg: WaitForPodsConfig) -> typing.Tuple[str, typing.Union[PodWaitSuccessOutput, PodErrorOutput]]:
@@ -239,23 +541,51 @@ def wait_for_pods(cfg: WaitForPodsConfig) -> typing.Tuple[str, typing.Union[PodW
         with setup_kubernetes(None) as cli:
             core_v1 = client.CoreV1Api(cli)
 
-            timeout = False
-            start_time = datetime.now()
-            while not timeout:
-                pods = _find_pods(core_v1, cfg.label_selector, cfg.name_pattern, cfg.namespace_pattern)
-                if len(pods) >= cfg.count:
-                    return "success", \
-                           PodWaitSuccessOutput(list(map(lambda p: Pod(p.metadata.namespace, p.metadata.name), pods)))
-
-                time.sleep(cfg.backoff)
-
-                now_time = datetime.now()
-
-                time_diff = now_time - start_time
-                if time_diff.seconds > cfg.timeout:
+            # The matching pods are listed once and then kept up to date from
+            # a watch. A new list is only needed when the watch fails.
+            deadline = time.time() + cfg.timeout
+            resource_version = None
+            matches: typing.Dict[str, Pod] = {}
+            while True:
+                if resource_version is None:
+                    pods, resource_version = list_all(
+                        core_v1.list_pod_for_all_namespaces,
+                        page_size=cfg.page_size,
+                        label_selector=cfg.label_selector
+                    )
+                    matches = {}
+                    for pod in pods:
+                        _update_matches(matches, "ADDED", pod, cfg)
+                if len(matches) >= cfg.count:
+                    return "success", PodWaitSuccessOutput(list(matches.values()))
+                if time.time() >= deadline:
                     return "error", PodErrorOutput(
                         "timeout while waiting for pods to come up"
                     )
+
+                w = watch.Watch()
+                try:
+                    for event in w.stream(
+                            core_v1.list_pod_for_all_namespaces,
+                            label_selector=cfg.label_selector,
+                            resource_version=resource_version,
+                            timeout_seconds=max(1, int(deadline - time.time())),
+                            allow_watch_bookmarks=True
+                    ):
+                        if event["type"] == "ERROR":
+                            raise ApiException(status=(event.get("raw_object") or {}).get("code", 500))
+                        if event["type"] == "BOOKMARK":
+                            resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+                            continue
+                        resource_version = event["object"].metadata.resource_version
+                        _update_matches(matches, event["type"], event["object"], cfg)
+                        if len(matches) >= cfg.count or time.time() >= deadline:
+                            w.stop()
+                            break
+                except ApiException as e:
+                    if e.status != 410:
+                        time.sleep(cfg.backoff)
+                    resource_version = None
     except Exception:
         return "error", PodErrorOutput(
             format_exc()
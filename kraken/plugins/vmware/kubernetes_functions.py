@@ -133,47 +133,22 @@ def get_node_list(cfg, action, core_v1):
     return list(scenario_nodes)
 
 
-def watch_node_status(node, status, timeout, watch_resource, core_v1):
-    """
-    Monitor the status of a node for change
-    """
-    count = timeout
-    for event in watch_resource.stream(
-        core_v1.list_node,
-        field_selector=f"metadata.name={node}",
-        timeout_seconds=timeout,
-    ):
-        conditions = [
-            status
-            for status in event["object"].status.conditions
-            if status.type == "Ready"
-        ]
-        if conditions[0].status == status:
-            watch_resource.stop()
-            break
-        else:
-            count -= 1
-            logging.info("Status of node " + node + ": " + str(conditions[0].status))
-        if not count:
-            watch_resource.stop()
-
-
-def wait_for_ready_status(node, timeout, watch_resource, core_v1):
+def wait_for_ready_status(node, timeout, node_watcher):
     """
     Wait until the node status becomes Ready
     """
-    watch_node_status(node, "True", timeout, watch_resource, core_v1)
+    node_watcher.wait_for_status(node, "True", timeout)
 
 
-def wait_for_not_ready_status(node, timeout, watch_resource, core_v1):
+def wait_for_not_ready_status(node, timeout, node_watcher):
     """
     Wait until the node status becomes Not Ready
     """
-    watch_node_status(node, "False", timeout, watch_resource, core_v1)
+    node_watcher.wait_for_status(node, "False", timeout)
 
 
-def wait_for_unknown_status(node, timeout, watch_resource, core_v1):
+def wait_for_unknown_status(node, timeout, node_watcher):
     """
     Wait until the node status becomes Unknown
     """
-    watch_node_status(node, "Unknown", timeout, watch_resource, core_v1)
+    node_watcher.wait_for_status(node, "Unknown", timeout)
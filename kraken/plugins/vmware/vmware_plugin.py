@@ -10,7 +10,8 @@ import logging
 from kraken.plugins.vmware import kubernetes_functions as kube_helper
 from com.vmware.vcenter_client import ResourcePool
 from arcaflow_plugin_sdk import validation, plugin
-from kubernetes import client, watch
+from kubernetes import client
+from kraken.kubernetes.node_watch import NodeWatcher
 from vmware.vapi.vsphere.client import create_vsphere_client
 from com.vmware.vcenter_client import VM
 from com.vmware.vcenter.vm_client import Power
@@ -481,10 +482,9 @@ def node_start(
 ) -> typing.Tuple[
     str, typing.Union[NodeScenarioSuccessOutput, NodeScenarioErrorOutput]
 ]:
-    with kube_helper.setup_kubernetes(None) as cli:
+    with kube_helper.setup_kubernetes(None) as cli, NodeWatcher(client.CoreV1Api(cli)) as node_watcher:
         vsphere = vSphere(verify=cfg.verify_session)
         core_v1 = client.CoreV1Api(cli)
-        watch_resource = watch.Watch()
         node_list = kube_helper.get_node_list(cfg, kube_helper.Actions.START, core_v1)
         nodes_started = {}
         for name in node_list:
@@ -497,7 +497,7 @@ def node_start(
                         vsphere.wait_until_running(name, cfg.timeout)
                         if not cfg.skip_openshift_checks:
                             kube_helper.wait_for_ready_status(
-                                name, cfg.timeout, watch_resource, core_v1
+                                name, cfg.timeout, node_watcher
                             )
                         nodes_started[int(time.time_ns())] = Node(name=name)
                     logging.info("Node with instance ID: %s is in running state" % name)
@@ -525,10 +525,9 @@ def node_stop(
 ) -> typing.Tuple[
     str, typing.Union[NodeScenarioSuccessOutput, NodeScenarioErrorOutput]
 ]:
-    with kube_helper.setup_kubernetes(None) as cli:
+    with kube_helper.setup_kubernetes(None) as cli, NodeWatcher(client.CoreV1Api(cli)) as node_watcher:
         vsphere = vSphere(verify=cfg.verify_session)
         core_v1 = client.CoreV1Api(cli)
-        watch_resource = watch.Watch()
         node_list = kube_helper.get_node_list(cfg, kube_helper.Actions.STOP, core_v1)
         nodes_stopped = {}
         for name in node_list:
@@ -541,7 +540,7 @@ def node_stop(
                         vsphere.wait_until_stopped(name, cfg.timeout)
                         if not cfg.skip_openshift_checks:
                             kube_helper.wait_for_ready_status(
-                                name, cfg.timeout, watch_resource, core_v1
+                                name, cfg.timeout, node_watcher
                             )
                         nodes_stopped[int(time.time_ns())] = Node(name=name)
                     logging.info("Node with instance ID: %s is in stopped state" % name)
@@ -569,10 +568,9 @@ def node_reboot(
 ) -> typing.Tuple[
     str, typing.Union[NodeScenarioSuccessOutput, NodeScenarioErrorOutput]
 ]:
-    with kube_helper.setup_kubernetes(None) as cli:
+    with kube_helper.setup_kubernetes(None) as cli, NodeWatcher(client.CoreV1Api(cli)) as node_watcher:
         vsphere = vSphere(verify=cfg.verify_session)
         core_v1 = client.CoreV1Api(cli)
-        watch_resource = watch.Watch()
         node_list = kube_helper.get_node_list(cfg, kube_helper.Actions.REBOOT, core_v1)
         nodes_rebooted = {}
         for name in node_list:
@@ -583,10 +581,10 @@ def node_reboot(
                     vsphere.reboot_instances(name)
                     if not cfg.skip_openshift_checks:
                         kube_helper.wait_for_unknown_status(
-                            name, cfg.timeout, watch_resource, core_v1
+                            name, cfg.timeout, node_watcher
                         )
                         kube_helper.wait_for_ready_status(
-                            name, cfg.timeout, watch_resource, core_v1
+                            name, cfg.timeout, node_watcher
                         )
                     nodes_rebooted[int(time.time_ns())] = Node(name=name)
                     logging.info(
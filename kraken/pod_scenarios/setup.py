@@ -6,6 +6,7 @@ from kraken.plugins import pod_plugin
 import kraken.cerberus.setup as cerberus
 import kraken.post_actions.actions as post_actions
 import kraken.kubernetes.client as kubecli
+import kraken.signal_state.state as signal_state
 import time
 import yaml
 import sys
@@ -49,7 +50,7 @@ def run(kubeconfig_path, scenarios_list, config, failed_post_scenarios, wait_dur
 
         logging.info("Scenario: %s has been successfully injected!" % (pod_scenario[0]))
         logging.info("Waiting for the specified duration: %s" % (wait_duration))
-        time.sleep(wait_duration)
+        signal_state.wait(wait_duration)
 
         try:
             failed_post_scenarios = post_actions.check_recovery(
@@ -69,6 +70,8 @@ def run(kubeconfig_path, scenarios_list, config, failed_post_scenarios, wait_dur
 
 def container_run(kubeconfig_path, scenarios_list, config, failed_post_scenarios, wait_duration):
     for container_scenario_config in scenarios_list:
+        if signal_state.stopped():
+            break
         if len(container_scenario_config) > 1:
             pre_action_output = post_actions.run(kubeconfig_path, container_scenario_config[1])
         else:
@@ -94,7 +97,7 @@ def container_run(kubeconfig_path, scenarios_list, config, failed_post_scenarios
                     )
 
                 logging.info("Waiting for the specified duration: %s" % (wait_duration))
-                time.sleep(wait_duration)
+                signal_state.wait(wait_duration)
 
                 # capture end time
                 end_time = int(time.time())
@@ -1,16 +1,11 @@
-import kraken.invoke.command as runcommand
+import kraken.kubernetes.client as kubecli
 
 
 # Get prometheus details
 def instance(distribution, prometheus_url, prometheus_bearer_token):
     if distribution == "openshift" and not prometheus_url:
-        url = runcommand.invoke(
-            r"""oc get routes -n openshift-monitoring -o=jsonpath='{.items[?(@.metadata.name=="prometheus-k8s")].spec.host}'"""  # noqa
-        )
+        url = kubecli.get_route_host("prometheus-k8s", "openshift-monitoring")
         prometheus_url = "https://" + url
     if distribution == "openshift" and not prometheus_bearer_token:
-        prometheus_bearer_token = runcommand.invoke(
-            "oc -n openshift-monitoring sa get-token prometheus-k8s "
-            "|| oc create token -n openshift-monitoring prometheus-k8s"
-        )
+        prometheus_bearer_token = kubecli.get_service_account_token("prometheus-k8s", "openshift-monitoring")
     return prometheus_url, prometheus_bearer_token
@@ -0,0 +1,212 @@
+import random
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import kraken.kubernetes.client as kubecli
+
+
+# Fills PVCs from the pods mounting them. The pod, container and mount path of
+# every PVC of a namespace are resolved from a single listing of its pods, and
+# measuring the volume, creating the file and checking it is done by a single
+# script run in one exec per PVC, so that many PVCs can be filled at once.
+
+file_name = "kraken.tmp"
+
+fill_script = """
+set -- $(df -P -k '%(mount_path)s' | sed 1d)
+[ -n "$4" ] || { echo status=df_failed; exit 0; }
+used=$3
+capacity=$(($3 + $4))
+echo used_kb=$used
+echo capacity_kb=$capacity
+size=$(awk -v target=%(target)s -v used=$used -v capacity=$capacity 'BEGIN {
+    if (used * 100 / capacity >= target || target > 99) print 0
+    else printf "%%d", target / 100 * capacity - used
+}')
+echo file_size_kb=$size
+[ "$size" -gt 0 ] || { echo status=invalid_percentage; exit 0; }
+fallocate -l $(($size * 1024)) '%(path)s' || { echo status=fallocate_failed; exit 0; }
+[ -f '%(path)s' ] && echo status=filled || echo status=missing
+"""
+
+remove_script = """
+rm -f '%(path)s'
+[ -e '%(path)s' ] && echo status=present || echo status=removed
+"""
+
+
+@dataclass(frozen=True, order=False)
+class PvcTarget:
+    """Data class to hold the pod, container and mount path a PVC is filled from"""
+    pvc: str
+    namespace: str
+    pod: str
+    container: str
+    volume: str
+    mount_path: str
+
+    @property
+    def path(self):
+        return "%s/%s" % (self.mount_path.rstrip("/"), file_name)
+
+
+@dataclass(order=False)
+class FillResult:
+    """Data class to hold the outcome of the fill of a PVC"""
+    target: PvcTarget
+    status: str
+    used_kb: Optional[int] = None
+    capacity_kb: Optional[int] = None
+    file_size_kb: Optional[int] = None
+
+    @property
+    def filled(self):
+        return self.status == "filled"
+
+
+def index_pvc_mounts(namespace, label_selector=None, field_selector=None):
+    """
+    Lists the pods of the namespace once and returns the PvcTargets of every
+    PVC mounted by a running pod
+
+    Returns:
+        dict of the list of PvcTargets of every PVC, one per pod mounting it,
+        and dict of the PvcTargets of every pod in the order of its volumes
+    """
+
+    by_pvc = {}
+    by_pod = {}
+    for pod in kubecli.iterate_pods(namespace, label_selector, field_selector=field_selector):
+        if pod.status is None or pod.status.phase != "Running":
+            continue
+        claims = dict(
+            (volume.name, volume.persistent_volume_claim.claim_name)
+            for volume in pod.spec.volumes or []
+            if volume.persistent_volume_claim is not None
+        )
+        targets = []
+        for volume, pvc in claims.items():
+            for container in pod.spec.containers:
+                mount = next((mount for mount in container.volume_mounts or [] if mount.name == volume), None)
+                if mount is not None:
+                    targets.append(
+                        PvcTarget(pvc, namespace, pod.metadata.name, container.name, volume, mount.mount_path)
+                    )
+                    break
+        for target in targets:
+            by_pvc.setdefault(target.pvc, []).append(target)
+        by_pod[pod.metadata.name] = targets
+    return by_pvc, by_pod
+
+
+def resolve_targets(namespace, pvc_names=None, pod_name=None, label_selector=None):
+    """
+    Returns the PvcTargets to fill: a random pod mounting each of the given
+    PVCs, the first PVC of the given pod or every PVC mounted by the pods
+    matching the label selector, for example the replicas of a StatefulSet
+
+    Returns:
+        list of PvcTargets, None when a PVC or pod isn't found
+    """
+
+    if pvc_names:
+        by_pvc, by_pod = index_pvc_mounts(namespace)
+    elif pod_name:
+        # Only the given pod is read
+        by_pvc, by_pod = index_pvc_mounts(namespace, field_selector="metadata.name=" + pod_name)
+    else:
+        by_pvc, by_pod = index_pvc_mounts(namespace, label_selector)
+    if pvc_names:
+        targets = []
+        for pvc_name in pvc_names:
+            if not by_pvc.get(pvc_name):
+                logging.error("Pod associated with %s PVC, on namespace %s, not found" % (pvc_name, namespace))
+                return None
+            targets.append(random.choice(by_pvc[pvc_name]))
+        return targets
+    if pod_name:
+        if not by_pod.get(pod_name):
+            logging.error("Pod '%s' in namespace '%s' does not use a pvc or isn't running" % (pod_name, namespace))
+            return None
+        return by_pod[pod_name][:1]
+    targets = dict((targets[0].pvc, targets[0]) for targets in by_pvc.values())
+    if not targets:
+        logging.error("No running pod matching %s mounts a PVC in namespace %s" % (label_selector, namespace))
+        return None
+    return list(targets.values())
+
+
+def parse_output(output):
+    values = {}
+    for line in str(output).splitlines():
+        key, _, value = line.strip().partition("=")
+        if value:
+            values[key] = value
+    return values
+
+
+def to_int(value):
+    return int(value) if value is not None and value.isdigit() else None
+
+
+def fill(target, fill_percentage):
+    """
+    Creates the file filling the PVC up to the fill percentage, the volume
+    is measured, filled and checked in a single exec
+
+    Returns:
+        FillResult of the PVC
+    """
+
+    script = fill_script % {"mount_path": target.mount_path, "path": target.path, "target": float(fill_percentage)}
+    output = kubecli.exec_cmd_in_pod(script, target.pod, target.namespace, target.container, "sh")
+    values = parse_output(output)
+    result = FillResult(
+        target=target,
+        status=values.get("status", "exec_failed"),
+        used_kb=to_int(values.get("used_kb")),
+        capacity_kb=to_int(values.get("capacity_kb")),
+        file_size_kb=to_int(values.get("file_size_kb")),
+    )
+    if result.filled:
+        logging.info(
+            "Filled PVC %s to %s%% from pod %s at %s: used %s KB of %s KB, %s KB file created"
+            % (target.pvc, fill_percentage, target.pod, target.path, result.used_kb, result.capacity_kb,
+               result.file_size_kb)
+        )
+    elif result.status == "invalid_percentage" and result.capacity_kb:
+        logging.error(
+            "Target fill percentage (%s%%) of PVC %s is lower than current fill percentage (%.2f%%) or higher than 99%%"
+            % (fill_percentage, target.pvc, result.used_kb * 100 / result.capacity_kb)
+        )
+    else:
+        logging.error("Failed to fill PVC %s from pod %s: %s %s" % (target.pvc, target.pod, result.status, output))
+    return result
+
+
+def remove(target):
+    """Removes the file from the PVC and checks it is gone in a single exec"""
+    script = remove_script % {"path": target.path}
+    output = kubecli.exec_cmd_in_pod(script, target.pod, target.namespace, target.container, "sh")
+    if parse_output(output).get("status") == "removed":
+        logging.info("Temp file %s of PVC %s successfully removed" % (target.path, target.pvc))
+        return True
+    logging.error("Failed to delete the temp file %s of PVC %s: %s" % (target.path, target.pvc, output))
+    return False
+
+
+def run_parallel(function, targets, max_parallel):
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(targets)))) as executor:
+        return list(executor.map(function, targets))
+
+
+def fill_all(targets: List[PvcTarget], fill_percentage, max_parallel=10) -> Dict[PvcTarget, FillResult]:
+    return dict(zip(targets, run_parallel(lambda target: fill(target, fill_percentage), targets, max_parallel)))
+
+
+def remove_all(targets: List[PvcTarget], max_parallel=10) -> bool:
+    return all(run_parallel(remove, targets, max_parallel))
@@ -1,12 +1,11 @@
 import sys
-import random
 import yaml
 import re
-import json
 import logging
 import time
 import kraken.cerberus.setup as cerberus
-import kraken.kubernetes.client as kubecli
+import kraken.pvc.fill_engine as fill_engine
+import kraken.signal_state.state as signal_state
 
 # Reads the scenario config and creates a temp file to fill up the PVC
 
@@ -14,156 +13,78 @@ import kraken.kubernetes.client as kubecli
 def run(scenarios_list, config):
     failed_post_scenarios = ""
     for app_config in scenarios_list:
+        if signal_state.stopped():
+            break
         if len(app_config) > 1:
             with open(app_config, "r") as f:
                 config_yaml = yaml.full_load(f)
                 scenario_config = config_yaml["pvc_scenario"]
                 pvc_name = scenario_config.get("pvc_name", "")
                 pod_name = scenario_config.get("pod_name", "")
+                label_selector = scenario_config.get("label_selector", "")
                 namespace = scenario_config.get("namespace", "")
                 target_fill_percentage = scenario_config.get("fill_percentage", "50")
                 duration = scenario_config.get("duration", 60)
+                max_parallel = scenario_config.get("max_parallel", 10)
 
                 logging.info(
                     """Input params:
-pvc_name: '%s'\npod_name: '%s'\nnamespace: '%s'\ntarget_fill_percentage: '%s%%'\nduration: '%ss'"""
-                    % (str(pvc_name), str(pod_name), str(namespace), str(target_fill_percentage), str(duration))
+pvc_name: '%s'\npod_name: '%s'\nlabel_selector: '%s'\nnamespace: '%s'
+target_fill_percentage: '%s%%'\nduration: '%ss'"""
+                    % (str(pvc_name), str(pod_name), str(label_selector), str(namespace), str(target_fill_percentage),
+                       str(duration))
                 )
 
                 # Check input params
                 if namespace is None:
                     logging.error("You must specify the namespace where the PVC is")
                     sys.exit(1)
-                if pvc_name is None and pod_name is None:
-                    logging.error("You must specify the pvc_name or the pod_name")
+                if not pvc_name and not pod_name and not label_selector:
+                    logging.error("You must specify the pvc_name, the pod_name or the label_selector")
                     sys.exit(1)
                 if pvc_name and pod_name:
                     logging.info(
-                        "pod_name will be ignored, pod_name used will be a retrieved from the pod used in the pvc_name"
+                        "pod_name '%s' will be overridden with one of the pods mounted in the PVC" % (str(pod_name))
                     )
 
-                # Get pod name
-                if pvc_name:
-                    if pod_name:
-                        logging.info(
-                            "pod_name '%s' will be overridden with one of the pods mounted in the PVC" % (str(pod_name))
-                        )
-                    pvc = kubecli.get_pvc_info(pvc_name, namespace)
-                    try:
-                        pod_name = random.choice(pvc.podNames)
-                        logging.info("Pod name: %s" % pod_name)
-                    except Exception:
-                        logging.error(
-                            "Pod associated with %s PVC, on namespace %s, not found" % (str(pvc_name), str(namespace))
-                        )
-                        sys.exit(1)
-
-                # Get volume name
-                pod = kubecli.get_pod_info(name=pod_name, namespace=namespace)
-                
-                if pod is None:
-                    logging.error("Exiting as pod '%s' doesn't exist in namespace '%s'" % (str(pod_name), str(namespace)))
-                    sys.exit(1)
-                
-                for volume in pod.volumes:
-                    if volume.pvcName is not None:
-                        volume_name = volume.name
-                        pvc_name = volume.pvcName
-                        pvc = kubecli.get_pvc_info(pvc_name, namespace)
-                        break
-                if 'pvc' not in locals():
-                    logging.error(
-                        "Pod '%s' in namespace '%s' does not use a pvc" % (str(pod_name), str(namespace))
-                    )
+                # Get the pod, container and mount path of the PVCs from a single pod listing
+                pvc_names = pvc_name if isinstance(pvc_name, list) else [pvc_name] if pvc_name else []
+                targets = fill_engine.resolve_targets(namespace, pvc_names, pod_name, label_selector)
+                if not targets:
                     sys.exit(1)
-                logging.info("Volume name: %s" % volume_name)
-                logging.info("PVC name: %s" % pvc_name)
-
-                # Get container name and mount path
-                for container in  pod.containers:
-                    for vol in container.volumeMounts:
-                        if vol.name == volume_name:
-                            mount_path = vol.mountPath
-                            container_name = container.name
-                            break
-                logging.info("Container path: %s" % container_name)
-                logging.info("Mount path: %s" % mount_path)
-
-                # Get PVC capacity and used bytes
-                command = "df %s -B 1024 | sed 1d" % (str(mount_path))
-                command_output = (kubecli.exec_cmd_in_pod(command, pod_name, namespace, container_name, "sh")).split()
-                pvc_used_kb = int(command_output[2])
-                pvc_capacity_kb = pvc_used_kb + int(command_output[3])
-                logging.info("PVC used: %s KB" % pvc_used_kb)
-                logging.info("PVC capacity: %s KB" % pvc_capacity_kb)
-
-                # Check valid fill percentage
-                current_fill_percentage = pvc_used_kb / pvc_capacity_kb
-                if not (current_fill_percentage * 100 < float(target_fill_percentage) <= 99):
-                    logging.error(
-                        """
-                        Target fill percentage (%.2f%%) is lower than current fill percentage (%.2f%%)
-                         or higher than 99%%
-                        """
-                        % (target_fill_percentage, current_fill_percentage * 100)
+                for target in targets:
+                    logging.info(
+                        "PVC %s: pod %s, container %s, volume %s, mount path %s"
+                        % (target.pvc, target.pod, target.container, target.volume, target.mount_path)
                     )
-                    sys.exit(1)
-
-                # Calculate file size
-                file_size_kb = int((float(target_fill_percentage / 100) * float(pvc_capacity_kb)) - float(pvc_used_kb))
-                logging.debug("File size: %s KB" % file_size_kb)
-
-                file_name = "kraken.tmp"
-                logging.info(
-                    "Creating %s file, %s KB size, in pod %s at %s (ns %s)"
-                    % (str(file_name), str(file_size_kb), str(pod_name), str(mount_path), str(namespace))
-                )
 
                 start_time = int(time.time())
-                # Create temp file in the PVC
-                full_path = "%s/%s" % (str(mount_path), str(file_name))
-                command = "fallocate -l $((%s*1024)) %s" % (str(file_size_kb), str(full_path))
-                logging.debug("Create temp file in the PVC command:\n %s" % command)
-                kubecli.exec_cmd_in_pod(command, pod_name, namespace, container_name, "sh")
 
-                # Check if file is created
-                command = "ls -lh %s" % (str(mount_path))
-                logging.debug("Check file is created command:\n %s" % command)
-                response = kubecli.exec_cmd_in_pod(command, pod_name, namespace, container_name, "sh")
-                logging.info("\n" + str(response))
-                if str(file_name).lower() in str(response).lower():
-                    logging.info("%s file successfully created" % (str(full_path)))
-                else:
-                    logging.error("Failed to create tmp file with %s size" % (str(file_size_kb)))
-                    remove_temp_file(file_name, full_path, pod_name, namespace, container_name, mount_path, file_size_kb)
+                def cleanup():
+                    fill_engine.remove_all(targets, max_parallel)
+
+                # Measure, fill and check every PVC in one exec, the PVCs concurrently
+                signal_state.add_cleanup_hook(cleanup)
+                results = fill_engine.fill_all(targets, target_fill_percentage, max_parallel)
+                if not all(result.filled for result in results.values()):
+                    logging.error("Failed to fill the PVCs up to %s%%" % (str(target_fill_percentage)))
+                    signal_state.remove_cleanup_hook(cleanup)
+                    cleanup()
                     sys.exit(1)
 
                 # Wait for the specified duration
                 logging.info("Waiting for the specified duration in the config: %ss" % (duration))
-                time.sleep(duration)
+                signal_state.wait(duration)
                 logging.info("Finish waiting")
 
-                remove_temp_file(file_name, full_path, pod_name, namespace, container_name, mount_path, file_size_kb)
+                signal_state.remove_cleanup_hook(cleanup)
+                if not fill_engine.remove_all(targets, max_parallel):
+                    sys.exit(1)
 
                 end_time = int(time.time())
                 cerberus.publish_kraken_status(config, failed_post_scenarios, start_time, end_time)
 
 
-def remove_temp_file(file_name, full_path, pod_name, namespace, container_name, mount_path, file_size_kb):
-    command = "rm -f %s" % (str(full_path))
-    logging.debug("Remove temp file from the PVC command:\n %s" % command)
-    kubecli.exec_cmd_in_pod(command, pod_name, namespace, container_name, "sh")
-    command = "ls -lh %s" % (str(mount_path))
-    logging.debug("Check temp file is removed command:\n %s" % command)
-    response = kubecli.exec_cmd_in_pod(command, pod_name, namespace, container_name, "sh")
-    logging.info("\n" + str(response))
-    if not (str(file_name).lower() in str(response).lower()):
-        logging.info("Temp file successfully removed")
-    else:
-        logging.error("Failed to delete tmp file with %s size" % (str(file_size_kb)))
-        sys.exit(1)
-
-
 def toKbytes(value):
     if not re.match("^[0-9]+[K|M|G|T]i$", value):
         logging.error("PVC capacity %s does not match expression regexp '^[0-9]+[K|M|G|T]i$'")
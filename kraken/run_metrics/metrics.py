@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+import kraken.signal_state.state as signal_state
+
+
+# Run progress, scenario timings and Kubernetes API call counters exposed in
+# the Prometheus text format on the /metrics endpoint of the status server
+lock = threading.Lock()
+start_time = time.time()
+iteration = 0
+iterations = 0
+scenarios_running = 0
+scenario_results = {}
+scenario_durations = {}
+last_scenario_durations = {}
+api_calls = {}
+cluster_recoveries = {}
+last_cluster_recovery = None
+
+# Matches the api prefix of a Kubernetes API path, /api/v1 or /apis/<group>/<version>
+api_prefix_regex = re.compile(r"^/(api/[^/]+|apis/[^/]+/[^/]+)/?")
+
+
+def set_iteration(current, total):
+    global iteration, iterations
+    with lock:
+        iteration = current
+        iterations = total
+
+
+def scenario_started(scenario_type):
+    global scenarios_running
+    with lock:
+        scenarios_running += 1
+
+
+def scenario_finished(scenario_type, status, duration):
+    global scenarios_running
+    with lock:
+        scenarios_running -= 1
+        key = (scenario_type, status)
+        scenario_results[key] = scenario_results.get(key, 0) + 1
+        scenario_durations[scenario_type] = scenario_durations.get(scenario_type, 0.0) + duration
+        last_scenario_durations[scenario_type] = duration
+
+
+def cluster_recovered(duration, healthy):
+    global last_cluster_recovery
+    with lock:
+        status = "recovered" if healthy else "timed_out"
+        cluster_recoveries[status] = cluster_recoveries.get(status, 0) + 1
+        if healthy:
+            last_cluster_recovery = duration
+
+
+def api_resource(url):
+    """
+    Returns the resource a Kubernetes API URL refers to, for example pods for
+    /api/v1/namespaces/default/pods/etcd-0
+    """
+
+    path = re.sub(r"^[a-z]+://[^/]+", "", url).split("?")[0]
+    match = api_prefix_regex.match(path)
+    if not match:
+        return "other"
+    segments = [segment for segment in path[match.end():].split("/") if segment]
+    if len(segments) > 2 and segments[0] == "namespaces":
+        segments = segments[2:]
+    return segments[0] if segments else "discovery"
+
+
+def count_api_call(method, url):
+    key = (method.upper(), api_resource(url))
+    with lock:
+        api_calls[key] = api_calls.get(key, 0) + 1
+
+
+def count_api_calls(api_client):
+    """
+    Counts every request sent through the given kubernetes ApiClient and
+    returns it
+    """
+
+    request = api_client.rest_client.request
+
+    def counted_request(method, url, *args, **kwargs):
+        count_api_call(method, url)
+        return request(method, url, *args, **kwargs)
+
+    api_client.rest_client.request = counted_request
+    return api_client
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render():
+    """
+    Returns the metrics in the Prometheus text exposition format
+    """
+
+    lines = []
+
+    def metric(name, metric_type, description, samples):
+        lines.append("# HELP %s %s" % (name, description))
+        lines.append("# TYPE %s %s" % (name, metric_type))
+        for labels, value in samples:
+            if value == float("inf"):
+                value = "+Inf"
+            if labels:
+                label_text = ",".join('%s="%s"' % (label, escape_label_value(text)) for label, text in labels)
+                lines.append("%s{%s} %s" % (name, label_text, value))
+            else:
+                lines.append("%s %s" % (name, value))
+
+    with lock:
+        current_state = signal_state.get_state()
+        metric(
+            "kraken_signal_state", "gauge", "Current kraken signal",
+            [
+                ((("state", s),), 1 if s == current_state else 0)
+                for s in (signal_state.RUN, signal_state.PAUSE, signal_state.STOP)
+            ]
+        )
+        metric(
+            "kraken_uptime_seconds", "gauge", "Seconds since kraken started",
+            [((), round(time.time() - start_time, 3))]
+        )
+        metric("kraken_iteration", "gauge", "Iteration being run", [((), iteration)])
+        metric("kraken_iterations", "gauge", "Number of iterations to run, +Inf in daemon mode", [((), iterations)])
+        metric("kraken_scenarios_running", "gauge", "Number of scenarios running", [((), scenarios_running)])
+        metric(
+            "kraken_scenarios_total", "counter", "Number of finished scenarios by type and status",
+            [((("type", key[0]), ("status", key[1])), value) for key, value in sorted(scenario_results.items())]
+        )
+        metric(
+            "kraken_scenario_seconds_total", "counter", "Total time spent running scenarios by type",
+            [((("type", key),), round(value, 3)) for key, value in sorted(scenario_durations.items())]
+        )
+        metric(
+            "kraken_scenario_last_duration_seconds", "gauge", "Duration of the last scenario run by type",
+            [((("type", key),), round(value, 3)) for key, value in sorted(last_scenario_durations.items())]
+        )
+        metric(
+            "kraken_cluster_recoveries_total", "counter",
+            "Number of cluster restarts by whether the cluster was healthy again in time",
+            [((("status", key),), value) for key, value in sorted(cluster_recoveries.items())]
+        )
+        if last_cluster_recovery is not None:
+            metric(
+                "kraken_cluster_recovery_seconds", "gauge",
+                "Seconds from the restart of the nodes until the cluster was healthy, last cluster shut down",
+                [((), round(last_cluster_recovery, 3))]
+            )
+        metric(
+            "kraken_kubernetes_api_calls_total", "counter", "Number of Kubernetes API requests by method and resource",
+            [((("method", key[0]), ("resource", key[1])), value) for key, value in sorted(api_calls.items())]
+        )
+    return "\n".join(lines) + "\n"
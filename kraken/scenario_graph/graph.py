@@ -0,0 +1,173 @@
+import sys
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+# Validates the scenario groups: names must be unique, dependencies must exist
+# and must not form a cycle. Returns the groups in a dependency order
+def validate(groups):
+    groups_by_name = {}
+    for group in groups:
+        name = group.get("name")
+        if not name:
+            logging.error("Every scenario group needs a name: %s" % group)
+            sys.exit(1)
+        if name in groups_by_name:
+            logging.error("Duplicate scenario group name: %s" % name)
+            sys.exit(1)
+        groups_by_name[name] = group
+    for group in groups:
+        for dependency in group.get("depends_on", []):
+            if dependency not in groups_by_name:
+                logging.error("Scenario group %s depends on an unknown group %s" % (group["name"], dependency))
+                sys.exit(1)
+
+    ordered = []
+    visiting = set()
+    visited = set()
+
+    def visit(name, path):
+        if name in visited:
+            return
+        if name in visiting:
+            logging.error("Scenario groups have a dependency cycle: %s" % " -> ".join(path + [name]))
+            sys.exit(1)
+        visiting.add(name)
+        for dependency in groups_by_name[name].get("depends_on", []):
+            visit(dependency, path + [name])
+        visiting.discard(name)
+        visited.add(name)
+        ordered.append(groups_by_name[name])
+
+    for group in groups:
+        visit(group["name"], [])
+    return ordered
+
+
+# Splits the chaos_scenarios style entries of a group into single scenarios
+def group_tasks(group):
+    tasks = []
+    for scenario in group.get("scenarios", []):
+        for scenario_type, scenarios_list in scenario.items():
+            for scenario_config in scenarios_list or []:
+                tasks.append((scenario_type, scenario_config))
+    return tasks
+
+
+def run(groups, run_scenario, max_concurrency=4, should_stop=None):
+    """
+    Runs scenario groups on a worker pool. A group starts once all the groups
+    it depends on have finished, up to its concurrency scenarios of a group run
+    at the same time (1 runs them in order) and at most max_concurrency
+    scenarios run overall. Groups depending on a failed group are skipped.
+
+    Args:
+        groups (list)
+            - Scenario groups with a name, the scenarios in the chaos_scenarios
+              format and optionally concurrency and depends_on
+
+        run_scenario (function)
+            - Called as run_scenario(scenario_type, [scenario_config]) for
+              every scenario, a raised exception or sys.exit marks it failed
+
+        max_concurrency (int)
+            - Maximum number of scenarios running at the same time
+
+        should_stop (function)
+            - Checked before a scenario is started, no new scenarios are
+              started once it returns True
+
+    Returns:
+        List of per scenario results with the group, type, config, status
+        (passed, failed or skipped), duration in seconds and the value
+        returned by run_scenario
+    """
+
+    ordered = validate(groups)
+    pending = {group["name"]: group_tasks(group) for group in ordered}
+    running = {group["name"]: 0 for group in ordered}
+    failed = set()
+    finished = set()
+    results = []
+    futures = {}
+    stopped = False
+
+    def skip(group_name, reason):
+        for scenario_type, scenario_config in pending[group_name]:
+            logging.info("Skipping %s scenario %s: %s" % (scenario_type, scenario_config, reason))
+            results.append({
+                "group": group_name,
+                "type": scenario_type,
+                "scenario": scenario_config,
+                "status": "skipped",
+                "duration": 0,
+                "output": None,
+            })
+        pending[group_name] = []
+
+    def timed_run(scenario_type, scenario_config):
+        start_time = time.time()
+        try:
+            return run_scenario(scenario_type, [scenario_config]), time.time() - start_time
+        except BaseException as e:
+            e.duration = time.time() - start_time
+            raise
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            for group in ordered:
+                name = group["name"]
+                if name in finished:
+                    continue
+                dependencies = group.get("depends_on", [])
+                if not all(dependency in finished for dependency in dependencies):
+                    continue
+                failed_dependencies = [dependency for dependency in dependencies if dependency in failed]
+                if failed_dependencies:
+                    skip(name, "depends on failed group(s) %s" % ", ".join(failed_dependencies))
+                    failed.add(name)
+                if stopped:
+                    skip(name, "the run has been stopped")
+                while pending[name] and running[name] < group.get("concurrency", 1) and len(futures) < max_concurrency:
+                    if should_stop is not None and should_stop():
+                        logging.info("Received STOP signal; not starting any more scenarios")
+                        stopped = True
+                        skip(name, "the run has been stopped")
+                        break
+                    scenario_type, scenario_config = pending[name].pop(0)
+                    logging.info("Starting %s scenario %s of group %s" % (scenario_type, scenario_config, name))
+                    future = executor.submit(timed_run, scenario_type, scenario_config)
+                    futures[future] = (name, scenario_type, scenario_config)
+                    running[name] += 1
+                if not pending[name] and running[name] == 0:
+                    finished.add(name)
+
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, scenario_type, scenario_config = futures.pop(future)
+                running[name] -= 1
+                result = {
+                    "group": name,
+                    "type": scenario_type,
+                    "scenario": scenario_config,
+                    "status": "passed",
+                    "output": None,
+                }
+                try:
+                    result["output"], result["duration"] = future.result()
+                except BaseException as e:
+                    logging.error("%s scenario %s of group %s failed: %s" % (scenario_type, scenario_config, name, e))
+                    result["status"] = "failed"
+                    result["duration"] = getattr(e, "duration", 0)
+                    failed.add(name)
+                results.append(result)
+
+    for result in results:
+        logging.info(
+            "Scenario %s (%s, group %s): %s in %.1f seconds"
+            % (result["scenario"], result["type"], result["group"], result["status"], result["duration"])
+        )
+    return results
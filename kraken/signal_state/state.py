@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+
+
+RUN = "RUN"
+PAUSE = "PAUSE"
+STOP = "STOP"
+
+# Current kraken signal, set by the status server and read by the run loop
+# and the scenarios. Waiters are woken up on every change.
+state = RUN
+# Incremented on every change so that watchers can tell whether they missed one
+version = 0
+condition = threading.Condition()
+# Set while the signal is STOP, for the code waiting on an Event such as the
+# cancel of the commands run with kraken.invoke.command.execute
+stop_event = threading.Event()
+cleanup_hooks = []
+
+
+def set_state(new_state):
+    global state, version
+    new_state = str(new_state).strip().upper()
+    if new_state not in (RUN, PAUSE, STOP):
+        logging.error("Ignoring unknown kraken signal %s" % new_state)
+        return
+    with condition:
+        if state != new_state:
+            logging.info("Kraken signal changed from %s to %s" % (state, new_state))
+            state = new_state
+            version += 1
+            if state == STOP:
+                stop_event.set()
+            else:
+                stop_event.clear()
+            condition.notify_all()
+
+
+def get_state():
+    return state
+
+
+def wait_for_change(known_version, timeout):
+    """
+    Waits up to timeout seconds for the signal to change after known_version
+
+    Returns:
+        A tuple of the current signal and its version
+    """
+
+    with condition:
+        condition.wait_for(lambda: version != known_version, timeout)
+        return state, version
+
+
+def stopped():
+    return state == STOP
+
+
+def wait(seconds):
+    """
+    Sleeps for the given number of seconds, returning right away once the
+    STOP signal is received so that the scenario can clean up and end. The
+    wait holds while the signal is PAUSE, the time spent paused isn't
+    counted in the seconds.
+
+    Returns:
+        True if the whole duration elapsed, False if the wait was cut short
+    """
+
+    remaining = float(seconds)
+    with condition:
+        while state != STOP:
+            if state == PAUSE:
+                logging.info("Pausing Kraken run, waiting for the RUN or STOP signal")
+                while state == PAUSE:
+                    condition.wait()
+                continue
+            if remaining <= 0:
+                return True
+            start_time = time.monotonic()
+            condition.wait(remaining)
+            remaining -= time.monotonic() - start_time
+    logging.info("Received STOP signal, ending the wait early")
+    return False
+
+
+def wait_while_paused():
+    """
+    Blocks while the signal is PAUSE
+
+    Returns:
+        The signal that ended the pause, RUN or STOP
+    """
+
+    with condition:
+        if state == PAUSE:
+            logging.info("Pausing Kraken run, waiting for the RUN or STOP signal")
+        while state == PAUSE:
+            condition.wait()
+        return state
+
+
+def add_cleanup_hook(hook):
+    """
+    Registers a function undoing an injected failure. The scenario removes it
+    once it cleaned up itself, hooks which are still registered when kraken
+    exits early are run by run_cleanup_hooks.
+    """
+
+    with condition:
+        cleanup_hooks.append(hook)
+
+
+def remove_cleanup_hook(hook):
+    with condition:
+        if hook in cleanup_hooks:
+            cleanup_hooks.remove(hook)
+
+
+def run_cleanup_hooks():
+    """
+    Runs the registered cleanup hooks in the reverse order of registration
+    """
+
+    while True:
+        with condition:
+            if not cleanup_hooks:
+                return
+            hook = cleanup_hooks.pop()
+        try:
+            logging.info("Running cleanup hook %s" % getattr(hook, "__name__", hook))
+            hook()
+        except Exception as e:
+            logging.error("Cleanup hook failed: %s" % e)
@@ -0,0 +1,105 @@
+import os
+import re
+import yaml
+import threading
+from jinja2 import Environment, FileSystemLoader
+
+
+# Process wide registry of the manifest templates. Every template is compiled
+# once per process and rendered straight to the Python objects of the
+# manifest: the YAML of the template is parsed a single time with the
+# {{ param }} expressions replaced by placeholders, and a render substitutes
+# the values in a copy of the parsed objects instead of rendering text and
+# parsing it again. Templates using other Jinja constructs are rendered with
+# their compiled Jinja template and parsed on every render.
+
+expression = re.compile(r"{{\s*(\w+)\s*}}")
+placeholder = re.compile(r"__kraken_param_(\w+)__")
+
+lock = threading.Lock()
+environments = {}
+templates = {}
+
+
+class ManifestTemplate:
+    """
+    Manifest template compiled once, see render
+    """
+
+    def __init__(self, jinja_template, source):
+        self.jinja_template = jinja_template
+        self.manifest = None
+        if "{%" not in source and "{#" not in source and source.count("{{") == len(expression.findall(source)):
+            self.manifest = yaml.safe_load(expression.sub(r"__kraken_param_\1__", source))
+
+    def render_text(self, **params):
+        return self.jinja_template.render(**params)
+
+    def render(self, **params):
+        """
+        Returns the objects of the manifest rendered with the given params
+        """
+
+        if self.manifest is None:
+            return yaml.safe_load(self.jinja_template.render(**params))
+        return substitute(self.manifest, params)
+
+
+def substitute(value, params):
+    if isinstance(value, dict):
+        return dict((substitute(key, params), substitute(item, params)) for key, item in value.items())
+    if isinstance(value, list):
+        return [substitute(item, params) for item in value]
+    if isinstance(value, str) and "__kraken_param_" in value:
+        match = placeholder.fullmatch(value)
+        if match:
+            # A whole value keeps the type of the param
+            return params.get(match.group(1))
+        return placeholder.sub(lambda match: str(params.get(match.group(1), "")), value)
+    return value
+
+
+def get_environment(directory):
+    environment = environments.get(directory)
+    if environment is None:
+        environment = Environment(loader=FileSystemLoader(directory))
+        environments[directory] = environment
+    return environment
+
+
+def get_template(directory, name):
+    """
+    Returns the ManifestTemplate of a template file, compiled on the first call
+
+    Args:
+        directory: directory of the template, usually
+            os.path.dirname(__file__) of the module using it
+        name: file name of the template
+    """
+
+    key = (os.path.abspath(directory), name)
+    with lock:
+        template = templates.get(key)
+        if template is None:
+            environment = get_environment(key[0])
+            source = environment.loader.get_source(environment, name)[0]
+            template = ManifestTemplate(environment.get_template(name), source)
+            templates[key] = template
+        return template
+
+
+def from_string(source):
+    """
+    Returns the ManifestTemplate of a template source, compiled on the first call
+    """
+
+    with lock:
+        template = templates.get(source)
+        if template is None:
+            template = ManifestTemplate(Environment().from_string(source), source)
+            templates[source] = template
+        return template
+
+
+def render(directory, name, /, **params):
+    return get_template(directory, name).render(**params)
@@ -1,11 +1,12 @@
 import datetime
 import time
 import logging
-import kraken.invoke.command as runcommand
 import kraken.kubernetes.client as kubecli
+import kraken.node_agent.agent as node_agent
 import re
 import sys
 import kraken.cerberus.setup as cerberus
+import kraken.signal_state.state as signal_state
 import yaml
 import random
 
@@ -26,7 +27,7 @@ def pod_exec(pod_name, command, namespace, container_name):
 
 
 def node_debug(node_name, command):
-    response = runcommand.invoke("oc debug node/" + node_name + " -- chroot /host " + command)
+    response = node_agent.node_command(node_name, command)
     return response
 
 
@@ -58,8 +59,8 @@ def skew_time(scenario):
         elif "label_selector" in scenario.keys() and scenario["label_selector"]:
             node_names = kubecli.list_nodes(scenario["label_selector"])
 
+        node_agent.node_commands(node_names, skew_command)
         for node in node_names:
-            node_debug(node, skew_command)
             logging.info("Reset date/time on node " + str(node))
         return "node", node_names
 
@@ -197,6 +198,8 @@ def check_date_time(object_type, names):
 
 def run(scenarios_list, config, wait_duration):
     for time_scenario_config in scenarios_list:
+        if signal_state.stopped():
+            break
         with open(time_scenario_config, "r") as f:
             scenario_config = yaml.full_load(f)
             for time_scenario in scenario_config["time_scenarios"]:
@@ -206,6 +209,6 @@ def run(scenarios_list, config, wait_duration):
                 if len(not_reset) > 0:
                     logging.info("Object times were not reset")
                 logging.info("Waiting for the specified duration: %s" % (wait_duration))
-                time.sleep(wait_duration)
+                signal_state.wait(wait_duration)
                 end_time = int(time.time())
                 cerberus.publish_kraken_status(config, not_reset, start_time, end_time)
@@ -2,14 +2,17 @@ import yaml
 import sys
 import logging
 import time
-from kraken.node_actions.aws_node_scenarios import AWS
+import kraken.node_actions.providers as providers
 import kraken.cerberus.setup as cerberus
+import kraken.signal_state.state as signal_state
 
 
 # filters the subnet of interest and applies the network acl to create zone outage
 def run(scenarios_list, config, wait_duration):
     failed_post_scenarios = ""
     for zone_outage_config in scenarios_list:
+        if signal_state.stopped():
+            break
         if len(zone_outage_config) > 1:
             with open(zone_outage_config, "r") as f:
                 zone_outage_config_yaml = yaml.full_load(f)
@@ -22,7 +25,7 @@ def run(scenarios_list, config, wait_duration):
                 acl_ids_created = []
 
                 if cloud_type.lower() == "aws":
-                    cloud_object = AWS()
+                    cloud_object = providers.get_cloud_class("aws")()
                 else:
                     logging.error("Cloud type " + cloud_type + " is not currently supported for zone outage scenarios")
                     sys.exit(1)
@@ -49,22 +52,28 @@ def run(scenarios_list, config, wait_duration):
                     ids[new_association_id] = original_acl_id
                     acl_ids_created.append(acl_id)
 
+                def restore_network_acls():
+                    # replace the applied acl with the previous acl in use
+                    for new_association_id, original_acl_id in ids.items():
+                        cloud_object.replace_network_acl_association(new_association_id, original_acl_id)
+                    logging.info("Wating for 60 seconds to make sure the changes are in place")
+                    time.sleep(60)
+
+                    # delete the network acl created for the run
+                    for acl_id in acl_ids_created:
+                        cloud_object.delete_network_acl(acl_id)
+
+                signal_state.add_cleanup_hook(restore_network_acls)
+
                 # wait for the specified duration
                 logging.info("Waiting for the specified duration in the config: %s" % (duration))
-                time.sleep(duration)
-
-                # replace the applied acl with the previous acl in use
-                for new_association_id, original_acl_id in ids.items():
-                    cloud_object.replace_network_acl_association(new_association_id, original_acl_id)
-                logging.info("Wating for 60 seconds to make sure the changes are in place")
-                time.sleep(60)
+                signal_state.wait(duration)
 
-                # delete the network acl created for the run
-                for acl_id in acl_ids_created:
-                    cloud_object.delete_network_acl(acl_id)
+                restore_network_acls()
+                signal_state.remove_cleanup_hook(restore_network_acls)
 
                 logging.info("End of scenario. Waiting for the specified duration: %s" % (wait_duration))
-                time.sleep(wait_duration)
+                signal_state.wait(wait_duration)
 
                 end_time = int(time.time())
                 cerberus.publish_kraken_status(config, failed_post_scenarios, start_time, end_time)
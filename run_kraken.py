@@ -2,6 +2,7 @@
 
 import os
 import sys
+import atexit
 import yaml
 import logging
 import optparse
@@ -9,6 +10,7 @@ import pyfiglet
 import uuid
 import time
 import kraken.kubernetes.client as kubecli
+import kraken.invoke.command as runcommand
 import kraken.litmus.common_litmus as common_litmus
 import kraken.time_actions.common_time_functions as time_actions
 import kraken.performance_dashboards.setup as performance_dashboards
@@ -16,18 +18,131 @@ import kraken.pod_scenarios.setup as pod_scenarios
 import kraken.namespace_actions.common_namespace_functions as namespace_actions
 import kraken.shut_down.common_shut_down_func as shut_down
 import kraken.node_actions.run as nodeaction
+import kraken.node_actions.instance_index as instance_index
+import kraken.node_agent.agent as node_agent
 import kraken.kube_burner.client as kube_burner
 import kraken.zone_outage.actions as zone_outages
 import kraken.application_outage.actions as application_outage
 import kraken.pvc.pvc_scenario as pvc_scenario
 import kraken.network_chaos.actions as network_chaos
+import kraken.scenario_graph.graph as scenario_graph
+import kraken.signal_state.state as signal_state
+import kraken.run_metrics.metrics as run_metrics
 import server as server
 from kraken import plugins
 
 
-def publish_kraken_status(status):
-    with open("/tmp/kraken_status", "w+") as file:
-        file.write(str(status))
+# Namespace of the litmus operator and whether this run installed it, the
+# litmus scenarios can run from any scenario group so the state lives here
+litmus_namespace = "litmus"
+litmus_installed = False
+
+
+# Inject the chaos scenarios of a single type, recording the run in the metrics
+def run_scenario(scenario_type, scenarios_list, config, failed_post_scenarios):
+    start_time = time.time()
+    failed_before = len(failed_post_scenarios)
+    status = "failed"
+    run_metrics.scenario_started(scenario_type)
+    try:
+        failed_post_scenarios = inject_scenario(scenario_type, scenarios_list, config, failed_post_scenarios)
+        if not failed_post_scenarios or len(failed_post_scenarios) <= failed_before:
+            status = "passed"
+    finally:
+        run_metrics.scenario_finished(scenario_type, status, time.time() - start_time)
+    return failed_post_scenarios
+
+
+def inject_scenario(scenario_type, scenarios_list, config, failed_post_scenarios):
+    global litmus_installed
+    distribution = config["kraken"].get("distribution", "openshift")
+    litmus_install = config["kraken"].get("litmus_install", True)
+    litmus_version = config["kraken"].get("litmus_version", "v1.9.1")
+    litmus_uninstall = config["kraken"].get("litmus_uninstall", False)
+    litmus_uninstall_before_run = config["kraken"].get("litmus_uninstall_before_run", True)
+
+    # Inject pod chaos scenarios specified in the config
+    if scenario_type == "pod_scenarios":
+        logging.error("Pod scenarios have been removed, please use plugin_scenarios with the "
+                      "kill-pods configuration instead.")
+        sys.exit(1)
+    elif scenario_type == "plugin_scenarios":
+        failed_post_scenarios = plugins.run(scenarios_list, kubeconfig_path, failed_post_scenarios)
+    elif scenario_type == "container_scenarios":
+        logging.info("Running container scenarios")
+        failed_post_scenarios = pod_scenarios.container_run(
+            kubeconfig_path, scenarios_list, config, failed_post_scenarios, wait_duration
+        )
+
+    # Inject node chaos scenarios specified in the config
+    elif scenario_type == "node_scenarios":
+        logging.info("Running node scenarios")
+        nodeaction.run(scenarios_list, config, wait_duration)
+
+    # Inject time skew chaos scenarios specified in the config
+    elif scenario_type == "time_scenarios":
+        if distribution == "openshift":
+            logging.info("Running time skew scenarios")
+            time_actions.run(scenarios_list, config, wait_duration)
+        else:
+            logging.error("Litmus scenarios are currently supported only on openshift")
+            sys.exit(1)
+
+    # Inject litmus based chaos scenarios
+    elif scenario_type == "litmus_scenarios":
+        if distribution == "openshift":
+            logging.info("Running litmus scenarios")
+            if litmus_install:
+                # Remove Litmus resources before running the scenarios
+                common_litmus.delete_chaos(litmus_namespace)
+                common_litmus.delete_chaos_experiments(litmus_namespace)
+                if litmus_uninstall_before_run:
+                    common_litmus.uninstall_litmus(litmus_version, litmus_namespace)
+                common_litmus.install_litmus(litmus_version, litmus_namespace)
+                litmus_installed = True
+                common_litmus.deploy_all_experiments(litmus_version, litmus_namespace)
+            common_litmus.run(
+                scenarios_list,
+                config,
+                litmus_uninstall,
+                wait_duration,
+                litmus_namespace,
+            )
+        else:
+            logging.error("Litmus scenarios are currently only supported on openshift")
+            sys.exit(1)
+
+    # Inject cluster shutdown scenarios
+    elif scenario_type == "cluster_shut_down_scenarios":
+        shut_down.run(scenarios_list, config, wait_duration)
+
+    # Inject namespace chaos scenarios
+    elif scenario_type == "namespace_scenarios":
+        logging.info("Running namespace scenarios")
+        namespace_actions.run(
+            scenarios_list, config, wait_duration, failed_post_scenarios, kubeconfig_path
+        )
+
+    # Inject zone failures
+    elif scenario_type == "zone_outages":
+        logging.info("Inject zone outages")
+        zone_outages.run(scenarios_list, config, wait_duration)
+
+    # Application outages
+    elif scenario_type == "application_outages":
+        logging.info("Injecting application outage")
+        application_outage.run(scenarios_list, config, wait_duration)
+
+    # PVC scenarios
+    elif scenario_type == "pvc_scenarios":
+        logging.info("Running PVC scenario")
+        pvc_scenario.run(scenarios_list, config)
+
+    # Network scenarios
+    elif scenario_type == "network_chaos":
+        logging.info("Running Network Chaos")
+        network_chaos.run(scenarios_list, config, wait_duration)
+    return failed_post_scenarios
 
 
 # Main function
@@ -47,10 +162,12 @@ def main(cfg):
         publish_running_status = config["kraken"].get("publish_kraken_status", False)
         port = config["kraken"].get("port", "8081")
         run_signal = config["kraken"].get("signal_state", "RUN")
-        litmus_install = config["kraken"].get("litmus_install", True)
         litmus_version = config["kraken"].get("litmus_version", "v1.9.1")
         litmus_uninstall = config["kraken"].get("litmus_uninstall", False)
-        litmus_uninstall_before_run = config["kraken"].get("litmus_uninstall_before_run", True)
+        scenario_groups = config["kraken"].get("scenario_groups", [])
+        scenario_max_concurrency = config["kraken"].get("scenario_max_concurrency", 4)
+        informer_cache = config["kraken"].get("informer_cache", False)
+        informer_resync_period = config["kraken"].get("informer_resync_period", 300)
         wait_duration = config["tunings"].get("wait_duration", 60)
         iterations = config["tunings"].get("iterations", 1)
         daemon_mode = config["tunings"].get("daemon_mode", False)
@@ -78,6 +195,17 @@ def main(cfg):
         logging.info("Initializing client to talk to the Kubernetes cluster")
         os.environ["KUBECONFIG"] = str(kubeconfig_path)
         kubecli.initialize_clients(kubeconfig_path)
+        kubecli.list_page_size = config["kraken"].get("list_page_size", 500)
+        instance_index.set_ttl(config["kraken"].get("cloud_instance_cache_ttl", 300))
+        node_agent.configure(
+            config["kraken"].get("node_agent", False),
+            config["kraken"].get("node_agent_namespace", "default"),
+            config["kraken"].get("node_agent_image", "docker.io/fedora/tools"),
+        )
+
+        # Serve pod, node and namespace lookups from a list+watch cache
+        if informer_cache:
+            kubecli.start_informers(informer_resync_period)
 
         # find node kraken might be running on
         kubecli.find_kraken_node()
@@ -94,7 +222,14 @@ def main(cfg):
             port = address[1]
             logging.info("Publishing kraken status at http://%s:%s" % (server_address, port))
             server.start_server(address)
-            publish_kraken_status(run_signal)
+            signal_state.set_state(run_signal)
+
+        # Undo the failures of scenarios which didn't get to clean up after
+        # themselves when kraken exits
+        atexit.register(signal_state.run_cleanup_hooks)
+        # Kill the commands still running when kraken exits, registered last
+        # so that it runs before the cleanup hooks
+        atexit.register(runcommand.cancel_all)
 
         # Cluster info
         logging.info("Fetching cluster info")
@@ -135,109 +270,50 @@ def main(cfg):
         # Capture the start time
         start_time = int(time.time())
 
+        # Scenarios run from the scenario groups get a post scenario list of
+        # their own, the failing ones are collected here
+        def run_group_scenario(scenario_type, scenarios_list):
+            failed = run_scenario(scenario_type, scenarios_list, config, [])
+            if failed:
+                failed_post_scenarios.extend(failed)
+                raise Exception("Post scenarios are failing: %s" % failed)
+
+        # No new scenario group scenarios are started after a STOP signal and
+        # none while kraken is paused
+        def scenario_groups_stopped():
+            if publish_running_status:
+                return signal_state.wait_while_paused() == signal_state.STOP
+            return run_signal == "STOP"
+
         # Loop to run the chaos starts here
         while int(iteration) < iterations and run_signal != "STOP":
             # Inject chaos scenarios specified in the config
             logging.info("Executing scenarios for iteration " + str(iteration))
-            if chaos_scenarios:
+            run_metrics.set_iteration(iteration, iterations)
+            if scenario_groups:
+                scenario_graph.run(
+                    scenario_groups,
+                    run_group_scenario,
+                    scenario_max_concurrency,
+                    scenario_groups_stopped
+                )
+                if publish_running_status:
+                    run_signal = signal_state.get_state()
+            elif chaos_scenarios:
                 for scenario in chaos_scenarios:
+                    # The signal is set in-process by the status server, a
+                    # PAUSE blocks here until RUN or STOP is posted
                     if publish_running_status:
-                        run_signal = server.get_status(address)
-                    if run_signal == "PAUSE":
-                        while publish_running_status and run_signal == "PAUSE":
-                            logging.info(
-                                "Pausing Kraken run, waiting for %s seconds and will re-poll signal"
-                                % str(wait_duration)
-                            )
-                            time.sleep(wait_duration)
-                            run_signal = server.get_status(address)
+                        run_signal = signal_state.wait_while_paused()
                     if run_signal == "STOP":
                         logging.info("Received STOP signal; ending Kraken run")
                         break
                     scenario_type = list(scenario.keys())[0]
                     scenarios_list = scenario[scenario_type]
                     if scenarios_list:
-                        # Inject pod chaos scenarios specified in the config
-                        if scenario_type == "pod_scenarios":
-                            logging.error("Pod scenarios have been removed, please use plugin_scenarios with the "
-                                          "kill-pods configuration instead.")
-                            sys.exit(1)
-                        elif scenario_type == "plugin_scenarios":
-                            failed_post_scenarios = plugins.run(scenarios_list, kubeconfig_path, failed_post_scenarios)
-                        elif scenario_type == "container_scenarios":
-                            logging.info("Running container scenarios")
-                            failed_post_scenarios = pod_scenarios.container_run(
-                                kubeconfig_path, scenarios_list, config, failed_post_scenarios, wait_duration
-                            )
-
-                        # Inject node chaos scenarios specified in the config
-                        elif scenario_type == "node_scenarios":
-                            logging.info("Running node scenarios")
-                            nodeaction.run(scenarios_list, config, wait_duration)
-
-                        # Inject time skew chaos scenarios specified in the config
-                        elif scenario_type == "time_scenarios":
-                            if distribution == "openshift":
-                                logging.info("Running time skew scenarios")
-                                time_actions.run(scenarios_list, config, wait_duration)
-                            else:
-                                logging.error("Litmus scenarios are currently supported only on openshift")
-                                sys.exit(1)
-
-                        # Inject litmus based chaos scenarios
-                        elif scenario_type == "litmus_scenarios":
-                            if distribution == "openshift":
-                                logging.info("Running litmus scenarios")
-                                litmus_namespace = "litmus"
-                                if litmus_install:
-                                    # Remove Litmus resources before running the scenarios
-                                    common_litmus.delete_chaos(litmus_namespace)
-                                    common_litmus.delete_chaos_experiments(litmus_namespace)
-                                    if litmus_uninstall_before_run:
-                                        common_litmus.uninstall_litmus(litmus_version, litmus_namespace)
-                                    common_litmus.install_litmus(litmus_version, litmus_namespace)
-                                    common_litmus.deploy_all_experiments(litmus_version, litmus_namespace)
-                                common_litmus.run(
-                                    scenarios_list,
-                                    config,
-                                    litmus_uninstall,
-                                    wait_duration,
-                                    litmus_namespace,
-                                )
-                            else:
-                                logging.error("Litmus scenarios are currently only supported on openshift")
-                                sys.exit(1)
-
-                        # Inject cluster shutdown scenarios
-                        elif scenario_type == "cluster_shut_down_scenarios":
-                            shut_down.run(scenarios_list, config, wait_duration)
-
-                        # Inject namespace chaos scenarios
-                        elif scenario_type == "namespace_scenarios":
-                            logging.info("Running namespace scenarios")
-                            namespace_actions.run(
-                                scenarios_list, config, wait_duration, failed_post_scenarios, kubeconfig_path
-                            )
-
-                        # Inject zone failures
-                        elif scenario_type == "zone_outages":
-                            logging.info("Inject zone outages")
-                            zone_outages.run(scenarios_list, config, wait_duration)
-
-                        # Application outages
-                        elif scenario_type == "application_outages":
-                            logging.info("Injecting application outage")
-                            application_outage.run(scenarios_list, config, wait_duration)
-
-                        # PVC scenarios
-                        elif scenario_type == "pvc_scenarios":
-                            logging.info("Running PVC scenario")
-                            pvc_scenario.run(scenarios_list, config)
-
-                        # Network scenarios
-                        elif scenario_type == "network_chaos":
-                            logging.info("Running Network Chaos")
-                            network_chaos.run(scenarios_list, config, wait_duration)
+                        failed_post_scenarios = run_scenario(
+                            scenario_type, scenarios_list, config, failed_post_scenarios
+                        )
 
             iteration += 1
             logging.info("")
@@ -245,6 +321,9 @@ def main(cfg):
         # Capture the end time
         end_time = int(time.time())
 
+        if informer_cache:
+            kubecli.stop_informers()
+
         # Capture metrics for the run
         if capture_metrics:
             logging.info("Capturing metrics")
@@ -1,60 +1,120 @@
 import sys
+import json
 import logging
-import _thread
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from http.client import HTTPConnection
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import kraken.signal_state.state as signal_state
+import kraken.run_metrics.metrics as run_metrics
 
 
-# Start a simple http server to publish the cerberus status file content
+# Maximum number of seconds a long-poll request is held open
+max_watch_timeout = 300
+# Seconds between the keep-alive comments sent on an idle event stream
+event_keepalive_interval = 15
+
+
+# Serves the kraken signal kept in memory by kraken.signal_state, every
+# request is handled in a thread of its own and connections are kept alive
 class SimpleHTTPRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
     requests_served = 0
 
+    def log_message(self, format, *args):
+        logging.debug("Status server: " + format % args)
+
+    def send_text(self, code, text, content_type="text/plain; charset=utf-8"):
+        data = text.encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
     def do_GET(self):
-        if self.path == "/":
+        url = urlparse(self.path)
+        if url.path == "/":
             self.do_status()
+        elif url.path == "/watch":
+            self.do_watch(parse_qs(url.query))
+        elif url.path == "/events":
+            self.do_events()
+        elif url.path == "/metrics":
+            self.send_text(200, run_metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self.send_text(404, "Not found")
 
     def do_status(self):
+        self.send_text(200, signal_state.get_state())
+        SimpleHTTPRequestHandler.requests_served = SimpleHTTPRequestHandler.requests_served + 1
+
+    # Long-poll: answers once the signal differs from the given version or
+    # when the timeout expires, with the current signal and its version
+    def do_watch(self, query):
+        try:
+            known_version = int(query.get("version", [signal_state.version])[0])
+            timeout = min(float(query.get("timeout", [30])[0]), max_watch_timeout)
+        except ValueError:
+            self.send_text(400, "version and timeout must be numbers")
+            return
+        state, version = signal_state.wait_for_change(known_version, timeout)
+        self.send_text(200, json.dumps({"state": state, "version": version}), "application/json")
+
+    # Server-sent events stream with the current signal followed by every change
+    def do_events(self):
+        self.close_connection = True
         self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
         self.end_headers()
-        f = open("/tmp/kraken_status", "rb")
-        self.wfile.write(f.read())
-        SimpleHTTPRequestHandler.requests_served = SimpleHTTPRequestHandler.requests_served + 1
+        known_version = None
+        try:
+            while True:
+                state, version = signal_state.wait_for_change(known_version, event_keepalive_interval)
+                if version == known_version:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    self.wfile.write(("id: %s\nevent: state\ndata: %s\n\n" % (version, state)).encode())
+                    known_version = version
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
 
     def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if length:
+            self.rfile.read(length)
         if self.path == "/STOP":
             self.set_stop()
         elif self.path == "/RUN":
             self.set_run()
         elif self.path == "/PAUSE":
             self.set_pause()
+        else:
+            self.send_text(404, "Not found")
 
     def set_run(self):
-        self.send_response(200)
-        self.end_headers()
-        with open("/tmp/kraken_status", "w+") as file:
-            file.write(str("RUN"))
+        signal_state.set_state("RUN")
+        self.send_text(200, "RUN")
 
     def set_stop(self):
-        self.send_response(200)
-        self.end_headers()
-        with open("/tmp/kraken_status", "w+") as file:
-            file.write(str("STOP"))
+        signal_state.set_state("STOP")
+        self.send_text(200, "STOP")
 
     def set_pause(self):
-        self.send_response(200)
-        self.end_headers()
-        with open("/tmp/kraken_status", "w+") as file:
-            file.write(str("PAUSE"))
+        signal_state.set_state("PAUSE")
+        self.send_text(200, "PAUSE")
 
 
 def start_server(address):
     server = address[0]
     port = address[1]
     global httpd
-    httpd = HTTPServer(address, SimpleHTTPRequestHandler)
     logging.info("Starting http server at http://%s:%s\n" % (server, port))
     try:
-        _thread.start_new_thread(httpd.serve_forever, ())
+        httpd = ThreadingHTTPServer(address, SimpleHTTPRequestHandler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, name="status-server", daemon=True).start()
     except Exception:
         logging.error(
             "Failed to start the http server \
@@ -65,12 +125,8 @@ def start_server(address):
 
 
 def get_status(address):
-    server = address[0]
-    port = address[1]
-    httpc = HTTPConnection(server, port)
-    logging.info("connection set up")
-    httpc.request("GET", "/")
-    response = httpc.getresponse()
-    status = response.read()
-    logging.info("response " + str(status.decode()))
-    return status.decode()
+    """
+    Returns the kraken signal. The signal is kept in memory by the process
+    running the server, the address is only kept for compatibility.
+    """
+    return signal_state.get_state()
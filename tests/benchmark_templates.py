@@ -0,0 +1,59 @@
+"""
+Benchmark of the rendering of the per node network chaos jobs, with a new
+Jinja environment and a YAML parse per job as network_chaos used to do and
+with the template registry.
+
+Usage:
+    python tests/benchmark_templates.py [number of jobs]
+"""
+
+import os
+import sys
+import time
+
+import yaml
+from jinja2 import Environment, FileSystemLoader
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import kraken.templates.registry as templates  # noqa: E402
+
+network_chaos = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "kraken", "network_chaos")
+cmd = "tc qdisc add dev ens5 root netem delay 50ms ; tc qdisc ls dev ens5 ; sleep 300; tc qdisc del dev ens5 root ;"
+
+
+def jobs_params(count):
+    return [
+        dict(jobname="latency" + str(i), nodename="worker-%s" % i, cmd=cmd, run_id="ab12cd34") for i in range(count)
+    ]
+
+
+def render_with_jinja(count):
+    # A scenario file per 60 jobs, each building its own environment
+    jobs = []
+    for i, params in enumerate(jobs_params(count)):
+        if i % 60 == 0:
+            job_template = Environment(loader=FileSystemLoader(network_chaos)).get_template("job.j2")
+        jobs.append(yaml.safe_load(job_template.render(**params)))
+    return jobs
+
+
+def render_with_registry(count):
+    return [templates.render(network_chaos, "job.j2", **params) for params in jobs_params(count)]
+
+
+def measure(function, count):
+    start_time = time.perf_counter()
+    jobs = function(count)
+    return time.perf_counter() - start_time, jobs
+
+
+if __name__ == "__main__":
+    # 20 nodes, 3 egress options and 20 iterations by default
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    jinja_seconds, jinja_jobs = measure(render_with_jinja, count)
+    registry_seconds, registry_jobs = measure(render_with_registry, count)
+    assert jinja_jobs == registry_jobs
+    print("%s jobs rendered with jinja and yaml: %.3fs" % (count, jinja_seconds))
+    print("%s jobs rendered with the template registry: %.3fs (%.1fx)" % (
+        count, registry_seconds, jinja_seconds / registry_seconds
+    ))
@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+
+import kraken.kubernetes.client as kubecli
+
+
+class ApplyObjectsTest(unittest.TestCase):
+    def test_apply(self):
+        resources = {"Namespace": mock.Mock(namespaced=False), "ChaosEngine": mock.Mock(namespaced=True)}
+        dyn_client = mock.Mock()
+        dyn_client.resources.get.side_effect = lambda api_version, kind: resources[kind]
+        engine = {"apiVersion": "litmuschaos.io/v1alpha1", "kind": "ChaosEngine", "metadata": {"name": "engine"}}
+        manifest = [
+            {"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": "litmus"}},
+            None,
+            engine,
+        ]
+        with mock.patch.object(kubecli, "dyn_client", dyn_client, create=True):
+            kubecli.apply_objects(manifest, "litmus")
+
+        calls = dyn_client.server_side_apply.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(calls[0].kwargs["namespace"])
+        self.assertEqual(calls[1].kwargs["namespace"], "litmus")
+        self.assertEqual(calls[1].kwargs["body"]["metadata"]["namespace"], "litmus")
+        self.assertTrue(calls[1].kwargs["force_conflicts"])
+        # The manifest of the caller is left as is
+        self.assertNotIn("namespace", engine["metadata"])
+
+
+if __name__ == "__main__":
+    unittest.main()
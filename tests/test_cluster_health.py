@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+import kraken.kubernetes.cluster_health as cluster_health
+
+
+class ClusterHealthTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(cluster_health, "poll_interval", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_checks_in_order(self):
+        calls = []
+        readyz = {"/readyz": iter([False, True]), "/readyz/etcd": iter([True])}
+
+        def apiserver_ready(path):
+            calls.append(path)
+            return next(readyz[path])
+
+        with mock.patch.object(cluster_health, "wait_for_nodes_ready", return_value=True), \
+                mock.patch.object(cluster_health, "apiserver_ready", side_effect=apiserver_ready), \
+                mock.patch.object(cluster_health, "operators_ready", return_value=True):
+            health = cluster_health.wait_for_cluster_health(60)
+
+        self.assertTrue(health["healthy"])
+        self.assertEqual(calls, ["/readyz", "/readyz", "/readyz/etcd"])
+        self.assertEqual(set(health["checks"]), set(cluster_health.checks))
+        self.assertTrue(all(seconds is not None for seconds in health["checks"].values()))
+
+    def test_timeout(self):
+        with mock.patch.object(cluster_health, "wait_for_nodes_ready", return_value=True), \
+                mock.patch.object(cluster_health, "apiserver_ready", return_value=True), \
+                mock.patch.object(cluster_health, "operators_ready", return_value=False):
+            health = cluster_health.wait_for_cluster_health(0)
+
+        self.assertFalse(health["healthy"])
+        self.assertIsNotNone(health["checks"]["etcd"])
+        self.assertIsNone(health["checks"]["operators"])
+
+    def test_operators(self):
+        operators = {"items": [
+            {
+                "metadata": {"name": "etcd"},
+                "status": {"conditions": [
+                    {"type": "Available", "status": "True"}, {"type": "Degraded", "status": "False"}
+                ]},
+            },
+            {
+                "metadata": {"name": "ingress"},
+                "status": {"conditions": [
+                    {"type": "Available", "status": "True"}, {"type": "Degraded", "status": "True"}
+                ]},
+            },
+            {"metadata": {"name": "dns"}, "status": {}},
+        ]}
+        client = mock.Mock()
+        client.list_cluster_custom_object.return_value = operators
+        with mock.patch.object(cluster_health.kubecli, "custom_object_client", client, create=True):
+            self.assertEqual(cluster_health.cluster_operators_not_ready(), ["ingress", "dns"])
+
+
+if __name__ == "__main__":
+    unittest.main()
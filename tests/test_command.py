@@ -0,0 +1,41 @@
+import threading
+import time
+import unittest
+
+import kraken.invoke.command as runcommand
+
+
+class ExecuteTest(unittest.TestCase):
+    def test_result(self):
+        result = runcommand.execute(["sh", "-c", "echo out; echo err >&2; exit 3"])
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout, "out\n")
+        self.assertEqual(result.stderr, "err\n")
+        self.assertFalse(result.ok)
+
+    def test_missing_binary(self):
+        result = runcommand.execute(["kraken-missing-binary"])
+        self.assertEqual(result.returncode, 127)
+        self.assertFalse(result.ok)
+
+    def test_timeout(self):
+        result = runcommand.execute("sleep 10", timeout=0.3)
+        self.assertTrue(result.timed_out)
+        self.assertLess(result.duration, 5)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        threading.Timer(0.3, cancel.set).start()
+        result = runcommand.execute("sleep 10", cancel=cancel)
+        self.assertTrue(result.cancelled)
+
+    def test_execute_many(self):
+        start_time = time.monotonic()
+        results = runcommand.execute_many([["sleep", "1"], ["echo", "a"], ["sleep", "1"]], max_parallel=3)
+        self.assertLess(time.monotonic() - start_time, 1.9)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(results[1].stdout, "a\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
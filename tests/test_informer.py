@@ -0,0 +1,80 @@
+import unittest
+
+from kubernetes.client import V1Pod, V1ObjectMeta, V1PodList, V1ListMeta
+
+from kraken.kubernetes.informer import Informer, match_field_selector, match_label_selector
+
+
+def new_pod(name, namespace="default", labels=None, resource_version="1"):
+    return V1Pod(metadata=V1ObjectMeta(
+        name=name,
+        namespace=namespace,
+        labels=labels,
+        resource_version=resource_version,
+    ))
+
+
+class LabelSelectorTest(unittest.TestCase):
+    def test_equality(self):
+        labels = {"app": "etcd", "tier": "control"}
+        self.assertTrue(match_label_selector(labels, "app=etcd"))
+        self.assertTrue(match_label_selector(labels, "app==etcd,tier=control"))
+        self.assertFalse(match_label_selector(labels, "app=nginx"))
+        self.assertTrue(match_label_selector(labels, "app!=nginx"))
+        self.assertFalse(match_label_selector(labels, "app!=etcd"))
+
+    def test_set_and_existence(self):
+        labels = {"app": "etcd"}
+        self.assertTrue(match_label_selector(labels, "app in (etcd, nginx)"))
+        self.assertFalse(match_label_selector(labels, "app notin (etcd,nginx)"))
+        self.assertTrue(match_label_selector(labels, "app"))
+        self.assertFalse(match_label_selector(labels, "!app"))
+        self.assertFalse(match_label_selector(None, "app"))
+        self.assertTrue(match_label_selector(None, None))
+
+    def test_field_selector(self):
+        pod = new_pod("etcd-0", namespace="kube-system")
+        self.assertTrue(match_field_selector(pod, "metadata.name=etcd-0"))
+        self.assertTrue(match_field_selector(pod, "metadata.name==etcd-0,metadata.namespace!=default"))
+        self.assertFalse(match_field_selector(pod, "metadata.name=etcd-1"))
+        self.assertTrue(match_field_selector(pod, None))
+        with self.assertRaises(ValueError):
+            match_field_selector(pod, "spec.restartPolicy=Always")
+
+
+class InformerTest(unittest.TestCase):
+    def setUp(self):
+        def list_pods(**kwargs):
+            return V1PodList(
+                items=[new_pod("a", labels={"app": "etcd"}), new_pod("b", "kube-system")],
+                metadata=V1ListMeta(resource_version="10"),
+            )
+        self.informer = Informer("pods", list_pods)
+        self.informer.relist()
+
+    def test_list_and_get(self):
+        self.assertTrue(self.informer.has_synced())
+        self.assertEqual("10", self.informer.resource_version)
+        self.assertEqual(2, len(self.informer.list()))
+        self.assertEqual(["a"], [p.metadata.name for p in self.informer.list("default", "app=etcd")])
+        self.assertIsNotNone(self.informer.get("b", "kube-system"))
+        self.assertIsNone(self.informer.get("b", "default"))
+
+    def test_events(self):
+        self.informer.apply_event({"type": "ADDED", "object": new_pod("c", resource_version="11")})
+        self.informer.apply_event({"type": "DELETED", "object": new_pod("a", resource_version="12")})
+        self.assertEqual("12", self.informer.resource_version)
+        self.assertEqual(["b", "c"], sorted(p.metadata.name for p in self.informer.list()))
+
+    def test_expired_resource_version(self):
+        with self.assertRaises(Exception) as ctx:
+            self.informer.apply_event({
+                "type": "ERROR",
+                "object": None,
+                "raw_object": {"code": 410, "message": "too old resource version"},
+            })
+        self.assertEqual(410, ctx.exception.status)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import kraken.node_actions.instance_batch as instance_batch
+
+
+class SingleInstanceCloud:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.stopped = []
+
+    def stop_instances(self, zone, instance_id):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+            self.stopped.append((instance_id, zone))
+
+    def wait_until_stopped(self, zone, instance_id, timeout):
+        return instance_id != "vm-3"
+
+
+class BatchCloud:
+    def __init__(self):
+        self.calls = []
+
+    def stop_instances_batch(self, instances, max_parallel):
+        self.calls.append(list(instances))
+
+
+class InstanceBatchTest(unittest.TestCase):
+    def test_fallback_bounded(self):
+        cloud = SingleInstanceCloud()
+        instances = [("vm-%s" % i, "zone-a") for i in range(8)]
+        instance_batch.stop(cloud, instances, max_parallel=3)
+        self.assertEqual(sorted(cloud.stopped), sorted(instances))
+        self.assertLessEqual(cloud.max_running, 3)
+        self.assertEqual(instance_batch.wait_until_stopped(cloud, instances, 10, 3), [("vm-3", "zone-a")])
+
+    def test_batch_api_used(self):
+        cloud = BatchCloud()
+        instance_batch.stop(cloud, ["i-1", "i-2"], max_parallel=1)
+        self.assertEqual(cloud.calls, [["i-1", "i-2"]])
+
+    def test_wait_for_state(self):
+        rounds = []
+
+        def get_states(instances):
+            rounds.append(list(instances))
+            done = len(rounds) > 1
+            return {instance: "stopped" if done or instance == "i-1" else "stopping" for instance in instances}
+
+        with mock.patch.object(instance_batch, "poll_interval", 0):
+            self.assertEqual(instance_batch.wait_for_state(get_states, ["i-1", "i-2"], "stopped", 10), [])
+        self.assertEqual(rounds, [["i-1", "i-2"], ["i-2"]])
+
+    def test_wait_for_state_timeout(self):
+        with mock.patch.object(instance_batch, "poll_interval", 1):
+            remaining = instance_batch.wait_for_state(lambda instances: {}, ["i-1"], "running", 0)
+        self.assertEqual(remaining, ["i-1"])
+
+    def test_chunks(self):
+        self.assertEqual(list(instance_batch.chunks([1, 2, 3, 4, 5], 2)), [[1, 2], [3, 4], [5]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+from unittest import mock
+
+import kraken.node_actions.instance_index as instance_index
+
+
+class FakeCloud:
+    def __init__(self, instances):
+        self.instances = instances
+        self.listings = []
+
+    def list_node_instances(self, nodes):
+        self.listings.append(nodes)
+        return {node: self.instances[node] for node in nodes if node in self.instances}
+
+
+class InstanceIndexTest(unittest.TestCase):
+    def setUp(self):
+        instance_index.invalidate()
+        self.ttl = instance_index.ttl
+        patcher = mock.patch.object(
+            instance_index.kubecli, "list_nodes", return_value=["node-a", "node-b", "node-c"]
+        )
+        self.list_nodes = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        instance_index.set_ttl(self.ttl)
+        instance_index.invalidate()
+
+    def test_single_listing(self):
+        cloud = FakeCloud({"node-a": "i-a", "node-b": "i-b"})
+        self.assertEqual(instance_index.lookup(cloud, "node-a"), "i-a")
+        self.assertEqual(instance_index.lookup_many(cloud, ["node-b", "node-c"]), ["i-b", None])
+        self.assertEqual(cloud.listings, [["node-a", "node-b", "node-c"]])
+
+    def test_unknown_node_rebuilds(self):
+        cloud = FakeCloud({"node-a": "i-a", "node-d": "i-d"})
+        instance_index.lookup(cloud, "node-a")
+        self.assertEqual(instance_index.lookup(cloud, "node-d"), "i-d")
+        self.assertEqual(len(cloud.listings), 2)
+        self.assertIn("node-d", cloud.listings[1])
+
+    def test_expired_index_rebuilds(self):
+        instance_index.set_ttl(10)
+        cloud = FakeCloud({"node-a": "i-a"})
+        instance_index.lookup(cloud, "node-a")
+        with mock.patch.object(instance_index.time, "time", return_value=time.time() + 11):
+            instance_index.lookup(cloud, "node-a")
+        self.assertEqual(len(cloud.listings), 2)
+
+    def test_index_per_cloud(self):
+        class OtherCloud(FakeCloud):
+            pass
+
+        cloud = FakeCloud({"node-a": "i-a"})
+        other = OtherCloud({"node-a": ("vm-a", "group")})
+        self.assertEqual(instance_index.lookup(cloud, "node-a"), "i-a")
+        self.assertEqual(instance_index.lookup(other, "node-a"), ("vm-a", "group"))
+        instance_index.invalidate(other)
+        instance_index.lookup(cloud, "node-a")
+        instance_index.lookup(other, "node-a")
+        self.assertEqual(len(cloud.listings), 1)
+        self.assertEqual(len(other.listings), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
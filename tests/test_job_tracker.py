@@ -0,0 +1,71 @@
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from kubernetes.client import V1Job, V1JobList, V1JobStatus, V1ListMeta, V1ObjectMeta
+
+import kraken.kubernetes.informer as informer
+import kraken.kubernetes.job_tracker as job_tracker
+
+
+def new_job(name, succeeded=None, failed=None, resource_version="1"):
+    return V1Job(
+        metadata=V1ObjectMeta(name=name, resource_version=resource_version),
+        status=V1JobStatus(succeeded=succeeded, failed=failed),
+    )
+
+
+class FakeWatch:
+    """Streams the events put on the shared queue until it is stopped"""
+    events = queue.Queue()
+
+    def __init__(self):
+        self.stopped = False
+
+    def stream(self, func, *args, **kwargs):
+        while not self.stopped:
+            try:
+                yield FakeWatch.events.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+    def stop(self):
+        self.stopped = True
+
+
+class JobTrackerTest(unittest.TestCase):
+    def setUp(self):
+        FakeWatch.events = queue.Queue()
+        patcher = mock.patch.object(informer.watch, "Watch", FakeWatch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        batch_v1 = mock.Mock()
+        batch_v1.list_namespaced_job.return_value = V1JobList(
+            items=[new_job("chaos-a", succeeded=1), new_job("chaos-b")],
+            metadata=V1ListMeta(resource_version="1"),
+        )
+        self.tracker = job_tracker.JobTracker(batch_v1, "default", "kraken-run=test")
+        self.addCleanup(self.tracker.stop)
+
+    def test_wait(self):
+        results = {}
+
+        def wait():
+            results.update(self.tracker.wait_for_jobs(["chaos-a", "chaos-b", "chaos-c"], 5))
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        FakeWatch.events.put({"type": "ADDED", "object": new_job("chaos-c", resource_version="2")})
+        FakeWatch.events.put({"type": "MODIFIED", "object": new_job("chaos-b", failed=1, resource_version="3")})
+        FakeWatch.events.put({"type": "MODIFIED", "object": new_job("chaos-c", succeeded=1, resource_version="4")})
+        waiter.join(5)
+        self.assertEqual(results, {"chaos-a": "Complete", "chaos-b": "Failed", "chaos-c": "Complete"})
+
+    def test_timeout(self):
+        states = self.tracker.wait_for_jobs(["chaos-a", "chaos-b"], 0.2)
+        self.assertEqual(states, {"chaos-a": "Complete", "chaos-b": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from unittest import mock
+
+import kraken.network_chaos.netem_agent as netem_agent
+
+
+class NetemAgentTest(unittest.TestCase):
+    def test_apply(self):
+        def run(node, command, timeout, chroot):
+            return (1, "RTNETLINK answers: File exists") if node == "node-b" else (0, "")
+
+        targets = {"node-a": ["ens5", "ens6"], "node-b": ["ens5"]}
+        with mock.patch.object(netem_agent.node_agent, "run", side_effect=run) as node_run:
+            errors, window = netem_agent.apply(targets, ["latency", "loss"], {"latency": "50ms", "loss": 0.02})
+        self.assertEqual(list(errors), ["node-b"])
+        self.assertGreaterEqual(window, 0)
+        commands = dict((call.args[0], call.args[1]) for call in node_run.call_args_list)
+        self.assertEqual(
+            commands["node-a"],
+            "tc qdisc add dev ens5 root netem delay 50ms loss 0.02 && "
+            "tc qdisc add dev ens6 root netem delay 50ms loss 0.02",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
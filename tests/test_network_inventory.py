@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+import kraken.network_chaos.inventory as inventory
+
+output = (
+    "lo: 65536\n"
+    "ens5: 9001\n"
+    "br-ex@ens5: 8901\n"
+    "\n"
+    "br-ex\n"
+)
+
+
+class NetworkInventoryTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(inventory, "inventory", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parse(self):
+        network = inventory.parse("boot-1", output)
+        self.assertEqual(network.interfaces, {"lo": 65536, "ens5": 9001, "br-ex": 8901})
+        self.assertEqual(network.default_interface, "br-ex")
+
+    def test_target_interfaces(self):
+        boot_ids = {"node-a": "boot-1", "node-b": "boot-1"}
+        with mock.patch.object(inventory.kubecli, "get_node_boot_ids", return_value=boot_ids), \
+                mock.patch.object(inventory, "read_with_pod", return_value=output) as read:
+            self.assertEqual(
+                inventory.get_target_interfaces(["node-a", "node-b"], []), {"node-a": ["br-ex"], "node-b": ["br-ex"]}
+            )
+            self.assertEqual(inventory.get_target_interfaces(["node-a"], ["ens5"]), {"node-a": ["ens5"]})
+            with self.assertRaises(SystemExit):
+                inventory.get_target_interfaces(["node-b"], ["eth1"])
+            self.assertEqual(read.call_count, 2)
+            # A rebooted node is read again
+            boot_ids["node-a"] = "boot-2"
+            inventory.get_target_interfaces(["node-a", "node-b"], [])
+            self.assertEqual(read.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
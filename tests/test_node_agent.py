@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+
+import kraken.node_agent.agent as node_agent
+
+
+class NodeAgentTest(unittest.TestCase):
+    def test_render(self):
+        daemonset = node_agent.render()
+        self.assertEqual(daemonset["kind"], "DaemonSet")
+        pod_spec = daemonset["spec"]["template"]["spec"]
+        self.assertTrue(pod_spec["hostPID"])
+        self.assertTrue(pod_spec["containers"][0]["securityContext"]["privileged"])
+        self.assertEqual(pod_spec["containers"][0]["image"], node_agent.image)
+        self.assertEqual(pod_spec["volumes"][0]["hostPath"]["path"], "/")
+
+    def test_debug_fallback(self):
+        with mock.patch.object(node_agent, "enabled", False), \
+                mock.patch.object(node_agent.runcommand, "invoke", return_value="ok") as invoke:
+            self.assertEqual(node_agent.node_command("node-a", "date"), "ok")
+        invoke.assert_called_once_with("oc debug node/node-a -- chroot /host date")
+        with mock.patch.object(node_agent, "enabled", False), \
+                mock.patch.object(node_agent.runcommand, "invoke_no_exit", return_value="ok") as invoke_no_exit:
+            self.assertEqual(node_agent.node_command("node-a", "date", check=False, timeout=60), "ok")
+        invoke_no_exit.assert_called_once_with("oc debug node/node-a -- chroot /host date", 60)
+
+    def test_agent(self):
+        with mock.patch.object(node_agent, "enabled", True), \
+                mock.patch.object(node_agent, "get_pod", return_value="agent-a"), \
+                mock.patch.object(node_agent, "deploy"), \
+                mock.patch.object(node_agent, "exec_in_pod", return_value=(0, "ok")) as exec_in_pod:
+            outputs = node_agent.node_commands(["node-a", "node-b"], "date")
+        self.assertEqual(outputs, {"node-a": "ok", "node-b": "ok"})
+        self.assertEqual(exec_in_pod.call_count, 2)
+
+    def test_agent_failure(self):
+        with mock.patch.object(node_agent, "enabled", True), \
+                mock.patch.object(node_agent, "get_pod", return_value="agent-a"), \
+                mock.patch.object(node_agent, "exec_in_pod", return_value=(1, "failed")):
+            self.assertEqual(node_agent.node_command("node-a", "date", check=False), "")
+            with self.assertRaises(SystemExit):
+                node_agent.node_command("node-a", "date")
+
+
+if __name__ == "__main__":
+    unittest.main()
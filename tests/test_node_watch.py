@@ -0,0 +1,79 @@
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from kubernetes.client import V1Node, V1NodeList, V1ObjectMeta, V1ListMeta, V1NodeStatus, V1NodeCondition
+
+import kraken.kubernetes.informer as informer
+import kraken.kubernetes.node_watch as node_watch
+
+
+def new_node(name, ready, resource_version="1"):
+    return V1Node(
+        metadata=V1ObjectMeta(name=name, resource_version=resource_version),
+        status=V1NodeStatus(conditions=[V1NodeCondition(type="Ready", status=ready)]),
+    )
+
+
+class FakeWatch:
+    """Streams the events put on the shared queue until it is stopped"""
+    events = queue.Queue()
+    streams = 0
+
+    def __init__(self):
+        self.stopped = False
+
+    def stream(self, func, **kwargs):
+        FakeWatch.streams += 1
+        while not self.stopped:
+            try:
+                yield FakeWatch.events.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+    def stop(self):
+        self.stopped = True
+
+
+class NodeWatcherTest(unittest.TestCase):
+    def setUp(self):
+        FakeWatch.events = queue.Queue()
+        FakeWatch.streams = 0
+        patcher = mock.patch.object(informer.watch, "Watch", FakeWatch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        core_v1 = mock.Mock()
+        core_v1.list_node.return_value = V1NodeList(
+            items=[new_node("node-a", "True"), new_node("node-b", "True")],
+            metadata=V1ListMeta(resource_version="1"),
+        )
+        self.watcher = node_watch.NodeWatcher(core_v1)
+        self.addCleanup(self.watcher.stop)
+
+    def test_current_status(self):
+        self.assertTrue(self.watcher.wait_for_status("node-a", "True", 5))
+        self.assertFalse(self.watcher.wait_for_status("node-a", "False", 0.1))
+
+    def test_shared_stream(self):
+        results = {}
+
+        def wait(node, status):
+            results[node] = self.watcher.wait_for_status(node, status, 5)
+
+        waiters = [
+            threading.Thread(target=wait, args=("node-a", "Unknown")),
+            threading.Thread(target=wait, args=("node-b", "False")),
+        ]
+        for waiter in waiters:
+            waiter.start()
+        FakeWatch.events.put({"type": "MODIFIED", "object": new_node("node-a", "Unknown", "2")})
+        FakeWatch.events.put({"type": "MODIFIED", "object": new_node("node-b", "False", "3")})
+        for waiter in waiters:
+            waiter.join(5)
+        self.assertEqual(results, {"node-a": True, "node-b": True})
+        self.assertEqual(FakeWatch.streams, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
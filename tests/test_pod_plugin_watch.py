@@ -0,0 +1,191 @@
+import datetime
+import re
+import threading
+import time
+import unittest
+from unittest import mock
+
+from kubernetes.client import (
+    ApiException, V1ListMeta, V1ObjectMeta, V1Pod, V1PodCondition, V1PodList, V1PodStatus,
+)
+
+from kraken.plugins import pod_plugin
+from kraken.plugins.pod_plugin import Pod, PodCondition, WaitForPodsConfig
+
+
+def new_pod(name, namespace="default", resource_version="1"):
+    return V1Pod(metadata=V1ObjectMeta(name=name, namespace=namespace, resource_version=resource_version))
+
+
+class FakeWatch:
+    """Streams the events scripted for the namespace of the watch once, the following streams are empty"""
+    events = {}
+    calls = []
+    lock = threading.Lock()
+
+    def stream(self, func, *args, **kwargs):
+        with FakeWatch.lock:
+            FakeWatch.calls.append((func, args, kwargs))
+            events = FakeWatch.events.pop(args[0] if args else None, [])
+        for event in events:
+            yield event
+
+    def stop(self):
+        pass
+
+
+class PodWatchTest(unittest.TestCase):
+    def setUp(self):
+        FakeWatch.events = {}
+        FakeWatch.calls = []
+        patcher = mock.patch.object(pod_plugin.watch, "Watch", FakeWatch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.core_v1 = mock.Mock()
+        self.core_v1.list_namespaced_pod.return_value = V1PodList(
+            items=[], metadata=V1ListMeta(resource_version="5")
+        )
+
+    def test_namespaced_watches(self):
+        pods = [Pod("ns-a", "a"), Pod("ns-b", "b"), Pod("ns-a", "c")]
+        watches = pod_plugin._pod_watches(self.core_v1, pods)
+        self.assertEqual(sorted(watches), ["ns-a", "ns-b"])
+        self.assertEqual(watches["ns-b"], ([self.core_v1.list_namespaced_pod, "ns-b"], "5"))
+        self.core_v1.list_namespaced_pod.assert_any_call("ns-a", limit=1)
+        self.core_v1.list_pod_for_all_namespaces.assert_not_called()
+
+    def test_removed_in_every_namespace(self):
+        pods = [Pod("ns-a", "a"), Pod("ns-b", "b")]
+        FakeWatch.events = {
+            "ns-a": [{"type": "DELETED", "object": new_pod("a", "ns-a", "6")}],
+            "ns-b": [
+                {"type": "MODIFIED", "object": new_pod("b", "ns-b", "6")},
+                {"type": "DELETED", "object": new_pod("b", "ns-b", "7")},
+            ],
+        }
+        watches = pod_plugin._pod_watches(self.core_v1, pods)
+        remaining = pod_plugin._watch_all_pods_removed(watches, pods, time.time() + 5)
+        self.assertEqual(remaining, [])
+        self.assertEqual(sorted(args for _, args, _ in FakeWatch.calls), [("ns-a",), ("ns-b",)])
+        for func, _, kwargs in FakeWatch.calls:
+            self.assertIs(func, self.core_v1.list_namespaced_pod)
+            self.assertEqual(kwargs["resource_version"], "5")
+
+    def test_poll_fallback(self):
+        pods = [Pod("default", "a"), Pod("default", "b")]
+        FakeWatch.events = {"default": [
+            {"type": "DELETED", "object": new_pod("a", resource_version="6")},
+            {"type": "ERROR", "object": None, "raw_object": {"code": 410}},
+        ]}
+        remaining = pod_plugin._watch_pods_removed(
+            [self.core_v1.list_namespaced_pod, "default"], pods, "5", time.time() + 5
+        )
+        self.assertEqual(remaining, [Pod("default", "b")])
+        self.core_v1.read_namespaced_pod.side_effect = [new_pod("b"), ApiException(status=404)]
+        self.assertTrue(pod_plugin._poll_pods_removed(self.core_v1, remaining, time.time() + 5, 0))
+        self.assertEqual(self.core_v1.read_namespaced_pod.call_count, 2)
+
+    def test_poll_timeout(self):
+        self.core_v1.read_namespaced_pod.return_value = new_pod("a")
+        self.assertFalse(pod_plugin._poll_pods_removed(self.core_v1, [Pod("default", "a")], time.time() - 1, 0))
+
+
+class DeletePodsTest(unittest.TestCase):
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def delete_namespaced_pod(name, namespace, body=None):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        core_v1 = mock.Mock()
+        core_v1.delete_namespaced_pod.side_effect = delete_namespaced_pod
+        pods = [Pod("default", "pod-%s" % i) for i in range(6)]
+        killed_pods, delete_latencies = pod_plugin._delete_pods(core_v1, pods, 2)
+        self.assertEqual(max_running[0], 2)
+        self.assertEqual(sorted(p.name for p in killed_pods.values()), sorted(p.name for p in pods))
+        self.assertEqual(set(killed_pods), set(delete_latencies))
+        for latency in delete_latencies.values():
+            self.assertGreaterEqual(latency, 0.04)
+        self.assertEqual(core_v1.delete_namespaced_pod.call_args.kwargs["body"].grace_period_seconds, 0)
+
+
+def new_status_pod(name, phase="Pending", ready=False, resource_version="1"):
+    pod = new_pod(name, resource_version=resource_version)
+    pod.status = V1PodStatus(
+        phase=phase, conditions=[V1PodCondition(type="Ready", status="True" if ready else "False")]
+    )
+    return pod
+
+
+def pod_list(*pods, resource_version="10"):
+    return V1PodList(items=list(pods), metadata=V1ListMeta(resource_version=resource_version))
+
+
+class WaitForPodsTest(unittest.TestCase):
+    def setUp(self):
+        FakeWatch.events = {}
+        FakeWatch.calls = []
+        self.core_v1 = mock.Mock()
+        for patcher in (
+            mock.patch.object(pod_plugin.watch, "Watch", FakeWatch),
+            mock.patch.object(pod_plugin, "setup_kubernetes"),
+            mock.patch.object(pod_plugin.client, "CoreV1Api", return_value=self.core_v1),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def wait(self, condition, count):
+        return pod_plugin.wait_for_pods(WaitForPodsConfig(
+            namespace_pattern=re.compile("default"),
+            label_selector="app=web",
+            count=count,
+            condition=condition,
+            timeout=5,
+        ))
+
+    def test_watch(self):
+        self.core_v1.list_pod_for_all_namespaces.return_value = pod_list(new_status_pod("a"))
+        FakeWatch.events = {None: [
+            {"type": "ADDED", "object": new_status_pod("b", resource_version="11")},
+            {"type": "MODIFIED", "object": new_status_pod("a", phase="Running", resource_version="12")},
+        ]}
+        result, output = self.wait(PodCondition.RUNNING, 1)
+        self.assertEqual(result, "success")
+        self.assertEqual(output.pods, [Pod("default", "a")])
+        self.assertEqual(FakeWatch.calls[0][2]["resource_version"], "10")
+        self.assertEqual(FakeWatch.calls[0][2]["label_selector"], "app=web")
+
+    def test_relist_on_expired_resource_version(self):
+        self.core_v1.list_pod_for_all_namespaces.side_effect = [
+            pod_list(new_status_pod("a", "Running", ready=True), new_status_pod("b", "Running")),
+            pod_list(new_status_pod("a", "Running", ready=True), new_status_pod("b", "Running", ready=True)),
+        ]
+        FakeWatch.events = {None: [{"type": "ERROR", "object": None, "raw_object": {"code": 410}}]}
+        with mock.patch.object(pod_plugin.time, "sleep") as sleep:
+            result, output = self.wait(PodCondition.READY, 2)
+        self.assertEqual(result, "success")
+        self.assertEqual(len(output.pods), 2)
+        self.assertEqual(self.core_v1.list_pod_for_all_namespaces.call_count, 2)
+        sleep.assert_not_called()
+
+    def test_conditions(self):
+        running = new_status_pod("a", "Running")
+        self.assertTrue(pod_plugin._pod_meets_condition(running, PodCondition.PRESENT))
+        self.assertTrue(pod_plugin._pod_meets_condition(running, PodCondition.RUNNING))
+        self.assertFalse(pod_plugin._pod_meets_condition(running, PodCondition.READY))
+        ready = new_status_pod("a", "Running", ready=True)
+        self.assertTrue(pod_plugin._pod_meets_condition(ready, PodCondition.READY))
+        ready.metadata.deletion_timestamp = datetime.datetime.now()
+        self.assertFalse(pod_plugin._pod_meets_condition(ready, PodCondition.RUNNING))
+        self.assertFalse(pod_plugin._pod_meets_condition(ready, PodCondition.READY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from kubernetes.client import (
+    V1Container, V1ObjectMeta, V1PersistentVolumeClaimVolumeSource, V1Pod, V1PodSpec, V1PodStatus, V1Volume,
+    V1VolumeMount,
+)
+
+import kraken.pvc.fill_engine as fill_engine
+
+
+def new_pod(name, claim, phase="Running"):
+    return V1Pod(
+        metadata=V1ObjectMeta(name=name),
+        spec=V1PodSpec(
+            containers=[
+                V1Container(name="sidecar"),
+                V1Container(name="db", volume_mounts=[V1VolumeMount(name="data", mount_path="/var/lib/db")]),
+            ],
+            volumes=[
+                V1Volume(name="config"),
+                V1Volume(name="data", persistent_volume_claim=V1PersistentVolumeClaimVolumeSource(claim_name=claim)),
+            ],
+        ),
+        status=V1PodStatus(phase=phase),
+    )
+
+
+pods = [new_pod("db-0", "data-db-0"), new_pod("db-1", "data-db-1"), new_pod("db-2", "data-db-2", phase="Pending")]
+
+
+class PvcFillTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(fill_engine.kubecli, "iterate_pods", return_value=iter(pods))
+        self.iterate_pods = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolve(self):
+        targets = fill_engine.resolve_targets("db", label_selector="app=db")
+        self.assertEqual([target.pvc for target in targets], ["data-db-0", "data-db-1"])
+        self.assertEqual(targets[0].container, "db")
+        self.assertEqual(targets[0].path, "/var/lib/db/kraken.tmp")
+        self.iterate_pods.assert_called_once_with("db", "app=db", field_selector=None)
+
+    def test_resolve_pod(self):
+        self.iterate_pods.return_value = iter(pods[1:2])
+        targets = fill_engine.resolve_targets("db", pod_name="db-1")
+        self.assertEqual([target.pvc for target in targets], ["data-db-1"])
+        self.iterate_pods.assert_called_once_with("db", None, field_selector="metadata.name=db-1")
+
+    def test_resolve_missing(self):
+        self.assertIsNone(fill_engine.resolve_targets("db", pvc_names=["data-db-2"]))
+
+    def test_fill_all(self):
+        outputs = {
+            "db-0": "used_kb=100\ncapacity_kb=1000\nfile_size_kb=400\nstatus=filled\n",
+            "db-1": "used_kb=600\ncapacity_kb=1000\nfile_size_kb=0\nstatus=invalid_percentage\n",
+        }
+        targets = fill_engine.resolve_targets("db", pvc_names=["data-db-0", "data-db-1"])
+        with mock.patch.object(
+            fill_engine.kubecli, "exec_cmd_in_pod", side_effect=lambda script, pod, *args: outputs[pod]
+        ) as exec_cmd_in_pod:
+            results = fill_engine.fill_all(targets, 50)
+        self.assertEqual(exec_cmd_in_pod.call_count, 2)
+        self.assertEqual([result.filled for result in results.values()], [True, False])
+        self.assertEqual(results[targets[0]].file_size_kb, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from kubernetes.client import (
+    V1Pod,
+    V1ObjectMeta,
+    V1OwnerReference,
+    V1PodSpec,
+    V1PodStatus,
+    V1PodCondition,
+)
+
+from kraken.kubernetes.recovery import RecoveryTracker, percentile
+
+
+owner = ("ReplicaSet", "web-6d4cf56db6", "rs-uid")
+
+
+def new_pod(name, uid, node_name=None, phase="Pending", ready=False):
+    return V1Pod(
+        metadata=V1ObjectMeta(
+            name=name,
+            namespace="default",
+            uid=uid,
+            owner_references=[V1OwnerReference(
+                api_version="apps/v1",
+                kind=owner[0],
+                name=owner[1],
+                uid=owner[2],
+                controller=True,
+            )],
+        ),
+        spec=V1PodSpec(containers=[], node_name=node_name),
+        status=V1PodStatus(
+            phase=phase,
+            conditions=[V1PodCondition(type="Ready", status="True" if ready else "False")],
+        ),
+    )
+
+
+class PercentileTest(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(50.0, percentile(values, 50))
+        self.assertEqual(99.0, percentile(values, 99))
+        self.assertEqual(3.0, percentile([3.0], 90))
+        self.assertIsNone(percentile([], 50))
+
+
+class RecoveryTrackerTest(unittest.TestCase):
+    def test_recovery(self):
+        tracker = RecoveryTracker()
+        tracker.expect("default", owner)
+        tracker.expect("default", owner)
+        tracker.expect("default", None)
+        tracker.deleted(owner, 100.0)
+        tracker.deleted(owner, 101.0)
+
+        # Pods that existed before the watch started are not replacements
+        tracker.observe("MODIFIED", new_pod("web-old", "old", "node-1", "Running", True), 101.5)
+        tracker.observe("ADDED", new_pod("web-a", "a"), 102.0)
+        tracker.observe("MODIFIED", new_pod("web-a", "a", "node-1"), 103.0)
+        tracker.observe("MODIFIED", new_pod("web-a", "a", "node-1", "Running"), 104.0)
+        tracker.observe("MODIFIED", new_pod("web-a", "a", "node-1", "Running", True), 105.0)
+        self.assertFalse(tracker.done())
+        tracker.observe("ADDED", new_pod("web-b", "b", "node-2", "Running", True), 106.0)
+        self.assertTrue(tracker.done())
+        # A third pod exceeds the number of killed pods and is ignored
+        tracker.observe("ADDED", new_pod("web-c", "c", "node-2", "Running", True), 107.0)
+
+        result = tracker.results()["ReplicaSet/default/web-6d4cf56db6"]
+        self.assertEqual(2, result["killed"])
+        self.assertEqual(2, result["recovered"])
+        self.assertEqual([3.0, 5.0], result["scheduled"]["samples"])
+        self.assertEqual([4.0, 5.0], result["running"]["samples"])
+        self.assertEqual([5.0, 5.0], result["ready"]["samples"])
+        self.assertEqual(5.0, result["ready"]["max"])
+
+    def test_no_owner(self):
+        tracker = RecoveryTracker()
+        tracker.expect("default", None)
+        self.assertEqual({}, tracker.results())
+        self.assertTrue(tracker.done())
+
+
+if __name__ == '__main__':
+    unittest.main()
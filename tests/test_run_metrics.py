@@ -0,0 +1,33 @@
+import unittest
+
+import kraken.run_metrics.metrics as run_metrics
+
+
+class RunMetricsTest(unittest.TestCase):
+    def test_api_resource(self):
+        self.assertEqual("pods", run_metrics.api_resource("https://api:6443/api/v1/namespaces/default/pods/etcd-0"))
+        self.assertEqual("namespaces", run_metrics.api_resource("/api/v1/namespaces/default"))
+        self.assertEqual("nodes", run_metrics.api_resource("/api/v1/nodes?limit=500"))
+        self.assertEqual("deployments", run_metrics.api_resource("/apis/apps/v1/namespaces/ns/deployments"))
+        self.assertEqual("discovery", run_metrics.api_resource("/api/v1"))
+        self.assertEqual("other", run_metrics.api_resource("/version"))
+
+    def test_render(self):
+        run_metrics.set_iteration(2, float("inf"))
+        run_metrics.scenario_started("node_scenarios")
+        run_metrics.scenario_finished("node_scenarios", "failed", 1.5)
+        run_metrics.count_api_call("delete", "/api/v1/namespaces/default/pods/etcd-0")
+        metrics = run_metrics.render()
+        self.assertIn("kraken_iterations +Inf", metrics)
+        self.assertIn('kraken_scenarios_total{type="node_scenarios",status="failed"} 1', metrics)
+        self.assertIn('kraken_kubernetes_api_calls_total{method="DELETE",resource="pods"} 1', metrics)
+
+    def test_escape_label_value(self):
+        self.assertEqual('a\\\\b\\"c\\nd', run_metrics.escape_label_value('a\\b"c\nd'))
+        run_metrics.scenario_started('custom\\"\n')
+        run_metrics.scenario_finished('custom\\"\n', "passed", 1)
+        self.assertIn('kraken_scenarios_total{type="custom\\\\\\"\\n",status="passed"} 1', run_metrics.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+
+from kraken.scenario_graph import graph
+
+
+class ScenarioGraphTest(unittest.TestCase):
+    def test_dependencies_and_concurrency(self):
+        lock = threading.Lock()
+        running = []
+        peak = [0]
+        finished = []
+
+        def run_scenario(scenario_type, scenarios_list):
+            with lock:
+                running.append(scenarios_list[0])
+                peak[0] = max(peak[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(scenarios_list[0])
+                finished.append(scenarios_list[0])
+            if scenarios_list[0] == "bad.yml":
+                raise Exception("failed")
+            return scenarios_list[0]
+
+        groups = [
+            {"name": "nodes", "depends_on": ["pods"], "scenarios": [{"node_scenarios": ["node.yml"]}]},
+            {"name": "pods", "concurrency": 3, "scenarios": [{"plugin_scenarios": ["a.yml", "b.yml", "c.yml"]}]},
+            {"name": "net", "scenarios": [{"network_chaos": ["bad.yml"]}]},
+            {"name": "after-net", "depends_on": ["net"], "scenarios": [{"pvc_scenarios": ["pvc.yml"]}]},
+        ]
+        results = graph.run(groups, run_scenario, max_concurrency=4)
+
+        status = {result["scenario"]: result["status"] for result in results}
+        self.assertEqual("passed", status["a.yml"])
+        self.assertEqual("failed", status["bad.yml"])
+        self.assertEqual("skipped", status["pvc.yml"])
+        self.assertEqual("passed", status["node.yml"])
+        self.assertEqual(4, peak[0])
+        self.assertGreater(finished.index("node.yml"), max(finished.index(s) for s in ("a.yml", "b.yml", "c.yml")))
+
+    def test_stop(self):
+        calls = []
+        results = graph.run(
+            [{"name": "pods", "scenarios": [{"plugin_scenarios": ["a.yml", "b.yml"]}]}],
+            lambda scenario_type, scenarios_list: calls.append(scenarios_list[0]),
+            should_stop=lambda: len(calls) > 0
+        )
+        self.assertEqual(["a.yml"], calls)
+        self.assertEqual(["passed", "skipped"], [result["status"] for result in results])
+
+    def test_cycle(self):
+        with self.assertRaises(SystemExit):
+            graph.validate([
+                {"name": "a", "depends_on": ["b"]},
+                {"name": "b", "depends_on": ["a"]},
+            ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import http.client
+import json
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+
+import server
+import kraken.signal_state.state as signal_state
+
+
+class StatusServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.SimpleHTTPRequestHandler)
+        cls.httpd.daemon_threads = True
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+        cls.port = cls.httpd.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def tearDown(self):
+        signal_state.set_state(signal_state.RUN)
+
+    def request(self, method, path, timeout=10):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=timeout)
+        conn.request(method, path)
+        response = conn.getresponse()
+        body = response.read().decode()
+        conn.close()
+        return response, body
+
+    def test_status(self):
+        self.assertEqual(self.request("GET", "/")[1], "RUN")
+        self.assertEqual(self.request("POST", "/PAUSE")[1], "PAUSE")
+        self.assertEqual(self.request("GET", "/")[1], "PAUSE")
+
+    def test_watch_timeout(self):
+        version = signal_state.version
+        response, body = self.request("GET", "/watch?version=%s&timeout=0.1" % version)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(body), {"state": "RUN", "version": version})
+
+    def test_watch_change(self):
+        version = signal_state.version
+        threading.Timer(0.2, signal_state.set_state, args=("STOP",)).start()
+        response, body = self.request("GET", "/watch?version=%s&timeout=10" % version)
+        self.assertEqual(json.loads(body), {"state": "STOP", "version": version + 1})
+
+    def test_watch_missed_change(self):
+        # A version older than the current one is answered right away
+        signal_state.set_state("PAUSE")
+        response, body = self.request("GET", "/watch?version=%s&timeout=10" % (signal_state.version - 1))
+        self.assertEqual(json.loads(body), {"state": "PAUSE", "version": signal_state.version})
+
+    def test_watch_invalid(self):
+        self.assertEqual(self.request("GET", "/watch?version=latest")[0].status, 400)
+
+    def test_events(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        conn.request("GET", "/events")
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.assertEqual(response.readline(), b"id: %d\n" % signal_state.version)
+        self.assertEqual(response.readline(), b"event: state\n")
+        self.assertEqual(response.readline(), b"data: RUN\n")
+        self.assertEqual(response.readline(), b"\n")
+        signal_state.set_state("PAUSE")
+        self.assertEqual(response.readline(), b"id: %d\n" % signal_state.version)
+        self.assertEqual(response.readline(), b"event: state\n")
+        self.assertEqual(response.readline(), b"data: PAUSE\n")
+        conn.close()
+
+    def test_metrics(self):
+        response, body = self.request("GET", "/metrics")
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.getheader("Content-Type").startswith("text/plain; version=0.0.4"))
+        self.assertIn('kraken_signal_state{state="RUN"} 1', body)
+        self.assertIn('kraken_signal_state{state="STOP"} 0', body)
+        self.assertIn("# TYPE kraken_scenarios_total counter", body)
+
+
+if __name__ == '__main__':
+    unittest.main()
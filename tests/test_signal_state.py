@@ -0,0 +1,56 @@
+import functools
+import threading
+import time
+import unittest
+
+import kraken.signal_state.state as signal_state
+
+
+class SignalStateTest(unittest.TestCase):
+    def tearDown(self):
+        signal_state.set_state(signal_state.RUN)
+
+    def test_wait_elapses(self):
+        self.assertTrue(signal_state.wait(0.01))
+
+    def test_stop_interrupts_wait(self):
+        threading.Timer(0.05, signal_state.set_state, args=("STOP",)).start()
+        start_time = time.monotonic()
+        self.assertFalse(signal_state.wait(30))
+        self.assertLess(time.monotonic() - start_time, 5)
+        self.assertTrue(signal_state.stopped())
+        self.assertTrue(signal_state.stop_event.is_set())
+        signal_state.set_state("RUN")
+        self.assertFalse(signal_state.stop_event.is_set())
+
+    def test_pause(self):
+        signal_state.set_state("PAUSE")
+        threading.Timer(0.05, signal_state.set_state, args=("RUN",)).start()
+        self.assertEqual(signal_state.RUN, signal_state.wait_while_paused())
+
+    def test_pause_holds_wait(self):
+        signal_state.set_state("PAUSE")
+        threading.Timer(0.3, signal_state.set_state, args=("RUN",)).start()
+        start_time = time.monotonic()
+        self.assertTrue(signal_state.wait(0.1))
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.35)
+
+    def test_stop_ends_pause(self):
+        signal_state.set_state("PAUSE")
+        threading.Timer(0.05, signal_state.set_state, args=("STOP",)).start()
+        self.assertFalse(signal_state.wait(30))
+
+    def test_cleanup_hooks(self):
+        calls = []
+        first = functools.partial(calls.append, "first")
+        second = functools.partial(calls.append, "second")
+        removed = functools.partial(calls.append, "removed")
+        for hook in (first, second, removed):
+            signal_state.add_cleanup_hook(hook)
+        signal_state.remove_cleanup_hook(removed)
+        signal_state.run_cleanup_hooks()
+        self.assertEqual(["second", "first"], calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
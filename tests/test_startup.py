@@ -0,0 +1,88 @@
+import json
+import subprocess
+import sys
+import unittest
+from os.path import abspath, dirname
+
+
+# Modules of the cloud SDKs which must only be imported once a scenario of
+# the matching cloud type runs
+cloud_sdk_modules = [
+    "boto3",
+    "azure.mgmt.compute",
+    "azure.identity",
+    "googleapiclient",
+    "oauth2client",
+    "aliyunsdkcore",
+    "aliyunsdkecs",
+    "pyipmi",
+    "openshift",
+    "com.vmware",
+    "vmware.vapi",
+]
+
+# Modules resolving the cloud classes and plugins, imported one by one so
+# that a missing dependency of one of them doesn't hide the others, and
+# run_kraken itself last
+guarded_modules = [
+    "kraken.node_actions.providers",
+    "kraken.node_actions.run",
+    "kraken.shut_down.common_shut_down_func",
+    "kraken.zone_outage.actions",
+    "kraken.plugins",
+    "run_kraken",
+]
+
+# Every attempt to import a cloud SDK module is recorded, whether the SDK is
+# installed or not, so the check doesn't depend on the SDKs being installed
+startup_script = """
+import importlib
+import json
+import sys
+import time
+
+cloud_sdk_modules = %r
+attempted = set()
+
+
+class CloudSdkFinder:
+    def find_spec(self, fullname, path=None, target=None):
+        for module in cloud_sdk_modules:
+            if fullname == module or fullname.startswith(module + "."):
+                attempted.add(module)
+        return None
+
+
+sys.meta_path.insert(0, CloudSdkFinder())
+results = {}
+for module in %r:
+    start_time = time.perf_counter()
+    try:
+        importlib.import_module(module)
+        results[module] = {"duration": time.perf_counter() - start_time}
+    except ModuleNotFoundError as e:
+        results[module] = {"missing": e.name}
+print(json.dumps({"attempted": sorted(attempted), "results": results}))
+""" % (cloud_sdk_modules, guarded_modules)
+
+
+class StartupTest(unittest.TestCase):
+    def test_cloud_sdks_are_imported_lazily(self):
+        result = subprocess.run(
+            [sys.executable, "-c", startup_script],
+            cwd=dirname(dirname(abspath(__file__))),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            self.fail(result.stderr)
+        startup = json.loads(result.stdout.strip().splitlines()[-1])
+        imported = [module for module, outcome in startup["results"].items() if "missing" not in outcome]
+        self.assertIn("kraken.node_actions.providers", imported)
+        self.assertEqual(
+            [], startup["attempted"], "cloud SDKs imported at startup, import results: %s" % startup["results"]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import unittest
+
+import yaml
+from jinja2 import Environment, FileSystemLoader
+
+import kraken.templates.registry as templates
+
+network_chaos = os.path.join(os.path.dirname(__file__), "..", "kraken", "network_chaos")
+
+
+class TemplateRegistryTest(unittest.TestCase):
+    def test_render_matches_jinja(self):
+        params = {"jobname": "latency12345", "nodename": "worker-1", "cmd": "tc qdisc ls dev ens5 ;", "run_id": "ab12"}
+        jinja_template = Environment(loader=FileSystemLoader(network_chaos)).get_template("job.j2")
+        self.assertEqual(
+            templates.render(network_chaos, "job.j2", **params), yaml.safe_load(jinja_template.render(**params))
+        )
+
+    def test_compiled_once(self):
+        self.assertIs(templates.get_template(network_chaos, "job.j2"), templates.get_template(network_chaos, "job.j2"))
+
+    def test_renders_are_independent(self):
+        template = templates.from_string("metadata:\n  name: chaos-{{name}}\n  labels: {{labels}}\n")
+        first = template.render(name="a", labels={"app": "a"})
+        first["metadata"]["name"] = "changed"
+        self.assertEqual(
+            template.render(name="b", labels={"app": "b"}), {"metadata": {"name": "chaos-b", "labels": {"app": "b"}}}
+        )
+
+    def test_jinja_fallback(self):
+        template = templates.from_string("items:\n{% for item in items %}- {{ item | upper }}\n{% endfor %}")
+        self.assertIsNone(template.manifest)
+        self.assertEqual(template.render(items=["a", "b"]), {"items": ["A", "B"]})
+
+
+if __name__ == "__main__":
+    unittest.main()